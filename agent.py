@@ -1,14 +1,77 @@
 import mesa
-from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT
+from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT, NO_DISPLACER
+from streams import SLOT_ADOPT, SLOT_AUTOMATE, SLOT_DISPLACE, SLOT_HIRE, SLOT_MERGE, SLOT_MOVE, SLOT_UPSKILL
+from events import ADOPT, DISPLACE, REHIRE, SPAWN, MERGE, REMOVE, NO_AGENT, NO_CAUSE
+
+# Attributes a worker adds to its agent base class
+WORKER_SLOTS = ("tracked", "_state", "_wealth", "displaced_by", "revenue")
+
+class WorkerBehavior:
+    """
+    The worker rules, shared by WorkerAgent and CompactWorkerAgent
+
+    Declares no attributes of its own, so a slotted base stays slotted.
+    """
+    __slots__ = ()
 
-class WorkerAgent(mesa.Agent):
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
-        self.state = HUMAN
-        self.wealth = model.starting_wealth 
-        self.displaced_by = None 
+        # Not counted in the model's aggregates until model.add_agent()
+        self.tracked = False
+        self._state = HUMAN
+        self._wealth = model.starting_wealth 
+        self.displaced_by = NO_DISPLACER
         self.revenue = 0 
 
+    # --- AGGREGATE-TRACKED ATTRIBUTES ---
+    # Every change is forwarded to the model so its per-state counters stay current
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, new_state):
+        if self.tracked:
+            self.model.on_state_change(self, self._state, new_state)
+        self._state = new_state
+
+    @property
+    def wealth(self):
+        return self._wealth
+
+    @wealth.setter
+    def wealth(self, new_wealth):
+        if self.tracked:
+            self.model.state_wealth[self._state] += new_wealth - self._wealth
+            self._wealth = new_wealth
+            self.model.top_wealth.wealth_changed(self, self._state, new_wealth)
+        else:
+            self._wealth = new_wealth
+
+    # --- RANDOM DRAWS ---
+    # With rng_mode="counter" a draw is keyed on (seed, unique_id, step, slot)
+    # instead of being the next number of the shared model.random sequence
+
+    def uniform(self, slot):
+        streams = self.model.streams
+        if streams is None:
+            return self.random.random()
+        return streams.uniform(self.unique_id, self.model._steps, slot)
+
+    def choose(self, options, slot):
+        streams = self.model.streams
+        if streams is None:
+            return self.random.choice(options)
+        return streams.choice(options, self.unique_id, self.model._steps, slot)
+
+    # --- EVENT LOG ---
+
+    def log_event(self, type, amount, other=NO_AGENT, cause=NO_CAUSE, amount2=0.0):
+        """Adds a transition to model.events (callers check that it is not None)"""
+        self.model.events.record(self.model._steps + 1, type, self.unique_id, self.pos, self._state,
+                                 amount, other, cause, amount2)
+
     def move(self):
         if self.pos is None or self.state == DISPLACED or self.state == UBI_RECIPIENT:
             return
@@ -17,23 +80,32 @@ class WorkerAgent(mesa.Agent):
             self.pos, moore=True, include_center=False
         )
         
-        valid_steps = []
-        for pos in possible_steps:
-            cell_contents = self.model.grid.get_cell_list_contents(pos)
-            # Ghost Logic: Blocked only if not UBI
-            blocking_agents = [a for a in cell_contents if a.state != UBI_RECIPIENT]
-            if not blocking_agents:
-                valid_steps.append(pos)
+        # Ghost Logic: Blocked only if not UBI (the grid keeps a per-cell count)
+        blocking = self.model.grid.blocking
+        valid_steps = [pos for pos in possible_steps if blocking[pos] == 0]
 
         if valid_steps:
-            new_position = self.random.choice(valid_steps)
+            new_position = self.choose(valid_steps, SLOT_MOVE)
             self.model.grid.move_agent(self, new_position)
 
     def step(self):
         if self.pos is None:
             return
 
-        # --- ECONOMICS (UPDATED SPLIT LOGIC) ---
+        self.settle_economics()
+
+        # --- BEHAVIOR ---
+        if self.state == UBI_RECIPIENT:
+            self.step_ubi_recipient()
+        elif self.state == DISPLACED:
+            self.step_displaced()
+        elif self.state == AUTOMATED:
+            self.step_automated()
+        else:
+            self.step_worker()
+
+    def settle_economics(self):
+        """Transfers in, living costs out; robots earn revenue and pay the robot tax"""
         if self.state != AUTOMATED:
             if self.state == UBI_RECIPIENT:
                 # Tier 1: The "Opt-Out" Share
@@ -51,108 +123,164 @@ class WorkerAgent(mesa.Agent):
             self.model.government_pot += tax_bill
             self.wealth += net_income
 
-        # --- BEHAVIOR ---
-        
-        # CASE 0: UBI RECIPIENT
-        if self.state == UBI_RECIPIENT:
-            if self.wealth <= 0:
-                self.model.total_removed += 1  
-                self.model.removed_this_step += 1       
-                self.model.grid.remove_agent(self)
-                self.model.schedule.remove(self)
-            return
+    # --- BEHAVIOR BRANCHES ---
 
-        # CASE 1: DISPLACED
-        elif self.state == DISPLACED:
-            cellmates = self.model.grid.get_cell_list_contents(self.pos)
-            active_squatters = [a for a in cellmates if a.state != DISPLACED and a.state != UBI_RECIPIENT and a != self]
-            
-            if not active_squatters and self.random.random() < self.model.hiring_chance:
-                if self.random.random() < self.model.upskill_chance:
-                    self.state = AUGMENTED
-                else:
-                    self.state = HUMAN
-                self.displaced_by = None
-                self.model.total_retrained += 1      
-                self.model.retrained_this_step += 1 
-                return 
-            
-        # CASE 2: AUTOMATED
-        elif self.state == AUTOMATED:
-            self.move()
+    def step_ubi_recipient(self):
+        """CASE 0: UBI recipients leave once their savings run out"""
+        if self.wealth <= 0:
+            self.model.total_removed += 1  
+            self.model.removed_this_step += 1       
+            if self.model.events is not None:
+                self.log_event(REMOVE, self.wealth)
+            self.model.remove_agent(self)
+
+    def step_displaced(self):
+        """CASE 1: Displaced workers may be rehired into a cell with no active squatters"""
+        # Active agents sharing the cell: blocking agents other than displaced ones (self included)
+        grid = self.model.grid
+        active_squatters = grid.blocking[self.pos] - grid.counts[DISPLACED][self.pos]
+
+        if not active_squatters and self.uniform(SLOT_HIRE) < self.model.hiring_chance:
+            if self.uniform(SLOT_UPSKILL) < self.model.upskill_chance:
+                self.state = AUGMENTED
+            else:
+                self.state = HUMAN
+            self.displaced_by = NO_DISPLACER
+            self.model.total_retrained += 1      
+            self.model.retrained_this_step += 1 
+            if self.model.events is not None:
+                self.log_event(REHIRE, self.wealth)
+
+    def step_automated(self):
+        """CASE 2: Robots move, then may absorb a neighboring robot"""
+        self.move()
+        self.merge()
+
+    def merge(self):
+        """Absorbs a random adjacent robot (revenue and wealth) when enough robots are adjacent"""
+        n_automated = self.model.grid.count_around(self.pos, 1)[AUTOMATED]
+
+        if n_automated >= self.model.combination_threshold:
             neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False)
             auto_neighbors = [n for n in neighbors if n.state == AUTOMATED]
-            
-            if len(auto_neighbors) >= self.model.combination_threshold:
-                target = self.random.choice(auto_neighbors)
-                self.revenue += target.revenue 
-                self.wealth += target.wealth
-                self.model.total_merged += 1  
-                self.model.grid.remove_agent(target)
-                self.model.schedule.remove(target)
-                return 
-            
-        # CASE 3: WORKERS
-        else:
-            self.move()
-            current_wage = 0
-            if self.state == HUMAN: 
-                current_wage = self.model.wage_human
-                self.wealth += current_wage
-            elif self.state == AUGMENTED: 
-                current_wage = self.model.wage_augmented
-                self.wealth += current_wage
-            
-            if self.wealth <= 0:
-                self.model.total_removed += 1  
-                self.model.removed_this_step += 1       
-                self.model.grid.remove_agent(self)
-                self.model.schedule.remove(self)
-                return 
-
-            neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False, radius=2)
-            n_augmented = len([n for n in neighbors if n.state == AUGMENTED])
-            n_automated = len([n for n in neighbors if n.state == AUTOMATED])
-            robot_neighbors = [n for n in neighbors if n.state == AUTOMATED]
-
-            # --- EFFICIENCY SQUEEZE LOGIC ---
-            if self.state == HUMAN and n_augmented >= self.model.adopt_human_augmented_thresh:
-                if self.random.random() < self.model.human_displacement_chance:
-                    self.state = DISPLACED
-                    self.displaced_by = AUGMENTED
-                    self.model.displaced_this_step += 1
-                    return
-                elif self.random.random() < self.model.adopt_human_augmented_prob:
-                    self.state = AUGMENTED
-                    return
-
-            # --- THE FIX STARTS HERE ---
-            if self.state == AUGMENTED and n_augmented >= self.model.automation_threshold:
-                if self.random.random() < self.model.automation_chance:
-                    # 1. Spawn the new Robot (Capital)
-                    new_id = self.model.get_next_id()
-                    robot = WorkerAgent(new_id, self.model)
-                    robot.state = AUTOMATED
-                    robot.revenue = self.model.wage_augmented # Inherits high productivity
-                    robot.wealth = 0 # Fresh machine (starts with 0 wealth)
-                    
-                    # Place Robot at the same location as its creator
-                    self.model.grid.place_agent(robot, self.pos)
-                    self.model.schedule.add(robot)
-                    
-                    # 2. Downgrade the Human (Labor)
-                    self.state = DISPLACED
-                    self.displaced_by = AUTOMATED
-                    self.model.displaced_this_step += 1
-                    return
-            # --- THE FIX ENDS HERE ---
-
-            if n_automated >= self.model.displacement_threshold:
+            target = self.choose(auto_neighbors, SLOT_MERGE)
+            self.revenue += target.revenue 
+            self.wealth += target.wealth
+            self.model.total_merged += 1  
+            if self.model.events is not None:
+                self.log_event(MERGE, target.revenue, other=target.unique_id, amount2=target.wealth)
+            self.model.remove_agent(target)
+
+    def step_worker(self):
+        """CASE 3: Workers move, earn wages, and react to augmented and automated neighbors"""
+        self.move()
+        current_wage = 0
+        if self.state == HUMAN: 
+            current_wage = self.model.wage_human
+            self.wealth += current_wage
+        elif self.state == AUGMENTED: 
+            current_wage = self.model.wage_augmented
+            self.wealth += current_wage
+
+        if self.wealth <= 0:
+            self.model.total_removed += 1  
+            self.model.removed_this_step += 1       
+            if self.model.events is not None:
+                self.log_event(REMOVE, self.wealth)
+            self.model.remove_agent(self)
+            return 
+
+        around = self.model.grid.count_around(self.pos, 2)
+        n_augmented = int(around[AUGMENTED])
+        n_automated = int(around[AUTOMATED])
+
+        # --- EFFICIENCY SQUEEZE LOGIC ---
+        if self.state == HUMAN and n_augmented >= self.model.adopt_human_augmented_thresh:
+            if self.uniform(SLOT_DISPLACE) < self.model.human_displacement_chance:
+                self.state = DISPLACED
+                self.displaced_by = AUGMENTED
+                self.model.displaced_this_step += 1
+                if self.model.events is not None:
+                    self.log_event(DISPLACE, self.wealth, cause=AUGMENTED)
+                return
+            elif self.uniform(SLOT_ADOPT) < self.model.adopt_human_augmented_prob:
+                self.state = AUGMENTED
+                if self.model.events is not None:
+                    self.log_event(ADOPT, self.wealth)
+                return
+
+        # --- THE FIX STARTS HERE ---
+        if self.state == AUGMENTED and n_augmented >= self.model.automation_threshold:
+            if self.uniform(SLOT_AUTOMATE) < self.model.automation_chance:
+                # 1. Spawn the new Robot (Capital)
+                new_id = self.model.get_next_id()
+                robot = self.model.agent_class(new_id, self.model)
+                robot.state = AUTOMATED
+                robot.revenue = self.model.wage_augmented # Inherits high productivity
+                robot.wealth = 0 # Fresh machine (starts with 0 wealth)
+
+                # Place Robot at the same location as its creator
+                self.model.add_agent(robot, self.pos)
+
+                # 2. Downgrade the Human (Labor)
                 self.state = DISPLACED
                 self.displaced_by = AUTOMATED
                 self.model.displaced_this_step += 1
-                if robot_neighbors:
-                    loot_share = current_wage / len(robot_neighbors)
-                    for robot in robot_neighbors:
-                        robot.revenue += loot_share
-                return
\ No newline at end of file
+                if self.model.events is not None:
+                    robot.log_event(SPAWN, robot.revenue, other=self.unique_id)
+                    self.log_event(DISPLACE, self.wealth, other=new_id, cause=AUTOMATED)
+                return
+        # --- THE FIX ENDS HERE ---
+
+        if n_automated >= self.model.displacement_threshold:
+            self.state = DISPLACED
+            self.displaced_by = AUTOMATED
+            self.model.displaced_this_step += 1
+            if n_automated:
+                neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False, radius=2)
+                robot_neighbors = [n for n in neighbors if n.state == AUTOMATED]
+                loot_share = current_wage / len(robot_neighbors)
+                for robot in robot_neighbors:
+                    robot.revenue += loot_share
+            if self.model.events is not None:
+                self.log_event(DISPLACE, self.wealth, cause=AUTOMATED, amount2=current_wage if n_automated else 0.0)
+
+class WorkerAgent(WorkerBehavior, mesa.Agent):
+    """A worker as a regular mesa.Agent (one __dict__ per agent, registered with the model)"""
+
+# ==========================================
+# COMPACT AGENTS
+# ==========================================
+
+class CompactAgent:
+    """
+    The parts of mesa.Agent a worker uses, in __slots__ instead of a __dict__
+
+    Unlike mesa.Agent it does not register with the model's own agent sets
+    (model.agents stays empty): the model tracks its agents through the
+    schedule and the grid, and each extra registration costs a weak reference
+    per agent.
+    """
+    __slots__ = ("unique_id", "model", "pos", "__weakref__")
+
+    def __init__(self, unique_id, model):
+        self.unique_id = unique_id
+        self.model = model
+        self.pos = None
+
+    def remove(self):
+        pass
+
+    def step(self):
+        pass
+
+    def advance(self):
+        pass
+
+    @property
+    def random(self):
+        return self.model.random
+
+class CompactWorkerAgent(WorkerBehavior, CompactAgent):
+    """A worker with slotted attributes, for large populations (compact_agents=True)"""
+    __slots__ = WORKER_SLOTS
\ No newline at end of file
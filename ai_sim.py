@@ -2,7 +2,19 @@
 Evolutionary Automata Simulation - Entry Point
 Main script to launch the simulation server.
 """
-from server import server
+import argparse
+from server import GRID_HEIGHT, GRID_WIDTH, build_playback_server, build_server
 
 if __name__ == "__main__":
-    server.launch()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evolutionary Automata Simulation server")
+    parser.add_argument("--width", type=int, default=GRID_WIDTH, help="grid width in cells")
+    parser.add_argument("--height", type=int, default=GRID_HEIGHT, help="grid height in cells")
+    parser.add_argument("--playback", metavar="FILE",
+                        help="play back a recording made with recording.py instead of running the model")
+    parser.add_argument("--surrogate", metavar="FILE",
+                        help="show predictions of a surrogate trained with surrogate.py for the slider values")
+    args = parser.parse_args()
+    if args.playback:
+        build_playback_server(args.playback).launch()
+    else:
+        build_server(args.width, args.height, args.surrogate).launch()
\ No newline at end of file
@@ -1,14 +1,58 @@
 """
 Batch runner for AI Adoption Simulator
-Run experiments and export results to CSV
+Run experiments and export results to CSV, Parquet or Arrow
 """
 
 from model import EvolutionaryModel
+from vectorized_model import VectorizedEvolutionaryModel
+from synchronous import SynchronousEvolutionaryModel
+from meanfield import MeanFieldModel
+from stopping import pad_stopped
+from results import ResultWriter, MODEL_TABLE, AGENT_TABLE
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
+import tempfile
+import time
 
-def run_single_experiment(params, steps=500, output_dir="results"):
+# Simulation engines that accept the same parameters
+ENGINES = {
+    "agent": EvolutionaryModel,
+    "vectorized": VectorizedEvolutionaryModel,
+    "synchronous": SynchronousEvolutionaryModel,
+    "meanfield": MeanFieldModel,
+}
+
+# Per-run columns added by run_single_experiment that are not per-step data
+STOP_COLUMNS = ["stop_step", "stop_reason"]
+
+# Columns compared by compare_engines
+EQUIVALENCE_COLUMNS = [
+    "Human", "Augmented", "Automated", "Displaced", "UBI Recipients",
+    "Fired (Step)", "Hired (Step)", "Alive", "Total Removed", "Merged (Singularity)",
+    "Wealth_Labor", "Wealth_Capital", "Wealth_State",
+]
+
+def derive_seed(base_seed, index):
+    """
+    Deterministic seed for one experiment of a batch
+
+    The same (base_seed, index) pair always gives the same seed, whichever
+    process or order the experiment runs in.
+    """
+    return int(np.random.SeedSequence([base_seed, index]).generate_state(1)[0])
+
+def agent_vars_dataframe(model):
+    """Agent-level data, or an empty DataFrame when no agent reporters are defined"""
+    if not model.datacollector.agent_reporters:
+        return pd.DataFrame()
+    return model.datacollector.get_agent_vars_dataframe()
+
+def run_single_experiment(params, steps=500, output_dir="results", engine="agent", verbose=True,
+                          start_from=None, checkpoint_path=None, checkpoint_every=None, cache=None,
+                          pad=True, event_log=None):
     """
     Run a single experiment with given parameters
     
@@ -16,46 +60,125 @@ def run_single_experiment(params, steps=500, output_dir="results"):
         params: Dictionary of model parameters
         steps: Number of simulation steps to run
         output_dir: Directory to save results
+        engine: Key into ENGINES selecting the simulation engine
+        verbose: Print parameters and step progress
+        start_from: Checkpoint to branch from; params then override its saved
+            attributes and the run continues until the model reaches `steps`
+        checkpoint_path: Save the model here when the run ends (and every
+            checkpoint_every steps); if the file exists, resume from it
+        checkpoint_every: Steps between intermediate checkpoints
+        cache: ResultCache to read the run from and store it in; a cached run
+            of the same params (seed included) with at most `steps` steps is
+            restored and only the remaining steps are simulated
+        pad: When a stop condition (stop_* params) ends the run early, add rows
+            up to `steps` repeating the last one, marked padded=True
+        event_log: Path of a transition event log (see events.py); a resumed
+            run continues it from the checkpoint's step. Runs with a log
+            bypass the cache, since a cached run would log nothing.
     
     Returns:
-        Tuple of (model_data, agent_data) DataFrames
+        Tuple of (model_data, agent_data) DataFrames; model_data has
+        stop_step and stop_reason columns (empty when the run went the distance)
     """
-    print(f"Running experiment with params: {params}")
+    if verbose:
+        print(f"Running experiment with params: {params}")
     
-    # Create model
-    model = EvolutionaryModel(**params)
+    # Create model (or pick up a saved or cached one)
+    use_cache = False
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        model = ENGINES[engine].restore(checkpoint_path, event_log=event_log)
+        if verbose:
+            print(f"  Resuming from {checkpoint_path} at step {model._steps}")
+    elif start_from is not None:
+        model = ENGINES[engine].restore(start_from, event_log=event_log, **params)
+    else:
+        # Only runs built from params alone are cached, not resumes or branches
+        use_cache = cache is not None and event_log is None
+        model = cache.load(ENGINES[engine], engine, params, steps) if use_cache else None
+        if model is None:
+            model = ENGINES[engine](**params, event_log=event_log)
+        elif verbose:
+            print(f"  Continuing cached run from step {model._steps}")
+    start_step = model._steps
     
     # Run simulation
-    for i in range(steps):
+    for i in range(model._steps, steps):
+        if not model.running:
+            break
         model.step()
-        if i % 100 == 0:
+        if verbose and i % 100 == 0:
             print(f"  Step {i}/{steps}")
+        if checkpoint_path and checkpoint_every and model._steps % checkpoint_every == 0:
+            model.checkpoint(checkpoint_path)
+    
+    if checkpoint_path:
+        model.checkpoint(checkpoint_path)
+    if model.events is not None:
+        model.events.close()
+    # Engines holding threads (the synchronous engine's tile pool) release them here
+    if hasattr(model, "close"):
+        model.close()
+    
+    if use_cache and model._steps > start_step:
+        cache.store(model, engine, params)
+    
+    if verbose and model.stop_reason:
+        print(f"  Stopped at step {model.stop_step}: {model.stop_reason}")
+    
+    # Per-phase timing summary (models built with enable_logging=True)
+    if getattr(model, "profiler", None):
+        if verbose:
+            print(model.profiler.report())
+        model.profiler.stop()
     
     # Get data
     model_data = model.datacollector.get_model_vars_dataframe()
-    agent_data = model.datacollector.get_agent_vars_dataframe()
+    agent_data = agent_vars_dataframe(model)
+    if pad:
+        model_data = pad_stopped(model_data, model.datacollector.steps, steps, model.datacollector.collect_every)
     
     # Add experiment metadata to model data
+    model_data['stop_step'] = pd.array([model.stop_step] * len(model_data), dtype="Int64")
+    model_data['stop_reason'] = model.stop_reason
     for key, value in params.items():
         model_data[f'param_{key}'] = value
     
     return model_data, agent_data
 
-def save_results(model_data, agent_data, experiment_name, output_dir="results"):
+def save_results(model_data, agent_data, experiment_name, output_dir="results", format="csv",
+                 float32=None):
     """
-    Save experiment results to CSV files
+    Save experiment results to CSV files, or to a Parquet / Arrow directory
     
     Args:
         model_data: DataFrame with model-level data
         agent_data: DataFrame with agent-level data
         experiment_name: Name for the output files
         output_dir: Directory to save files
+        format: "csv", or "parquet" / "arrow" to write one file per
+            experiment_id through results.ResultWriter
+        float32: Columns stored as float32 in Parquet / Arrow output (True
+            for every wealth column)
+    
+    Returns:
+        Tuple of (model path, agent path); for Parquet / Arrow, the model
+        and agent table directories
     """
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
     # Create timestamped filenames
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if format != "csv":
+        writer = ResultWriter(os.path.join(output_dir, f"{experiment_name}_{timestamp}"), format, float32)
+        experiments = (model_data.groupby("experiment_id", sort=True)
+                       if "experiment_id" in model_data.columns else [(0, model_data)])
+        for experiment_id, frame in experiments:
+            agents = (agent_data[agent_data["experiment_id"] == experiment_id]
+                      if "experiment_id" in agent_data.columns else None)
+            writer.write(experiment_id, frame.drop(columns="experiment_id", errors="ignore"), agents)
+        print(f"\nResults saved: {writer.directory} ({writer.experiments_written} experiments, {format})")
+        return os.path.join(writer.directory, MODEL_TABLE), os.path.join(writer.directory, AGENT_TABLE)
     model_file = os.path.join(output_dir, f"{experiment_name}_model_{timestamp}.csv")
     agent_file = os.path.join(output_dir, f"{experiment_name}_agents_{timestamp}.csv")
     
@@ -69,25 +192,135 @@ def save_results(model_data, agent_data, experiment_name, output_dir="results"):
     
     return model_file, agent_file
 
-def run_batch_experiments(param_variations, steps=500, output_dir="results"):
+def _run_job(index, params, steps, output_dir, engine, start_from=None, cache=None):
+    """Process-pool entry point: one experiment, timed, without step printing"""
+    start = time.perf_counter()
+    model_data, agent_data = run_single_experiment(params, steps, output_dir, engine, verbose=False,
+                                                   start_from=start_from, cache=cache)
+    return index, model_data, agent_data, time.perf_counter() - start
+
+def _report_progress(done, total, index, elapsed):
+    print(f"  [{done}/{total or '?'}] experiment {index} finished in {elapsed:.1f}s")
+
+def iter_experiments(jobs, steps=500, output_dir="results", workers=1, engine="agent",
+                     max_pending=None, total=None, progress=True, start_from=None, cache=None):
+    """
+    Run experiments and yield each result as soon as it finishes
+    
+    Jobs are consumed lazily and at most max_pending experiments are queued
+    or running at a time, so arbitrarily long job streams run in bounded memory.
+    
+    Args:
+        jobs: Iterable of (index, params) pairs
+        steps: Number of steps per experiment
+        output_dir: Directory to save results
+        workers: Number of worker processes (1 runs serially, None uses every core)
+        engine: Key into ENGINES selecting the simulation engine
+        max_pending: Cap on queued experiments (defaults to 2 per worker)
+        total: Number of jobs, for progress output only
+        progress: Print one line per finished experiment
+        start_from: Checkpoint every experiment branches from (params are overrides)
+        cache: ResultCache shared by every experiment (see run_single_experiment)
+    
+    Yields:
+        Tuples of (index, model_data, agent_data), in completion order
+    
+    Raises:
+        RuntimeError: If an experiment raises or a worker process dies
+    """
+    workers = os.cpu_count() if workers is None else workers
+    done = 0
+    
+    if workers <= 1:
+        for index, params in jobs:
+            try:
+                index, model_data, agent_data, elapsed = _run_job(index, params, steps, output_dir, engine, start_from, cache)
+            except Exception as exc:
+                raise RuntimeError(f"Experiment {index} failed with params {params}") from exc
+            done += 1
+            if progress:
+                _report_progress(done, total, index, elapsed)
+            yield index, model_data, agent_data
+        return
+
+    max_pending = max_pending or 2 * workers
+    jobs = iter(jobs)
+    index = params = None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        try:
+            while True:
+                for index, params in jobs:
+                    pending[executor.submit(_run_job, index, params, steps, output_dir, engine, start_from, cache)] = (index, params)
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                future = next(as_completed(pending))
+                index, params = pending.pop(future)
+                _, model_data, agent_data, elapsed = future.result()
+                done += 1
+                if progress:
+                    _report_progress(done, total, index, elapsed)
+                yield index, model_data, agent_data
+        except Exception as exc:
+            # Covers exceptions raised by an experiment and BrokenProcessPool
+            # when a worker dies; pending experiments are dropped, not awaited
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise RuntimeError(f"Experiment {index} failed with params {params}") from exc
+
+def run_batch_experiments(param_variations, steps=500, output_dir="results",
+                          workers=1, base_seed=None, engine="agent", cache=None, writer=None):
     """
     Run multiple experiments with different parameter combinations
     
+    With workers > 1 the experiments run in a process pool. When base_seed is
+    given, every experiment without its own "seed" gets derive_seed(base_seed, i),
+    so a parallel batch is bit-identical to a serial one with the same base_seed.
+    
     Args:
         param_variations: List of parameter dictionaries
         steps: Number of steps per experiment
         output_dir: Directory to save results
+        workers: Number of worker processes (1 runs serially, None uses every core)
+        base_seed: Seed from which per-experiment seeds are derived
+        engine: Key into ENGINES selecting the simulation engine
+        cache: ResultCache to reuse earlier runs from (seeded experiments only)
+        writer: results.ResultWriter; each experiment is written as soon as
+            it finishes and is not kept in memory
     
     Returns:
-        Combined DataFrames for all experiments
+        Combined DataFrames for all experiments, in experiment order, or with
+        a writer, a results.ResultReader over what it wrote
+    
+    Raises:
+        RuntimeError: If an experiment raises or a worker process dies
     """
+    jobs = []
+    for i, params in enumerate(param_variations):
+        if base_seed is not None and "seed" not in params:
+            params = {**params, "seed": derive_seed(base_seed, i)}
+        jobs.append((i, params))
+
+    total = len(jobs)
+    workers = os.cpu_count() if workers is None else workers
+    print(f"\n=== Running {total} experiments ({engine} engine, {min(workers, total)} worker(s)) ===")
+    results = [None] * total
+    
+    for index, model_data, agent_data in iter_experiments(
+            jobs, steps, output_dir, workers, engine, total=total, cache=cache):
+        if writer is not None:
+            writer.write(index, model_data, agent_data)
+        else:
+            results[index] = (model_data, agent_data)
+
+    if writer is not None:
+        return writer.reader()
+
     all_model_data = []
     all_agent_data = []
     
-    for i, params in enumerate(param_variations):
-        print(f"\n=== Experiment {i+1}/{len(param_variations)} ===")
-        model_data, agent_data = run_single_experiment(params, steps, output_dir)
-        
+    for i, (model_data, agent_data) in enumerate(results):
         # Add experiment ID
         model_data['experiment_id'] = i
         agent_data['experiment_id'] = i
@@ -101,6 +334,96 @@ def run_batch_experiments(param_variations, steps=500, output_dir="results"):
     
     return combined_model, combined_agent
 
+def run_branched_experiments(base_params, branches, prefix_steps, steps=500, output_dir="results",
+                             workers=1, engine="agent", base_seed=None, checkpoint_path=None,
+                             writer=None):
+    """
+    Run a shared warm-up once, then fork every branch from its final state
+    
+    The first prefix_steps steps are simulated once with base_params and saved
+    as a checkpoint. Each branch restores that checkpoint, applies its own
+    parameter overrides and runs on to `steps`, so the warm-up is paid once
+    instead of once per variant. Branches continue the prefix's random stream
+    (common random numbers) unless base_seed gives each one its own seed.
+    
+    Args:
+        base_params: Dictionary of model parameters for the shared prefix
+        branches: List of dictionaries of parameters to override per branch
+        prefix_steps: Number of steps in the shared prefix
+        steps: Total number of steps per branch, prefix included
+        output_dir: Directory to save results
+        workers: Number of worker processes (1 runs serially, None uses every core)
+        engine: Key into ENGINES selecting the simulation engine
+        base_seed: If set, branch i is re-seeded with derive_seed(base_seed, i)
+        checkpoint_path: Where to keep the prefix checkpoint; an existing file is
+            reused instead of re-running the prefix (default: temporary file)
+        writer: results.ResultWriter; each branch is written as soon as it
+            finishes and is not kept in memory
+    
+    Returns:
+        Tuple of (combined_model_data, combined_agent_data) DataFrames, with the
+        prefix rows repeated in every branch, or with a writer, a
+        results.ResultReader over what it wrote
+    """
+    keep_checkpoint = checkpoint_path is not None
+    if checkpoint_path is None:
+        os.makedirs(output_dir, exist_ok=True)
+        handle, checkpoint_path = tempfile.mkstemp(suffix=".ckpt", dir=output_dir)
+        os.close(handle)
+        os.remove(checkpoint_path)
+    
+    if os.path.exists(checkpoint_path):
+        print(f"\n=== Reusing prefix checkpoint {checkpoint_path} ===")
+    else:
+        print(f"\n=== Running shared prefix: {prefix_steps} steps ===")
+        start = time.perf_counter()
+        run_single_experiment(base_params, prefix_steps, output_dir, engine, verbose=False,
+                              checkpoint_path=checkpoint_path)
+        print(f"  prefix finished in {time.perf_counter() - start:.1f}s")
+    
+    jobs = []
+    for i, overrides in enumerate(branches):
+        if base_seed is not None and "seed" not in overrides:
+            overrides = {**overrides, "seed": derive_seed(base_seed, i)}
+        jobs.append((i, overrides))
+    
+    total = len(jobs)
+    print(f"\n=== Running {total} branches from step {prefix_steps} ({engine} engine) ===")
+    results = [None] * total
+    try:
+        for index, model_data, agent_data in iter_experiments(
+                jobs, steps, output_dir, workers, engine, total=total,
+                start_from=checkpoint_path):
+            for key, value in base_params.items():
+                if f'param_{key}' not in model_data:
+                    model_data[f'param_{key}'] = value
+            model_data['branch_step'] = prefix_steps
+            if writer is not None:
+                writer.write(index, model_data, agent_data)
+            else:
+                results[index] = (model_data, agent_data)
+    finally:
+        if not keep_checkpoint and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+    
+    if writer is not None:
+        return writer.reader()
+    
+    all_model_data = []
+    all_agent_data = []
+    
+    for i, (model_data, agent_data) in enumerate(results):
+        model_data['experiment_id'] = i
+        agent_data['experiment_id'] = i
+        
+        all_model_data.append(model_data)
+        all_agent_data.append(agent_data)
+    
+    combined_model = pd.concat(all_model_data, ignore_index=True)
+    combined_agent = pd.concat(all_agent_data, ignore_index=True)
+    
+    return combined_model, combined_agent
+
 # ==========================================
 # EXAMPLE EXPERIMENTS
 # ==========================================
@@ -117,6 +440,14 @@ def experiment_ubi_viability():
     model_data, agent_data = run_batch_experiments(param_variations, steps=500)
     save_results(model_data, agent_data, "ubi_viability")
 
+def experiment_ubi_branches():
+    """Experiment 1b: The UBI viability tax rates, branched from one shared 100-step warm-up"""
+    base_params = {"robot_tax_rate": 0.0, "initial_ubi_fraction": 0.2, "seeds_automated": 50}
+    branches = [{"robot_tax_rate": rate} for rate in (0.0, 0.25, 0.5, 0.75)]
+    
+    model_data, agent_data = run_branched_experiments(base_params, branches, prefix_steps=100, steps=500)
+    save_results(model_data, agent_data, "ubi_branches")
+
 def experiment_adoption_cascades():
     """Experiment 2: AI adoption spread dynamics"""
     param_variations = [
@@ -143,13 +474,85 @@ def experiment_displacement_threshold():
 def experiment_wealth_inequality():
     """Experiment 4: Wealth concentration dynamics"""
     param_variations = [
-        {"combination_threshold": 2, "robot_tax_rate": 0.0, "seeds_automated": 50},
-        {"combination_threshold": 2, "robot_tax_rate": 0.5, "seeds_automated": 50},
+        {"combination_threshold": 2, "robot_tax_rate": 0.0, "seeds_automated": 50, "wealth_stats": True},
+        {"combination_threshold": 2, "robot_tax_rate": 0.5, "seeds_automated": 50, "wealth_stats": True},
     ]
     
     model_data, agent_data = run_batch_experiments(param_variations, steps=500)
     save_results(model_data, agent_data, "wealth_inequality")
 
+def compare_engines(params=None, steps=200, replicates=12, burn_in=100,
+                    columns=EQUIVALENCE_COLUMNS, z_threshold=3.0, rel_tolerance=0.05, engine="vectorized"):
+    """
+    Statistical equivalence check of an array engine against the agent-based model
+
+    Both engines are run `replicates` times with seeds 0..replicates-1. For each
+    run, every column is averaged over steps burn_in..steps. A column passes when
+    the two engines' mean run-averages differ by less than `z_threshold` standard
+    errors, or by less than `rel_tolerance` of the agent-based mean.
+
+    Args:
+        params: Dictionary of model parameters shared by both engines
+        steps: Number of simulation steps per run
+        replicates: Number of seeds per engine
+        burn_in: Steps to skip before averaging
+        columns: DataCollector columns to compare
+        z_threshold: Allowed difference in standard errors
+        rel_tolerance: Allowed relative difference
+        engine: Key into ENGINES of the engine checked against "agent"
+
+    Returns:
+        DataFrame indexed by column with means, z-score, relative difference and a pass flag
+    """
+    params = dict(params or {})
+    run_means = {}
+    for name in ("agent", engine):
+        rows = []
+        for seed in range(replicates):
+            model = ENGINES[name](**{**params, "seed": seed})
+            for _ in range(steps):
+                model.step()
+            model_data = model.datacollector.get_model_vars_dataframe()
+            rows.append(model_data[columns].iloc[burn_in:].mean())
+        run_means[name] = pd.DataFrame(rows)
+
+    agent, other = run_means["agent"], run_means[engine]
+    diff = other.mean() - agent.mean()
+    std_err = np.sqrt(agent.var() / replicates + other.var() / replicates)
+    z = (diff / std_err.replace(0, np.nan)).fillna(0.0)
+    rel = (diff / agent.mean().abs().replace(0, np.nan)).fillna(0.0)
+
+    report = pd.DataFrame({
+        "mean_agent": agent.mean(),
+        f"mean_{engine}": other.mean(),
+        "z": z,
+        "rel_diff": rel,
+    })
+    report["equivalent"] = (report["z"].abs() < z_threshold) | (report["rel_diff"].abs() < rel_tolerance)
+    return report
+
+def experiment_engine_equivalence():
+    """
+    Engine check: the vectorized engine must match the agent-based model statistically
+
+    Runs compare_engines on the default parameters and on the UBI viability setup,
+    prints both reports and raises AssertionError if any column fails.
+    """
+    scenarios = {
+        "default": {},
+        "ubi_viability": {"robot_tax_rate": 0.5, "initial_ubi_fraction": 0.2, "seeds_automated": 50},
+    }
+    failures = []
+    for name, params in scenarios.items():
+        report = compare_engines(params)
+        print(f"\n=== Engine equivalence: {name} ===")
+        print(report.to_string(float_format=lambda v: f"{v:.3f}"))
+        failures += [f"{name}/{column}" for column in report.index[~report["equivalent"]]]
+
+    if failures:
+        raise AssertionError(f"Vectorized engine differs from agent-based model: {failures}")
+    print("\nVectorized engine is statistically equivalent on all checked columns.")
+
 def experiment_custom(params, steps=500, name="custom_experiment"):
     """
     Run a custom experiment with your own parameters
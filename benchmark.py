@@ -0,0 +1,515 @@
+"""
+Benchmarks for AI Adoption Simulator
+Measure throughput, step latency and memory across model sizes, time the
+phases of a step, and compare the results against a committed baseline
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from headless import AUGMENTED_SHARE, AUTOMATED_SHARE, scale_params, side_for
+
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+REGRESSION_THRESHOLD = 0.5
+
+# Each case runs this many times (each in a fresh process) and reports the
+# median of every metric, so one slow run does not make a regression
+REPEATS = 3
+
+# Metrics compared against the baseline: name -> True if higher is better
+COMPARED_METRICS = {
+    "steps_per_sec": True,
+    "latency_p50_ms": False,
+    "latency_p99_ms": False,
+    "peak_rss_mb": False,
+    "collector_bytes": False,
+}
+
+# Smallest change that can count as a regression, in the metric's own units
+# (steps_per_sec is compared as milliseconds per step). Back-to-back runs of
+# the small cases differ by up to ~1 ms in p99 latency, for example.
+MIN_DIFFERENCE = {
+    "steps_per_sec": 0.5,
+    "latency_p50_ms": 0.5,
+    "latency_p99_ms": 2.0,
+    "peak_rss_mb": 16.0,
+    "collector_bytes": 65536,
+}
+
+# ==========================================
+# BENCHMARK MATRIX
+# ==========================================
+
+def make_config(name, N, side, steps, engine="agent", automated_share=AUTOMATED_SHARE,
+                augmented_share=AUGMENTED_SHARE, **params):
+    """One benchmark case: a model of N agents on a side x side grid, run for `steps`"""
+    params = scale_params(N, side, side, automated_share, augmented_share, **{"seed": 1, **params})
+    return {"name": name, "engine": engine, "steps": steps, "params": params}
+
+BENCHMARK_MATRIX = [
+    # Size scaling at constant density (~39% of cells occupied)
+    make_config("agent_n350_30x30", 350, 30, 300),
+    make_config("agent_n1400_60x60", 1400, 60, 200),
+    make_config("agent_n5600_120x120", 5600, 120, 100),
+    make_config("agent_n22400_240x240", 22400, 240, 30),
+    # Seed mix and policy at the default size
+    make_config("agent_n350_automation_heavy", 350, 30, 300, automated_share=0.2, augmented_share=0.1),
+    make_config("agent_n350_ubi_taxed", 350, 30, 300, initial_ubi_fraction=0.2, robot_tax_rate=0.5),
+    # Vectorized engine on the same sizes
+    make_config("vectorized_n350_30x30", 350, 30, 300, engine="vectorized"),
+    make_config("vectorized_n5600_120x120", 5600, 120, 100, engine="vectorized"),
+    make_config("vectorized_n22400_240x240", 22400, 240, 100, engine="vectorized"),
+]
+
+QUICK_MATRIX = ["agent_n350_30x30", "agent_n1400_60x60", "vectorized_n350_30x30"]
+
+# Synchronous engine scaling report: one large grid, stepped with each worker count
+SCALING_AGENTS = 1_000_000
+SCALING_STEPS = 5
+SCALING_WORKERS = (1, 2, 4, 8)
+
+# Agent memory report: regular vs compact agents in EvolutionaryModel
+AGENT_MEMORY_AGENTS = 100_000
+AGENT_MEMORY_STEPS = 10
+
+# ==========================================
+# MEASUREMENT
+# ==========================================
+
+def _engines():
+    from batch_run import ENGINES
+    return ENGINES
+
+def _phases(engine):
+    """(owner, method name) pairs timed by the phase pass of each engine"""
+    if engine == "agent":
+        from agent import WorkerAgent
+        from model import EvolutionaryModel
+        return [(WorkerAgent, name) for name in (
+            "settle_economics", "step_ubi_recipient", "step_displaced",
+            "step_automated", "step_worker", "move", "merge")] + [(EvolutionaryModel, "_update_payouts")]
+    from vectorized_model import VectorizedEvolutionaryModel
+    return [(VectorizedEvolutionaryModel, name) for name in (
+        "_economics", "_remove", "_rehire", "_move", "_merge", "_work", "_compact", "_update_payouts")]
+
+def _timed(func, totals, calls, name):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            totals[name] += time.perf_counter() - start
+            calls[name] += 1
+    return wrapper
+
+def collector_nbytes(collector):
+    """Bytes held by a collector's history (NumPy buffers or mesa's per-step lists)"""
+    if hasattr(collector, "_columns"):
+        return int(sum(column.nbytes for column in collector._columns.values()) + collector._steps.nbytes)
+    return int(sum(sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+                   for values in collector.model_vars.values()))
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_config(config, phase_steps=None):
+    """
+    Benchmark one configuration in the current process
+
+    A throughput pass times every step of an unmodified model. A second pass
+    on a fresh model with the same seed wraps each phase method in a timer,
+    and times datacollector.collect and (for the agent engine) the server's
+    LeaderboardElement.render once per step. Phase times are inclusive: a
+    branch's time contains the move() it calls.
+
+    Returns:
+        Dictionary of metrics
+    """
+    engine_cls = _engines()[config["engine"]]
+    steps = config["steps"]
+    rss_start = peak_rss_mb()
+
+    start = time.perf_counter()
+    model = engine_cls(**config["params"])
+    setup = time.perf_counter() - start
+
+    latencies = np.empty(steps)
+    for i in range(steps):
+        start = time.perf_counter()
+        model.step()
+        latencies[i] = time.perf_counter() - start
+
+    result = {
+        "name": config["name"],
+        "engine": config["engine"],
+        "steps": steps,
+        "params": config["params"],
+        "setup_sec": setup,
+        "steps_per_sec": steps / latencies.sum(),
+        "latency_mean_ms": latencies.mean() * 1000,
+        "latency_p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "latency_p90_ms": float(np.percentile(latencies, 90)) * 1000,
+        "latency_p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "latency_max_ms": latencies.max() * 1000,
+        "final_agents": model.agent_count,
+        "collector_bytes": collector_nbytes(model.datacollector),
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - rss_start,
+    }
+    del model
+    result["phases"] = _phase_pass(config, engine_cls, phase_steps or steps)
+    return result
+
+def _phase_pass(config, engine_cls, steps):
+    totals = {}
+    calls = {}
+    patched = []
+    for owner, name in _phases(config["engine"]):
+        label = f"{owner.__name__}.{name}"
+        totals[label] = 0.0
+        calls[label] = 0
+        patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, _timed(getattr(owner, name), totals, calls, label))
+
+    try:
+        model = engine_cls(**config["params"])
+        model.datacollector.collect = _timed(model.datacollector.collect, totals, calls, "datacollector.collect")
+        totals["datacollector.collect"] = 0.0
+        calls["datacollector.collect"] = 0
+
+        render = None
+        if config["engine"] == "agent":
+            from server import LeaderboardElement
+            render = _timed(LeaderboardElement().render, totals, calls, "LeaderboardElement.render")
+            totals["LeaderboardElement.render"] = 0.0
+            calls["LeaderboardElement.render"] = 0
+
+        step_total = 0.0
+        for _ in range(steps):
+            start = time.perf_counter()
+            model.step()
+            step_total += time.perf_counter() - start
+            if render:
+                render(model)
+    finally:
+        for owner, name, original in patched:
+            setattr(owner, name, original)
+
+    return {
+        label: {
+            "calls": calls[label],
+            "total_sec": totals[label],
+            "mean_us": totals[label] / calls[label] * 1e6 if calls[label] else 0.0,
+            "share_of_step": totals[label] / step_total if step_total else 0.0,
+        }
+        for label in totals
+    }
+
+def median_result(runs):
+    """
+    One result from repeated runs of a case: the median of every numeric metric
+
+    The phase tables are those of the run with the median throughput.
+    """
+    runs = sorted(runs, key=lambda run: run["steps_per_sec"])
+    result = dict(runs[len(runs) // 2])
+    for key, value in result.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and key != "steps":
+            result[key] = float(np.median([run[key] for run in runs]))
+    result["repeats"] = len(runs)
+    return result
+
+def run_benchmarks(configs, isolate=True, repeats=REPEATS):
+    """
+    Run every configuration `repeats` times and keep the median of each metric
+
+    The repeats go round the whole list (every case once, then every case
+    again), so a slow spell on a shared machine hits one run of several
+    cases instead of every run of one. With isolate, every run gets a fresh
+    worker process, which keeps peak RSS and allocator state from leaking
+    between cases.
+    """
+    runs = {config["name"]: [] for config in configs}
+    for repeat in range(repeats):
+        for config in configs:
+            print(f"  {config['name']} ({config['engine']}, N={config['params']['N']}, {config['steps']} steps, "
+                  f"run {repeat + 1}/{repeats})...", flush=True)
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    result = executor.submit(run_config, config).result()
+            else:
+                result = run_config(config)
+            runs[config["name"]].append(result)
+            print(f"    {result['steps_per_sec']:.1f} steps/s, p50 {result['latency_p50_ms']:.2f} ms, "
+                  f"p99 {result['latency_p99_ms']:.2f} ms, peak RSS {result['peak_rss_mb']:.0f} MB")
+
+    results = {name: median_result(case_runs) for name, case_runs in runs.items()}
+    if repeats > 1:
+        print("\n=== Medians ===")
+        for name, result in results.items():
+            print(f"  {name:32s} {result['steps_per_sec']:8.1f} steps/s, p50 {result['latency_p50_ms']:.2f} ms, "
+                  f"p99 {result['latency_p99_ms']:.2f} ms, peak RSS {result['peak_rss_mb']:.0f} MB")
+    return results
+
+def _scaling_run(params, steps):
+    """Seconds per step (after one warm-up step) and a fingerprint of the final state"""
+    from synchronous import SynchronousEvolutionaryModel
+    model = SynchronousEvolutionaryModel(**params)
+    model.step()
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    sec_per_step = (time.perf_counter() - start) / steps
+    model.close()
+    return sec_per_step, (model.agent_count, float(model.wealth.sum()), model.state_counts)
+
+def run_scaling(N=SCALING_AGENTS, steps=SCALING_STEPS, workers=SCALING_WORKERS, tiles=None):
+    """
+    Speedup of the synchronous engine against its number of worker threads
+
+    The same seeded model is stepped once per worker count, each in a fresh
+    process. The engine gives identical results for any worker count, so
+    every run must end in the same state; the report gives time per step,
+    speedup over the first worker count and parallel efficiency. Worker
+    counts beyond os.cpu_count() are run but cannot speed anything up.
+
+    Returns:
+        List of result dictionaries, one per worker count
+
+    Raises:
+        AssertionError: If two worker counts end in different states
+    """
+    from synchronous import DEFAULT_TILES
+    tiles = tiles or max(DEFAULT_TILES, max(workers))
+    params = scale_params(N, side_for(N), seed=1, tiles=tiles)
+    print(f"=== Synchronous scaling: {N:,} agents on {params['width']}x{params['height']}, "
+          f"{tiles} tiles, {steps} steps, {os.cpu_count()} CPU(s) ===")
+
+    results, fingerprint = [], None
+    for count in workers:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            sec_per_step, final = executor.submit(_scaling_run, {**params, "workers": count}, steps).result()
+        if fingerprint is None:
+            fingerprint = final
+        elif final != fingerprint:
+            raise AssertionError(f"{count} workers ended in a different state: {final} != {fingerprint}")
+        speedup = results[0]["sec_per_step"] / sec_per_step if results else 1.0
+        results.append({"workers": count, "sec_per_step": sec_per_step, "speedup": speedup,
+                        "efficiency": speedup * workers[0] / count})
+        print(f"  {count:3d} workers: {sec_per_step:8.3f} s/step  speedup {speedup:5.2f}x  "
+              f"efficiency {results[-1]['efficiency']:6.1%}", flush=True)
+    return results
+
+def _agent_memory_run(params, steps):
+    """
+    Traced bytes per agent of one EvolutionaryModel, after setup and after `steps` steps
+
+    The memory of a model with no agents on the same grid is subtracted, so
+    the grid's per-cell storage is not counted.
+    """
+    from model import EvolutionaryModel
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    empty = EvolutionaryModel(**{**params, "N": 0})
+    grid_bytes = tracemalloc.get_traced_memory()[0] - start
+    del empty
+
+    start = tracemalloc.get_traced_memory()[0]
+    model = EvolutionaryModel(**params)
+    setup = (tracemalloc.get_traced_memory()[0] - start - grid_bytes) / model.agent_count
+    for _ in range(steps):
+        model.step()
+    stepped = (tracemalloc.get_traced_memory()[0] - start - grid_bytes) / model.agent_count
+    tracemalloc.stop()
+    return {"setup_bytes_per_agent": setup, "stepped_bytes_per_agent": stepped,
+            "final_agents": model.agent_count}
+
+def run_agent_memory(N=AGENT_MEMORY_AGENTS, steps=AGENT_MEMORY_STEPS):
+    """
+    Bytes per agent with regular and compact agents, each in a fresh process
+
+    After `steps` steps the figure also holds what stepping adds: spawned
+    robots, the collector history and the grid's neighborhood caches, which
+    grow with the cells visited rather than with the agents.
+
+    Returns:
+        Dictionary {"regular": result, "compact": result}
+    """
+    params = scale_params(N, side_for(N), seed=1)
+    print(f"=== Agent memory: {N:,} agents on {params['width']}x{params['height']}, {steps} steps ===")
+    results = {}
+    for name, compact in (("regular", False), ("compact", True)):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results[name] = executor.submit(_agent_memory_run, {**params, "compact_agents": compact}, steps).result()
+        print(f"  {name:8s} {results[name]['setup_bytes_per_agent']:7.0f} bytes/agent after setup, "
+              f"{results[name]['stepped_bytes_per_agent']:7.0f} after {steps} steps", flush=True)
+    regular, compact = results["regular"], results["compact"]
+    print(f"  compact agents use {1 - compact['setup_bytes_per_agent'] / regular['setup_bytes_per_agent']:.0%} "
+          f"less memory per agent after setup, "
+          f"{1 - compact['stepped_bytes_per_agent'] / regular['stepped_bytes_per_agent']:.0%} less after {steps} steps")
+    return results
+
+# ==========================================
+# BASELINE COMPARISON
+# ==========================================
+
+def machine_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare_to_baseline(results, baseline, threshold=REGRESSION_THRESHOLD, min_difference=MIN_DIFFERENCE):
+    """
+    Compare results against a baseline run
+
+    A metric regresses when it is worse than the baseline by more than
+    `threshold` (as a fraction) and by at least its min_difference, so
+    jitter on the fastest cases is not reported. Cases missing from the
+    baseline, or run for a different number of steps, are skipped.
+
+    Returns:
+        List of regression descriptions (empty if none)
+    """
+    regressions = []
+    print(f"\n=== Comparison with baseline (threshold {threshold:.0%}) ===")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or base["steps"] != result["steps"]:
+            print(f"  {name}: no comparable baseline")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base[metric], result[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            # Throughput is compared as time per step, so the floor is in milliseconds
+            difference = 1000 / new - 1000 / old if metric == "steps_per_sec" else new - old
+            flag = "REGRESSION" if worse > threshold and difference >= min_difference.get(metric, 0) else ""
+            print(f"  {name:32s} {metric:16s} {old:12.2f} -> {new:12.2f} ({change:+.1%}) {flag}")
+            if flag:
+                regressions.append(f"{name}/{metric}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+    return regressions
+
+def print_phases(results):
+    for name, result in results.items():
+        print(f"\n--- Phases: {name} ---")
+        for label, phase in sorted(result["phases"].items(), key=lambda item: -item[1]["total_sec"]):
+            print(f"  {label:40s} {phase['calls']:9d} calls {phase['mean_us']:10.1f} us/call "
+                  f"{phase['share_of_step']:7.1%} of step time")
+
+# ==========================================
+# MAIN
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Adoption Simulator benchmarks")
+    parser.add_argument("--quick", action="store_true", help="run the small cases only")
+    parser.add_argument("--only", help="comma-separated case names to run")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed fractional slowdown before a metric counts as a regression")
+    parser.add_argument("--repeats", type=int, default=REPEATS,
+                        help="runs per case; the median of each metric is reported")
+    parser.add_argument("--output", help="write this run's results to a JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--no-isolate", action="store_true", help="run every case in this process")
+    parser.add_argument("--phases", action="store_true", help="print the per-phase timing tables")
+    parser.add_argument("--scaling", action="store_true",
+                        help="report the synchronous engine's speedup against worker threads instead")
+    parser.add_argument("--scaling-agents", type=int, default=SCALING_AGENTS, help="agents in the scaling run")
+    parser.add_argument("--scaling-workers", default=",".join(map(str, SCALING_WORKERS)),
+                        help="comma-separated worker counts of the scaling run")
+    parser.add_argument("--agent-memory", action="store_true",
+                        help="report bytes per agent with regular and compact agents instead")
+    parser.add_argument("--agent-memory-agents", type=int, default=AGENT_MEMORY_AGENTS,
+                        help="agents in the agent memory run")
+    args = parser.parse_args(argv)
+
+    if args.agent_memory:
+        report = {"machine": machine_info(), "agent_memory": run_agent_memory(args.agent_memory_agents)}
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResults saved: {args.output}")
+        return 0
+
+    if args.scaling:
+        workers = tuple(int(count) for count in args.scaling_workers.split(","))
+        report = {"machine": machine_info(), "scaling": run_scaling(args.scaling_agents, workers=workers)}
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResults saved: {args.output}")
+        return 0
+
+    configs = BENCHMARK_MATRIX
+    if args.quick:
+        configs = [c for c in configs if c["name"] in QUICK_MATRIX]
+    if args.only:
+        wanted = set(args.only.split(","))
+        configs = [c for c in configs if c["name"] in wanted]
+    if not configs:
+        parser.error("no benchmark cases selected")
+
+    print(f"=== Running {len(configs)} benchmark case(s) ===")
+    report = {"machine": machine_info(), "results": run_benchmarks(configs, isolate=not args.no_isolate,
+                                                                   repeats=args.repeats)}
+    if args.phases:
+        print_phases(report["results"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved: {args.output}")
+
+    if args.save_baseline:
+        baseline = {"machine": report["machine"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline["results"] = json.load(f).get("results", {})
+        baseline["results"].update(report["results"])
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(report["results"], baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Result cache for AI Adoption Simulator
+Keeps finished runs on disk as checkpoints, addressed by a hash of everything
+that determines their output, so a repeated experiment is read back instead of
+re-simulated and a longer one continues from the longest cached prefix
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+# Default size limit of a cache directory
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Sources whose contents determine a run's results; editing any of them
+# changes code_version() and so every key
+CODE_FILES = (
+    "agent.py", "checkpoint.py", "collector.py", "constants.py", "inequality.py", "meanfield.py",
+    "model.py", "ranking.py", "spatial.py", "stopping.py", "streams.py", "synchronous.py",
+    "vectorized_model.py",
+)
+
+ENTRY_SUFFIX = ".ckpt"
+
+_code_version = None
+
+def code_version():
+    """Hash of the CODE_FILES sources (computed once per process)"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        root = os.path.dirname(os.path.abspath(__file__))
+        for name in CODE_FILES:
+            digest.update(name.encode())
+            with open(os.path.join(root, name), "rb") as handle:
+                digest.update(handle.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def cache_key(engine, params):
+    """
+    Key for every run of `engine` with `params`, whatever its length
+
+    Args:
+        engine: Key into batch_run.ENGINES
+        params: Dictionary of model parameters, including "seed"
+
+    Returns:
+        Hex digest of the engine, the parameters and code_version()
+    """
+    payload = json.dumps({"engine": engine, "params": params, "code": code_version()},
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResultCache:
+    """
+    On-disk cache of finished runs
+
+    An entry is the checkpoint of a model after `steps` steps, stored as
+    <directory>/<key>/<steps>.ckpt, where key = cache_key(engine, params).
+    The checkpoint carries the collector history, so it gives back both the
+    results and a model that can keep stepping. lookup() returns the entry
+    with the most steps not beyond the request: an exact hit needs no steps
+    at all, and a shorter one is a prefix to continue from.
+
+    Only seeded runs are cached; without a "seed" every run differs. Entries
+    are evicted least recently used first once the directory holds more than
+    max_bytes. Reading an entry refreshes its modification time, which is
+    what "recently used" means, so several processes can share one cache.
+
+    Args:
+        directory: Cache directory (created on first store)
+        max_bytes: Total size of entries kept after each store
+    """
+
+    def __init__(self, directory="results/cache", max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def cacheable(params):
+        return params.get("seed") is not None
+
+    def _entry_dir(self, engine, params):
+        return os.path.join(self.directory, cache_key(engine, params))
+
+    # --- LOOKUP ---
+
+    def lookup(self, engine, params, steps):
+        """
+        Path and step count of the longest cached run of at most `steps` steps
+
+        Returns:
+            Tuple of (path, cached_steps), or (None, 0) on a miss
+        """
+        if not self.cacheable(params):
+            return None, 0
+        entry_dir = self._entry_dir(engine, params)
+        try:
+            names = os.listdir(entry_dir)
+        except FileNotFoundError:
+            return None, 0
+
+        cached = [int(name[:-len(ENTRY_SUFFIX)]) for name in names
+                  if name.endswith(ENTRY_SUFFIX) and name[:-len(ENTRY_SUFFIX)].isdigit()]
+        for cached_steps in sorted((s for s in cached if s <= steps), reverse=True):
+            path = os.path.join(entry_dir, f"{cached_steps}{ENTRY_SUFFIX}")
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted by another process since the listing
+                continue
+            return path, cached_steps
+        return None, 0
+
+    def load(self, engine_class, engine, params, steps):
+        """
+        Model restored from lookup(), or None on a miss
+
+        Args:
+            engine_class: Model class whose restore() reads the entry
+            engine: Key into batch_run.ENGINES (part of the cache key)
+            params: Dictionary of model parameters
+            steps: Requested number of steps
+        """
+        path, _ = self.lookup(engine, params, steps)
+        if path is None:
+            return None
+        try:
+            return engine_class.restore(path)
+        except FileNotFoundError:
+            return None
+
+    # --- STORE ---
+
+    def store(self, model, engine, params):
+        """
+        Save `model` as the entry for its current step, then evict
+
+        The checkpoint is written to a temporary file and renamed into place,
+        so concurrent writers of the same entry never leave a partial file.
+
+        Returns:
+            Path of the entry, or None if the run is not cacheable
+        """
+        if not self.cacheable(params):
+            return None
+        entry_dir = self._entry_dir(engine, params)
+        os.makedirs(entry_dir, exist_ok=True)
+        path = os.path.join(entry_dir, f"{model._steps}{ENTRY_SUFFIX}")
+
+        handle, partial = tempfile.mkstemp(suffix=".partial", dir=entry_dir)
+        try:
+            with os.fdopen(handle, "wb") as target:
+                model.checkpoint(target)
+            os.replace(partial, path)
+        except BaseException:
+            os.remove(partial)
+            raise
+        self.evict(keep=path)
+        return path
+
+    # --- EVICTION ---
+
+    def entries(self):
+        """List of (mtime, size, path) for every entry, oldest first"""
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for key in os.listdir(self.directory):
+            entry_dir = os.path.join(self.directory, key)
+            if not os.path.isdir(entry_dir):
+                continue
+            for name in os.listdir(entry_dir):
+                if not name.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(entry_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime, stat.st_size, path))
+        found.sort()
+        return found
+
+    def size(self):
+        """Total bytes held by entries"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """
+        Delete least recently used entries until the cache fits in max_bytes
+
+        Key directories are left in place, even when empty, so a concurrent
+        store() never loses the directory it is writing into.
+
+        Args:
+            keep: Entry path never deleted (the one just stored)
+
+        Returns:
+            Number of entries deleted
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Delete every entry and the key directories that held them"""
+        for _, _, path in self.entries():
+            os.remove(path)
+        for key in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            entry_dir = os.path.join(self.directory, key)
+            if os.path.isdir(entry_dir) and not os.listdir(entry_dir):
+                os.rmdir(entry_dir)
@@ -0,0 +1,130 @@
+"""
+Checkpoints for AI Adoption Simulator
+Save a model's full state between steps to a compact binary file and rebuild
+it later, to resume an interrupted run or to branch policy variants from a
+shared warm-up
+"""
+
+import json
+import os
+import random
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# ==========================================
+# FILE FORMAT
+# ==========================================
+# A checkpoint is a compressed .npz archive: one uint8 array holding a JSON
+# header (scalar attributes, RNG state, collector layout) plus one array per
+# agent field and per collected column.
+
+def write_checkpoint(model, target, agent_arrays, extra=None):
+    """
+    Write a model checkpoint
+
+    Args:
+        model: Model to save (EvolutionaryModel or VectorizedEvolutionaryModel)
+        target: File path or writable binary file object
+        agent_arrays: Dictionary of per-agent NumPy arrays, engine specific
+        extra: Dictionary of engine-specific JSON-compatible header fields
+    """
+    version, internal, gauss_next = model.random.getstate()
+    collector_header, collector_arrays = model.datacollector.get_state()
+    header = {
+        "version": FORMAT_VERSION,
+        "engine": type(model).__name__,
+        "attributes": model_attributes(model),
+        "random": [version, list(internal), gauss_next],
+        "collector": collector_header,
+        "stopping": model.stopping.get_state() if getattr(model, "stopping", None) else None,
+        **(extra or {}),
+    }
+
+    payload = {"header": np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)}
+    payload.update({f"agent_{name}": values for name, values in agent_arrays.items()})
+    payload.update({f"collector_{name}": values for name, values in collector_arrays.items()})
+
+    if isinstance(target, (str, os.PathLike)):
+        # Write through a handle (np.savez appends ".npz" to bare paths) and swap
+        # the file in only once complete, so an interrupted save keeps the old one
+        partial = f"{os.fspath(target)}.partial"
+        with open(partial, "wb") as handle:
+            np.savez_compressed(handle, **payload)
+        os.replace(partial, target)
+    else:
+        np.savez_compressed(target, **payload)
+
+def read_checkpoint(source, engine):
+    """
+    Read a checkpoint written by write_checkpoint
+
+    Args:
+        source: File path or readable binary file object
+        engine: Expected model class name
+
+    Returns:
+        Tuple of (header, agent_arrays, collector_arrays)
+
+    Raises:
+        ValueError: If the file is from another engine or format version
+    """
+    with np.load(source, allow_pickle=False) as archive:
+        header = json.loads(archive["header"].tobytes())
+        agent_arrays = {key[len("agent_"):]: archive[key] for key in archive.files if key.startswith("agent_")}
+        collector_arrays = {key[len("collector_"):]: archive[key] for key in archive.files
+                            if key.startswith("collector_")}
+
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {header.get('version')}")
+    if header["engine"] != engine:
+        raise ValueError(f"Checkpoint was written by {header['engine']}, not {engine}")
+    return header, agent_arrays, collector_arrays
+
+# ==========================================
+# MODEL STATE
+# ==========================================
+
+def model_attributes(model):
+    """Every plain scalar (or list of numbers) attribute of a model, JSON-ready"""
+    attributes = {}
+    for name, value in vars(model).items():
+        if isinstance(value, np.generic):
+            value = value.item()
+        if value is None or isinstance(value, (bool, int, float, str)):
+            attributes[name] = value
+        elif isinstance(value, list) and all(isinstance(v, (int, float)) for v in value):
+            attributes[name] = list(value)
+    return attributes
+
+def apply_checkpoint(model, header, collector_arrays, overrides):
+    """
+    Load the engine-independent part of a checkpoint into a freshly built model
+
+    Scalar attributes, the Python RNG, the collector history and the stop
+    condition windows are restored, then `overrides` are applied. A "seed" override re-seeds the Python RNG so
+    the branch continues on an independent random stream.
+
+    Raises:
+        ValueError: If an override does not name a model attribute
+    """
+    attributes = header["attributes"]
+    unknown = sorted(set(overrides) - set(attributes) - {"seed"})
+    if unknown:
+        raise ValueError(f"Cannot override {unknown}: not model attributes saved in the checkpoint")
+
+    for name, value in attributes.items():
+        setattr(model, name, value)
+
+    version, internal, gauss_next = header["random"]
+    model.random.setstate((version, tuple(internal), gauss_next))
+    model.datacollector.set_state(header["collector"], collector_arrays)
+    if header.get("stopping") and getattr(model, "stopping", None):
+        model.stopping.set_state(header["stopping"])
+
+    for name, value in overrides.items():
+        if name == "seed":
+            model._seed = value
+            model.random = random.Random(value)
+        else:
+            setattr(model, name, value)
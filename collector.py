@@ -0,0 +1,235 @@
+"""
+Columnar data collection for AI Adoption Simulator
+Drop-in replacement for mesa.DataCollector that stores model reporters in
+preallocated NumPy columns instead of per-step Python lists
+"""
+
+import numpy as np
+import pandas as pd
+
+INITIAL_CAPACITY = 1024
+
+class ColumnView:
+    """
+    Read-only view of one collected column
+
+    Behaves like the per-variable lists of mesa.DataCollector.model_vars:
+    supports len(), iteration and indexing, and scalar indexing returns plain
+    Python numbers so values can be sent to the browser as JSON.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        item = self.values[index]
+        return item.item() if isinstance(item, np.generic) else item
+
+    def __iter__(self):
+        return iter(self.values.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def __repr__(self):
+        return f"ColumnView({self.values!r})"
+
+class ColumnarDataCollector:
+    """
+    Model-level data collector backed by preallocated NumPy columns
+
+    Each reporter gets one column whose dtype is inferred from its first value
+    (bool, int64, float64, or object for anything else); a column is widened,
+    e.g. int64 to float64, the first time it receives a value that does not fit.
+
+    Without a window, columns double in size when full, so collection costs
+    amortised O(1) per value and finished rows are never moved or rewritten.
+    With window=n only the last n rows are kept: the buffer holds 2n rows and
+    the live window is shifted back to the front each time the end is reached.
+
+    Args:
+        model_reporters: Dictionary of column name -> callable(model), like mesa's
+        collect_every: Only collect on model steps that are a multiple of this
+        window: Keep only the most recent `window` rows (None keeps everything)
+        capacity: Initial number of rows to allocate
+    """
+
+    def __init__(self, model_reporters, collect_every=1, window=None, capacity=INITIAL_CAPACITY):
+        if collect_every < 1:
+            raise ValueError("collect_every must be at least 1")
+        if window is not None and window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.model_reporters = dict(model_reporters)
+        self.agent_reporters = {}
+        self.collect_every = collect_every
+        self.window = window
+
+        self._capacity = 2 * window if window else max(1, capacity)
+        self._columns = {}
+        self._steps = np.empty(self._capacity, dtype=np.int64)
+        self._start = 0
+        self._end = 0
+        self.rows_dropped = 0
+
+    # --- COLLECTION ---
+
+    def collect(self, model):
+        """Record every reporter for the model's current step (if it is due)"""
+        step = getattr(model, "_steps", 0)
+        if step % self.collect_every:
+            return
+
+        if self._end == self._capacity:
+            self._make_room()
+
+        row = self._end
+        self._steps[row] = step
+        for name, reporter in self.model_reporters.items():
+            self._store(name, row, reporter(model))
+        self._end += 1
+
+        if self.window and self._end - self._start > self.window:
+            self._start += 1
+            self.rows_dropped += 1
+
+    def _store(self, name, row, value):
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = np.empty(self._capacity, dtype=_dtype_for(value))
+        elif not _fits(column.dtype, value):
+            column = self._columns[name] = column.astype(np.result_type(column.dtype, _dtype_for(value)))
+        column[row] = value
+
+    def _make_room(self):
+        if self.window:
+            # Shift the live window back to the front of the 2n-row buffer
+            live = self._end - self._start
+            for name, column in self._columns.items():
+                column[:live] = column[self._start:self._end]
+            self._steps[:live] = self._steps[self._start:self._end]
+            self._start, self._end = 0, live
+            return
+
+        self._capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(self._capacity, dtype=column.dtype)
+            grown[:self._end] = column[:self._end]
+            self._columns[name] = grown
+        grown = np.empty(self._capacity, dtype=np.int64)
+        grown[:self._end] = self._steps[:self._end]
+        self._steps = grown
+
+    # --- ACCESS ---
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def steps(self):
+        """Model step of each collected row"""
+        return self._steps[self._start:self._end]
+
+    @property
+    def model_vars(self):
+        """Dictionary of column name -> ColumnView, as read by the server charts"""
+        return {name: ColumnView(values) for name, values in self.columns().items()}
+
+    def columns(self):
+        """Dictionary of column name -> NumPy view of the collected rows"""
+        return {name: column[self._start:self._end] for name, column in self._columns.items()}
+
+    def _index(self):
+        # Match mesa's implicit 0..n-1 index unless rows were skipped or dropped
+        if self.collect_every == 1 and not self.rows_dropped:
+            return pd.RangeIndex(len(self))
+        return pd.Index(self.steps.copy(), name="Step")
+
+    def get_model_vars_dataframe(self):
+        """
+        Model variables as a DataFrame, one column per reporter
+
+        Without a window the columns are views of the collector's buffers
+        (rows already collected are never rewritten). With a window the data
+        is copied, since later collection shifts the buffer in place.
+        """
+        if not self.model_reporters:
+            raise UserWarning(
+                "No model reporters have been defined in the DataCollector, returning empty DataFrame."
+            )
+        columns = self.columns()
+        if self.window:
+            columns = {name: values.copy() for name, values in columns.items()}
+        return pd.DataFrame(columns, index=self._index(), copy=False)
+
+    def get_agent_vars_dataframe(self):
+        raise UserWarning("No agent reporters have been defined in the DataCollector, returning empty DataFrame.")
+
+    def to_arrow(self):
+        """Model variables as a pyarrow Table (numeric columns are not copied)"""
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            raise ImportError("to_arrow() needs pyarrow: pip install pyarrow") from exc
+        columns = {"Step": self.steps}
+        columns.update(self.columns())
+        if self.window:
+            columns = {name: values.copy() for name, values in columns.items()}
+        return pa.table({name: pa.array(values) for name, values in columns.items()})
+
+    # --- CHECKPOINTS ---
+
+    def get_state(self):
+        """Collected history as (JSON-ready header, dictionary of NumPy arrays)"""
+        header = {
+            "collect_every": self.collect_every,
+            "window": self.window,
+            "rows_dropped": self.rows_dropped,
+            "columns": [],
+            "objects": {},
+        }
+        arrays = {"steps": self.steps.copy()}
+        for i, (name, values) in enumerate(self.columns().items()):
+            header["columns"].append([name, values.dtype.str])
+            if values.dtype.kind == "O":
+                header["objects"][name] = values.tolist()
+            else:
+                arrays[str(i)] = values.copy()
+        return header, arrays
+
+    def set_state(self, header, arrays):
+        """Replace the collected history with one saved by get_state"""
+        self.collect_every = header["collect_every"]
+        self.window = header["window"]
+        self.rows_dropped = header["rows_dropped"]
+
+        rows = len(arrays["steps"])
+        self._capacity = 2 * self.window if self.window else max(self._capacity, 2 * rows)
+        self._start, self._end = 0, rows
+        self._steps = np.empty(self._capacity, dtype=np.int64)
+        self._steps[:rows] = arrays["steps"]
+        self._columns = {}
+        for i, (name, dtype) in enumerate(header["columns"]):
+            column = self._columns[name] = np.empty(self._capacity, dtype=np.dtype(dtype))
+            column[:rows] = header["objects"][name] if name in header["objects"] else arrays[str(i)]
+
+def _dtype_for(value):
+    if isinstance(value, (bool, np.bool_)):
+        return np.bool_
+    if isinstance(value, (int, np.integer)):
+        return np.int64
+    if isinstance(value, (float, np.floating)):
+        return np.float64
+    return object
+
+def _fits(dtype, value):
+    if dtype.kind == "O":
+        return True
+    if dtype.kind == "f":
+        return isinstance(value, (int, float, np.number))
+    if dtype.kind == "i":
+        return isinstance(value, (int, np.integer, np.bool_))
+    return np.dtype(_dtype_for(value)).kind == dtype.kind
@@ -4,6 +4,10 @@ AUGMENTED = 1
 AUTOMATED = 2
 DISPLACED = 3
 UBI_RECIPIENT = 4 
+NUM_STATES = 5
+
+# displaced_by of an agent that was not displaced (otherwise the displacing state)
+NO_DISPLACER = -1
 
 STATE_MAP = {
     HUMAN: {"name": "Human", "color": "#808080", "shape": "rect", "scale": 0.5},
@@ -11,4 +15,36 @@ STATE_MAP = {
     AUTOMATED: {"name": "Fully Automated", "color": "#ff0000", "shape": "circle", "scale": 0.8},
     DISPLACED: {"name": "Displaced", "color": "#ffd700", "shape": "rect", "scale": 0.75}, 
     UBI_RECIPIENT: {"name": "UBI Opt-Out", "color": "#32CD32", "shape": "rect", "scale": 1.0} 
+}
+
+# Tunable EvolutionaryModel parameters: (UI label, default, min, max, step).
+# server.py builds its sliders from this table and sweep.py takes its bounds from it.
+PARAM_SPECS = {
+    "N": ("[Global] Total Agents", 350, 100, 400, 10),
+    "starting_wealth": ("[Global] Starting Wealth", 50, 10, 200, 10),
+    "cost_of_living": ("[Global] Cost of Living", 1.0, 0.0, 5.0, 0.1),
+
+    "initial_ubi_fraction": ("[Policy] % of Total Pop on UBI", 0.0, 0.0, 1.0, 0.05),
+
+    "seeds_human": ("[Seeds] Human (Remainder)", 300, 0, 400, 10),
+    "seeds_augmented": ("[Seeds] Augmented", 20, 0, 100, 1),
+    "seeds_automated": ("[Seeds] Automated", 20, 0, 50, 1),
+
+    "robot_tax_rate": ("[Policy] Robot Tax Rate", 0.0, 0.0, 1.0, 0.05),
+    "ubi_class_tax_share": ("[Policy] Tax % to UBI Class", 0.5, 0.0, 1.0, 0.05),
+
+    "wage_human": ("[Econ] Wage: Human", 1.0, 0.0, 10.0, 0.1),
+    "wage_augmented": ("[Econ] Wage: Augmented", 2.5, 0.0, 10.0, 0.1),
+
+    "adopt_human_augmented_thresh": ("[Trans] Human->Aug Neighbors", 3, 1, 8, 1),
+    "adopt_human_augmented_prob": ("[Trans] Human->Aug Chance", 0.3, 0.0, 1.0, 0.05),
+    "human_displacement_chance": ("[Trans] Efficiency Disp. Chance", 0.1, 0.0, 1.0, 0.05),
+
+    "automation_threshold": ("[Trans] Aug->Auto Density", 4, 1, 8, 1),
+    "automation_chance": ("[Trans] Aug->Auto Chance", 0.1, 0.0, 1.0, 0.05),
+    "displacement_threshold": ("[Trans] Displacement Pressure", 2, 1, 8, 1),
+    "combination_threshold": ("[Trans] Auto Combine Density", 2, 1, 8, 1),
+
+    "hiring_chance": ("[System] Hiring Chance", 0.30, 0.0, 1.0, 0.05),
+    "upskill_chance": ("[System] Upskill Chance", 0.3, 0.0, 1.0, 0.05),
 }
\ No newline at end of file
@@ -0,0 +1,377 @@
+"""
+Transition event log for AI Adoption Simulator
+An append-only binary stream of agent transitions (adoption, displacement,
+rehiring, robot spawns, merges, removals) with a per-step index, read back
+through a memory map by step range, agent or event type
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from constants import STATE_MAP, NUM_STATES
+
+# Event types
+ADOPT = 1      # HUMAN -> AUGMENTED
+DISPLACE = 2   # -> DISPLACED; cause is displaced_by, other the robot spawned by an automation event
+REHIRE = 3     # DISPLACED -> HUMAN, or AUGMENTED when upskilled (state)
+SPAWN = 4      # a new robot; other is the worker that created it
+MERGE = 5      # agent absorbed robot `other`
+REMOVE = 6     # agent left the model (out of wealth) in state `state`
+
+EVENT_NAMES = {ADOPT: "adopt", DISPLACE: "displace", REHIRE: "rehire", SPAWN: "spawn",
+               MERGE: "merge", REMOVE: "remove"}
+EVENT_TYPES = {name: code for code, name in EVENT_NAMES.items()}
+
+# One packed 27-byte record per event:
+#   step     model step the event happened in (the collector's step label)
+#   type     event type
+#   state    agent's state after the event (REMOVE: the state it left in)
+#   cause    DISPLACE: displaced_by; otherwise NO_CAUSE
+#   agent    unique_id of the agent
+#   other    unique_id of the other agent involved, or NO_AGENT
+#   x, y     agent's cell
+#   amount   agent's wealth after the event; SPAWN: the robot's revenue;
+#            MERGE: the revenue absorbed
+#   amount2  DISPLACE: wage looted by adjacent robots; MERGE: the wealth absorbed
+EVENT_DTYPE = np.dtype([
+    ("step", "<u4"), ("type", "u1"), ("state", "i1"), ("cause", "i1"),
+    ("agent", "<u4"), ("other", "<u4"), ("x", "<u2"), ("y", "<u2"),
+    ("amount", "<f4"), ("amount2", "<f4"),
+])
+
+NO_AGENT = np.iinfo(np.uint32).max
+NO_CAUSE = -1
+
+MAGIC = b"AIEVENTS"
+VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("itemsize", "<u4"), ("version", "<u4")])
+
+# Companion files: per-step record offsets, and the optional agent index
+INDEX_SUFFIX = ".idx"
+AGENT_INDEX_SUFFIX = ".agents.npy"
+
+# Records scanned at a time by queries that cannot use an index
+SCAN_CHUNK = 1 << 20
+
+def _read_header(handle, path):
+    header = np.frombuffer(handle.read(HEADER.itemsize), dtype=HEADER)
+    if len(header) != 1 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not an event log")
+    if header["itemsize"][0] != EVENT_DTYPE.itemsize or header["version"][0] != VERSION:
+        raise ValueError(f"{path} was written by an incompatible event log version")
+
+# ==========================================
+# WRITER
+# ==========================================
+
+class EventLog:
+    """
+    Append-only writer of transition events
+
+    The model calls record() (agent engine, one event at a time) or
+    record_many() (vectorized engine, one array per phase) while a step
+    runs, and end_step() once it is over. end_step() appends that step's
+    records to `path` and its record offset to `path`.idx, where entry s is
+    the number of records before step s, so a step range maps to a record
+    range without a search. Nothing is held in memory between steps.
+
+    Args:
+        path: Event file (its .idx is written alongside)
+        resume_step: None starts a new log. A step number keeps the events
+            up to that step and appends after them, e.g. when a run resumes
+            from a checkpoint taken at that step, so events a crashed run
+            wrote past the checkpoint are dropped.
+    """
+
+    def __init__(self, path, resume_step=None):
+        self.path = path
+        self._rows = []
+        self._chunks = []
+
+        if resume_step is None or not os.path.exists(path):
+            header = np.zeros(1, dtype=HEADER)
+            header["magic"], header["itemsize"], header["version"] = MAGIC, EVENT_DTYPE.itemsize, VERSION
+            with open(path, "wb") as handle:
+                handle.write(header.tobytes())
+            index = np.zeros(0, dtype=np.uint64)
+            self.count = 0
+        else:
+            reader = EventReader(path)
+            self.count = reader.step_range(0, resume_step)[1]
+            index = reader.step_offsets(resume_step)
+            del reader
+            with open(path, "r+b") as handle:
+                handle.truncate(HEADER.itemsize + self.count * EVENT_DTYPE.itemsize)
+
+        self._events = open(path, "ab")
+        self._index_file = open(path + INDEX_SUFFIX, "wb")
+        self._index_file.write(index.tobytes())
+        self._index_file.flush()
+        self._indexed_steps = len(index)
+        agent_index = path + AGENT_INDEX_SUFFIX
+        if os.path.exists(agent_index):
+            # Built for the old contents; rebuild with EventReader.build_agent_index()
+            os.remove(agent_index)
+
+    # --- RECORDING ---
+
+    def record(self, step, type, agent, pos, state, amount, other=NO_AGENT, cause=NO_CAUSE, amount2=0.0):
+        """One event (the agent engine's path)"""
+        self._rows.append((step, type, state, cause, agent, other, pos[0], pos[1], amount, amount2))
+
+    def record_many(self, step, type, agents, x, y, state, amount, other=NO_AGENT, cause=NO_CAUSE, amount2=0.0):
+        """
+        One event per element of `agents` (the vectorized engine's path)
+
+        Every argument after `type` is an array of the same length or a
+        scalar shared by all events.
+        """
+        n = len(agents)
+        if n == 0:
+            return
+        self._flush_rows()
+        records = np.empty(n, dtype=EVENT_DTYPE)
+        records["step"] = step
+        records["type"] = type
+        records["state"] = state
+        records["cause"] = cause
+        records["agent"] = agents
+        records["other"] = other
+        records["x"] = x
+        records["y"] = y
+        records["amount"] = amount
+        records["amount2"] = amount2
+        self._chunks.append(records)
+
+    def _flush_rows(self):
+        if self._rows:
+            self._chunks.append(np.array(self._rows, dtype=EVENT_DTYPE))
+            self._rows = []
+
+    def end_step(self, step):
+        """Write the events of `step` and its index entries"""
+        self._flush_rows()
+        # Steps without events since the last call start where this one does
+        if step + 1 > self._indexed_steps:
+            entries = np.full(step + 1 - self._indexed_steps, self.count, dtype=np.uint64)
+            self._index_file.write(entries.tobytes())
+            self._indexed_steps = step + 1
+        for records in self._chunks:
+            self._events.write(records.tobytes())
+            self.count += len(records)
+        self._chunks = []
+        self._events.flush()
+        self._index_file.flush()
+
+    def close(self):
+        """Close the files; events of a step that never reached end_step() are dropped"""
+        if not self._events.closed:
+            self._rows = []
+            self._chunks = []
+            self._events.close()
+            self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_event_log(event_log, resume_step=None):
+    """An EventLog for a path (None and EventLog instances pass through)"""
+    if event_log is None or isinstance(event_log, EventLog):
+        return event_log
+    return EventLog(event_log, resume_step)
+
+# ==========================================
+# READER
+# ==========================================
+
+class EventReader:
+    """
+    Memory-mapped access to an event log
+
+    Records are not loaded: `records` is a read-only memory map, and queries
+    copy out only what they return. A step range is located through the
+    .idx offsets (or a binary search on the sorted step column when the
+    index is missing). Agent queries use the agent index when one has been
+    built (build_agent_index()); without it, they scan the step range in
+    chunks of SCAN_CHUNK records.
+
+    Args:
+        path: Event file written by EventLog
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as handle:
+            _read_header(handle, path)
+        n = (os.path.getsize(path) - HEADER.itemsize) // EVENT_DTYPE.itemsize
+        if n:
+            self.records = np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=HEADER.itemsize, shape=(n,))
+        else:
+            self.records = np.zeros(0, dtype=EVENT_DTYPE)
+
+        index_path = path + INDEX_SUFFIX
+        self.index = np.fromfile(index_path, dtype=np.uint64) if os.path.exists(index_path) else None
+        if self.index is not None and len(self.index) and self.index[-1] > n:
+            self.index = None
+
+        agent_index_path = path + AGENT_INDEX_SUFFIX
+        self.agent_index = np.load(agent_index_path, mmap_mode="r") if os.path.exists(agent_index_path) else None
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def last_step(self):
+        return int(self.records["step"][-1]) if len(self.records) else None
+
+    def step_range(self, start=None, stop=None):
+        """
+        Record range [first, last) of the events with start <= step <= stop
+
+        Returns:
+            Tuple of record numbers
+        """
+        n = len(self.records)
+        first = last = None
+        if self.index is not None:
+            if start is None or start <= 0:
+                first = 0
+            elif start < len(self.index):
+                first = int(self.index[start])
+            if stop is None:
+                last = n
+            elif stop + 1 < len(self.index):
+                last = int(self.index[stop + 1])
+        steps = self.records["step"]
+        if first is None:
+            first = 0 if start is None else int(np.searchsorted(steps, start, side="left"))
+        if last is None:
+            last = n if stop is None else int(np.searchsorted(steps, stop, side="right"))
+        return first, max(first, last)
+
+    def step_offsets(self, last_step):
+        """Index entries for steps 0..last_step (the number of records before each step)"""
+        if self.index is not None and len(self.index) > last_step:
+            return np.array(self.index[:last_step + 1], dtype=np.uint64)
+        steps = np.arange(last_step + 1)
+        return np.searchsorted(self.records["step"], steps, side="left").astype(np.uint64)
+
+    # --- QUERIES ---
+
+    @staticmethod
+    def _type_codes(types):
+        if types is None:
+            return None
+        if isinstance(types, (str, int, np.integer)):
+            types = [types]
+        return np.array([EVENT_TYPES[t] if isinstance(t, str) else int(t) for t in types], dtype=np.uint8)
+
+    def query(self, start=None, stop=None, agent=None, involving=None, types=None):
+        """
+        Events matching every given filter, in log order
+
+        Args:
+            start, stop: Inclusive step range (default: all steps)
+            agent: unique_id, or list of them, of the agent the events are about
+            involving: unique_id, or list, appearing as agent or as other
+            types: Event type code or name, or list of them
+
+        Returns:
+            Structured NumPy array of EVENT_DTYPE records
+        """
+        first, last = self.step_range(start, stop)
+        codes = self._type_codes(types)
+        agents = None if agent is None else np.atleast_1d(np.asarray(agent, dtype=np.uint32))
+        involved = None if involving is None else np.atleast_1d(np.asarray(involving, dtype=np.uint32))
+
+        if agents is not None and involved is None and self.agent_index is not None:
+            rows = self._agent_rows(agents, first, last)
+            selected = self.records[rows]
+            if codes is not None:
+                selected = selected[np.isin(selected["type"], codes)]
+            return np.array(selected)
+
+        pieces = []
+        for chunk_start in range(first, last, SCAN_CHUNK):
+            chunk = self.records[chunk_start:min(chunk_start + SCAN_CHUNK, last)]
+            keep = np.ones(len(chunk), dtype=bool)
+            if codes is not None:
+                keep &= np.isin(chunk["type"], codes)
+            if agents is not None:
+                keep &= np.isin(chunk["agent"], agents)
+            if involved is not None:
+                keep &= np.isin(chunk["agent"], involved) | np.isin(chunk["other"], involved)
+            pieces.append(np.array(chunk[keep]))
+        return np.concatenate(pieces) if pieces else np.zeros(0, dtype=EVENT_DTYPE)
+
+    def frame(self, start=None, stop=None, agent=None, involving=None, types=None):
+        """query() as a DataFrame, with event and state names as categoricals"""
+        events = self.query(start, stop, agent, involving, types)
+        frame = pd.DataFrame({name: events[name] for name in EVENT_DTYPE.names})
+        # Type codes start at 1; NO_CAUSE (-1) becomes a missing value
+        frame["type"] = pd.Categorical.from_codes(events["type"].astype(np.int64) - 1, list(EVENT_NAMES.values()))
+        state_names = [STATE_MAP[s]["name"] for s in range(NUM_STATES)]
+        for column in ("state", "cause"):
+            frame[column] = pd.Categorical.from_codes(events[column].astype(np.int64), state_names)
+        for column in ("agent", "other"):
+            frame[column] = frame[column].astype(np.int64)
+        frame.loc[frame["other"] == NO_AGENT, "other"] = -1
+        return frame
+
+    def counts(self, start=None, stop=None):
+        """Events per step and type as a DataFrame (steps x event names)"""
+        first, last = self.step_range(start, stop)
+        table = {}
+        for chunk_start in range(first, last, SCAN_CHUNK):
+            chunk = self.records[chunk_start:min(chunk_start + SCAN_CHUNK, last)]
+            frame = pd.DataFrame({"step": chunk["step"], "type": chunk["type"]})
+            table[chunk_start] = frame.groupby(["step", "type"]).size()
+        if not table:
+            return pd.DataFrame(columns=list(EVENT_NAMES.values()))
+        counts = pd.concat(table.values()).groupby(level=[0, 1]).sum().unstack(fill_value=0)
+        counts = counts.reindex(columns=list(EVENT_NAMES), fill_value=0).rename(columns=EVENT_NAMES)
+        return counts.rename_axis(index="step", columns=None)
+
+    # --- AGENT INDEX ---
+
+    def build_agent_index(self):
+        """
+        Write path.agents.npy: record numbers sorted by (agent, record)
+
+        Agent queries then read only the matching records. The index covers
+        the records present when it is built; later records are scanned.
+
+        Returns:
+            Path of the index
+        """
+        order = np.argsort(self.records["agent"], kind="stable").astype(np.uint64)
+        path = self.path + AGENT_INDEX_SUFFIX
+        np.save(path, order)
+        self.agent_index = np.load(path, mmap_mode="r")
+        return path
+
+    def _agent_rows(self, agents, first, last):
+        indexed = len(self.agent_index)
+        sorted_agents = self.records["agent"]
+        rows = []
+        for agent in np.unique(agents):
+            # Binary search over the index: each probe reads one record's agent field
+            lo, hi = 0, indexed
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if sorted_agents[int(self.agent_index[mid])] < agent:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            end = lo
+            while end < indexed and sorted_agents[int(self.agent_index[end])] == agent:
+                end += 1
+            rows.append(np.asarray(self.agent_index[lo:end], dtype=np.int64))
+        if last > indexed:
+            tail = np.arange(max(first, indexed), last)
+            rows.append(tail[np.isin(self.records["agent"][tail], agents)])
+        rows = np.sort(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+        return rows[(rows >= first) & (rows < last)]
@@ -0,0 +1,198 @@
+"""
+Large-scale headless runs for AI Adoption Simulator
+Run populations far beyond the interactive server's 30x30 / 400-agent
+sliders (a million agents and up) without the browser, report throughput and
+memory per agent, and save the model-level series to CSV, Parquet or Arrow
+"""
+
+from datetime import datetime
+import argparse
+import os
+import sys
+import time
+
+# Default seed mix of EvolutionaryModel (300 human, 20 augmented, 20 automated of 350)
+HUMAN_SHARE = 300 / 350
+AUGMENTED_SHARE = 20 / 350
+AUTOMATED_SHARE = 20 / 350
+
+# Default density: 350 agents on 30x30 cells
+DEFAULT_DENSITY = 350 / 900
+
+# ==========================================
+# PARAMETERS
+# ==========================================
+
+def scale_params(N, width, height=None, automated_share=AUTOMATED_SHARE,
+                 augmented_share=AUGMENTED_SHARE, **params):
+    """
+    Model parameters for N agents with the default seed mix
+
+    Args:
+        N: Number of agents
+        width: Grid width
+        height: Grid height (defaults to width)
+        automated_share: Fraction of agents seeded as robots
+        augmented_share: Fraction of agents seeded as augmented workers
+        **params: Any other model parameters, passed through unchanged
+
+    Returns:
+        Dictionary of model keyword arguments
+    """
+    seeds_automated = round(N * automated_share)
+    seeds_augmented = round(N * augmented_share)
+    return {
+        "N": N, "width": width, "height": width if height is None else height,
+        "seeds_human": N - seeds_automated - seeds_augmented,
+        "seeds_augmented": seeds_augmented,
+        "seeds_automated": seeds_automated,
+        **params,
+    }
+
+def side_for(N, density=DEFAULT_DENSITY):
+    """Side of the smallest square grid holding N agents at the given density"""
+    side = int((N / density) ** 0.5)
+    while side * side * density < N:
+        side += 1
+    return side
+
+# ==========================================
+# RUN
+# ==========================================
+
+def grid_size(model):
+    """(width, height) of either engine's grid"""
+    grid = getattr(model, "grid", None)
+    if grid is not None:
+        return grid.width, grid.height
+    return model.width, model.height
+
+def run_headless(params, steps, engine="vectorized", report_every=10):
+    """
+    Run one large model without visualization
+
+    Memory per agent is given two ways: the bytes of the model's per-agent
+    arrays divided by the live agent count (vectorized engine only), and the
+    growth in peak resident memory over the run divided by the initial agent
+    count, which also covers per-step temporaries and the collector.
+
+    Args:
+        params: Model parameters (see scale_params)
+        steps: Number of steps to run (fewer if a stop_* condition ends the run)
+        engine: Key into batch_run.ENGINES ("vectorized" for very large runs)
+        report_every: Print progress every this many steps (0 for none)
+
+    Returns:
+        Tuple of (model, stats dictionary)
+    """
+    from batch_run import ENGINES
+    from benchmark import peak_rss_mb
+
+    rss_start = peak_rss_mb()
+    start = time.perf_counter()
+    model = ENGINES[engine](**params)
+    setup = time.perf_counter() - start
+    width, height = grid_size(model)
+    print(f"Setup: {model.agent_count:,} agents on {width}x{height} in {setup:.2f}s")
+
+    start = time.perf_counter()
+    for i in range(steps):
+        if not model.running:
+            print(f"  stopped at step {model.stop_step}: {model.stop_reason}")
+            break
+        model.step()
+        if report_every and (i + 1) % report_every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"  step {i + 1:5d}: {model.agent_count:,} agents, "
+                  f"{elapsed / (i + 1):.3f}s/step, peak RSS {peak_rss_mb():.0f} MB")
+    run_time = time.perf_counter() - start
+    steps = model._steps
+    if hasattr(model, "close"):
+        model.close()
+
+    rss_growth = peak_rss_mb() - rss_start
+    stats = {
+        "engine": engine,
+        "agents_initial": params["N"],
+        "agents_final": model.agent_count,
+        "cells": width * height,
+        "steps": steps,
+        "setup_sec": setup,
+        "sec_per_step": run_time / steps if steps else 0.0,
+        "agent_steps_per_sec": params["N"] * steps / run_time if run_time else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_bytes_per_agent": rss_growth * 1024 * 1024 / max(params["N"], 1),
+    }
+    if hasattr(model, "agent_nbytes"):
+        stats["array_bytes_per_agent"] = model.agent_nbytes / max(model.agent_count, 1)
+    return model, stats
+
+def print_stats(stats):
+    print(f"\n=== {stats['agents_initial']:,} agents, {stats['cells']:,} cells, "
+          f"{stats['steps']} steps ({stats['engine']}) ===")
+    print(f"  setup:              {stats['setup_sec']:.2f}s")
+    print(f"  time per step:      {stats['sec_per_step']:.3f}s")
+    print(f"  agent-steps/sec:    {stats['agent_steps_per_sec']:,.0f}")
+    print(f"  final agents:       {stats['agents_final']:,}")
+    print(f"  peak RSS:           {stats['peak_rss_mb']:.0f} MB")
+    print(f"  RSS growth / agent: {stats['rss_bytes_per_agent']:.0f} bytes")
+    if "array_bytes_per_agent" in stats:
+        print(f"  arrays / agent:     {stats['array_bytes_per_agent']:.0f} bytes")
+
+# ==========================================
+# MAIN
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Adoption Simulator large-scale headless run")
+    parser.add_argument("--agents", type=int, default=1_000_000, help="number of agents")
+    parser.add_argument("--width", type=int, help="grid width (defaults to the default density)")
+    parser.add_argument("--height", type=int, help="grid height (defaults to width)")
+    parser.add_argument("--steps", type=int, default=100, help="number of steps")
+    parser.add_argument("--engine", default="vectorized", choices=["agent", "vectorized", "synchronous"])
+    parser.add_argument("--collect-every", type=int, default=1, help="collect model data every this many steps")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rng-mode", choices=["shared", "counter"],
+                        help="shared sequential RNG (default), or counter-based per-agent streams; "
+                             "the synchronous engine always uses counter")
+    parser.add_argument("--tiles", type=int, help="grid tiles of the synchronous engine")
+    parser.add_argument("--workers", type=int, help="threads stepping tiles of the synchronous engine")
+    parser.add_argument("--compact-agents", action="store_const", const=True,
+                        help="slotted agents without neighborhood caches (agent engine)")
+    parser.add_argument("--events", help="write a binary transition event log to this path (see events.py)")
+    parser.add_argument("--output-dir", default="results", help="directory for the output")
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet", "arrow"],
+                        help="CSV file, or a Parquet / Arrow IPC results directory (requires pyarrow)")
+    parser.add_argument("--no-save", action="store_true", help="skip writing the results")
+    args = parser.parse_args(argv)
+
+    width = args.width or side_for(args.agents)
+    options = {name: value for name, value in (("rng_mode", args.rng_mode), ("tiles", args.tiles),
+                                               ("workers", args.workers),
+                                               ("compact_agents", args.compact_agents),
+                                               ("event_log", args.events)) if value is not None}
+    params = scale_params(args.agents, width, args.height,
+                          seed=args.seed, collect_every=args.collect_every, **options)
+    model, stats = run_headless(params, args.steps, engine=args.engine)
+    print_stats(stats)
+    if model.events is not None:
+        model.events.close()
+        print(f"\nEvent log: {args.events} ({model.events.count:,} events, "
+              f"{os.path.getsize(args.events) / 1e6:.1f} MB)")
+
+    if not args.no_save:
+        os.makedirs(args.output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        model_data = model.datacollector.get_model_vars_dataframe()
+        if args.format == "csv":
+            path = os.path.join(args.output_dir, f"headless_{args.agents}_model_{timestamp}.csv")
+            model_data.to_csv(path)
+        else:
+            from results import ResultWriter
+            path = os.path.join(args.output_dir, f"headless_{args.agents}_{timestamp}")
+            ResultWriter(path, args.format).write(0, model_data, params=params)
+        print(f"\nResults saved: {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Wealth-distribution statistics for AI Adoption Simulator
+Gini coefficient, percentiles and maximum wealth per agent class and overall,
+from one vectorized pass over the agents' wealth into a log-bucket sketch
+"""
+
+import math
+import numpy as np
+from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT, NUM_STATES
+
+# Relative accuracy of percentiles and Gini: every value is placed in a bucket
+# whose bounds are within this fraction of each other
+WEALTH_ACCURACY = 0.01
+
+# Magnitudes below this count as zero wealth
+MIN_MAGNITUDE = 1e-9
+
+PERCENTILES = (10, 50, 90, 99)
+
+# Column suffix per state (matching the TotalWealth_* reporters), then everyone
+GROUP_LABELS = {
+    HUMAN: "Human", AUGMENTED: "Augmented", AUTOMATED: "Automated",
+    DISPLACED: "Displaced", UBI_RECIPIENT: "UBI",
+}
+ALL_LABEL = "All"
+
+STAT_NAMES = ("Gini",) + tuple(f"P{p}" for p in PERCENTILES) + ("Max",)
+
+def wealth_stat_columns():
+    """Reporter names, e.g. Gini_Human ... Max_All"""
+    labels = [GROUP_LABELS[state] for state in range(NUM_STATES)] + [ALL_LABEL]
+    return [f"{stat}_{label}" for label in labels for stat in STAT_NAMES]
+
+# ==========================================
+# SKETCH
+# ==========================================
+
+def bucket_keys(wealth, accuracy):
+    """
+    Order-preserving bucket key for each value, and the number of keys
+
+    Positive values v fall in bucket ceil(log_gamma(v)) with
+    gamma = (1 + accuracy) / (1 - accuracy); negative values mirror the
+    positive buckets below a single bucket for zero. Keys sort like the values.
+    """
+    log_gamma = math.log((1 + accuracy) / (1 - accuracy))
+    magnitude = np.abs(wealth)
+    exponent = np.ceil(np.log(np.maximum(magnitude, MIN_MAGNITUDE)) / log_gamma).astype(np.int64)
+    # Level 0 is zero wealth; level 1 is the bucket of MIN_MAGNITUDE
+    level = exponent - (math.ceil(math.log(MIN_MAGNITUDE) / log_gamma) - 1)
+    level[magnitude <= MIN_MAGNITUDE] = 0
+    span = int(level.max()) if len(level) else 0
+    keys = np.where(wealth < 0, span - level, span + level)
+    return keys, 2 * span + 1
+
+def summarize(states, wealth, accuracy=WEALTH_ACCURACY):
+    """
+    Gini, percentiles and max of wealth for each state and for everyone
+
+    Agents are counted into (state, bucket) cells with the bucket's exact
+    wealth sum. A percentile is the mean wealth of the bucket holding that
+    rank, so it is within `accuracy` (relative) of the exact value. Gini takes
+    every agent in a bucket to hold the bucket mean. Max is exact. Groups with
+    no agents report 0.
+
+    Args:
+        states: Integer array of agent states
+        wealth: Float array of agent wealth, same length
+        accuracy: Relative accuracy of the buckets
+
+    Returns:
+        Dictionary of column name -> value (see wealth_stat_columns)
+    """
+    wealth = np.asarray(wealth, dtype=np.float64)
+    states = np.asarray(states, dtype=np.int64)
+    keys, n_keys = bucket_keys(wealth, accuracy)
+    cells = states * n_keys + keys
+    counts = np.bincount(cells, minlength=NUM_STATES * n_keys).reshape(NUM_STATES, n_keys)
+    sums = np.bincount(cells, weights=wealth, minlength=NUM_STATES * n_keys).reshape(NUM_STATES, n_keys)
+
+    maxima = np.full(NUM_STATES, -np.inf)
+    np.maximum.at(maxima, states, wealth)
+
+    stats = {}
+    groups = [(GROUP_LABELS[state], counts[state], sums[state], maxima[state]) for state in range(NUM_STATES)]
+    groups.append((ALL_LABEL, counts.sum(axis=0), sums.sum(axis=0), maxima.max()))
+    for label, group_counts, group_sums, maximum in groups:
+        for name, value in _group_stats(group_counts, group_sums, maximum).items():
+            stats[f"{name}_{label}"] = value
+    return stats
+
+def _group_stats(counts, sums, maximum):
+    n = int(counts.sum())
+    if n == 0:
+        return dict.fromkeys(STAT_NAMES, 0.0)
+
+    filled = np.flatnonzero(counts)
+    counts, sums = counts[filled], sums[filled]
+    means = sums / counts
+    cumulative = np.cumsum(counts)
+
+    stats = {}
+    # Gini = 2 * sum(rank * x) / (n * total) - (n + 1) / n over ranks 1..n,
+    # with each bucket's agents taking the middle of its rank range
+    total = sums.sum()
+    if total != 0:
+        mean_rank = cumulative - (counts - 1) / 2
+        stats["Gini"] = float(2 * (sums * mean_rank).sum() / (n * total) - (n + 1) / n)
+    else:
+        stats["Gini"] = 0.0
+    for p in PERCENTILES:
+        rank = int(p / 100 * (n - 1))
+        stats[f"P{p}"] = float(means[np.searchsorted(cumulative, rank, side="right")])
+    stats["Max"] = float(maximum)
+    return stats
+
+# ==========================================
+# REPORTERS
+# ==========================================
+
+class WealthStats:
+    """
+    Per-step cache of summarize() for a model
+
+    DataCollector calls every reporter separately; the first call in a step
+    computes all the statistics from model.wealth_arrays() and the rest read
+    the cached result.
+
+    Args:
+        accuracy: Relative accuracy passed to summarize()
+    """
+
+    def __init__(self, accuracy=WEALTH_ACCURACY):
+        self.accuracy = accuracy
+        self._step = None
+        self._stats = None
+
+    def get(self, model):
+        if self._step != model._steps or self._stats is None:
+            states, wealth = model.wealth_arrays()
+            self._stats = summarize(states, wealth, self.accuracy)
+            self._step = model._steps
+        return self._stats
+
+def wealth_stat_reporters():
+    """DataCollector reporters for every wealth_stat_columns() entry, read from model.wealth_stats"""
+    return {name: (lambda m, name=name: m.wealth_stats.get(m)[name]) for name in wealth_stat_columns()}
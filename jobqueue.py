@@ -0,0 +1,428 @@
+"""
+Durable job queue for AI Adoption Simulator
+Keeps the runs of a sweep in a SQLite database so any number of worker
+processes, on one machine or several sharing a filesystem, can claim them,
+write their results as they finish, and pick up where a crashed sweep stopped
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+
+# Job statuses
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (PENDING, RUNNING, DONE, FAILED)
+
+# Seconds a claim stays valid without a heartbeat; the heartbeat renews it
+# every LEASE_SECONDS / 3 while the job runs
+LEASE_SECONDS = 300
+
+# Attempts before a job that keeps raising is marked failed
+MAX_ATTEMPTS = 3
+
+# Finished jobs the throughput estimate is taken over
+THROUGHPUT_WINDOW = 50
+
+# Seconds to wait for another process's write lock before giving up
+BUSY_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    params TEXT NOT NULL,
+    steps INTEGER NOT NULL,
+    engine TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    elapsed REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+def job_key(name, params, steps, engine):
+    """Identity of a job: enqueueing the same job twice adds it once"""
+    payload = json.dumps({"name": name, "params": params, "steps": steps, "engine": engine},
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class JobQueue:
+    """
+    SQLite-backed queue of simulation runs
+
+    Each job is one (params, steps, engine) run. Workers claim the lowest
+    pending job inside a write transaction (BEGIN IMMEDIATE), so two workers
+    never claim the same job. A claim is a lease: it records the worker and
+    an expiry time, which the worker's heartbeat pushes forward while the
+    run is going. A worker that dies stops renewing, and once the lease
+    expires the job can be claimed again. Leases compare wall-clock times, so
+    machines sharing a queue need roughly synchronised clocks.
+
+    The database uses SQLite's default rollback journal, not WAL, because
+    WAL does not work on network filesystems. Locking over NFS depends on
+    the server's POSIX lock support.
+
+    Args:
+        path: Database file (created with its tables on first use)
+        timeout: Seconds to wait for another process's write lock
+    """
+
+    def __init__(self, path, timeout=BUSY_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = self._connect()
+        self._db.executescript(SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly where they matter
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def close(self):
+        self._db.close()
+
+    # --- ENQUEUE ---
+
+    def enqueue(self, param_sets, steps=500, engine="agent", base_seed=None, name="sweep"):
+        """
+        Add one job per parameter set; jobs already queued are left as they are
+
+        With base_seed, parameter set i without its own "seed" gets
+        derive_seed(base_seed, i), as in run_batch_experiments, so enqueueing
+        the same list again (e.g. after a crash) matches the existing jobs
+        and adds nothing.
+
+        Args:
+            param_sets: Iterable of parameter dictionaries
+            steps: Number of steps per run
+            engine: Key into batch_run.ENGINES
+            base_seed: Seed from which per-job seeds are derived
+            name: Sweep name, part of every job's identity
+
+        Returns:
+            Number of jobs added
+        """
+        from batch_run import derive_seed
+
+        now = time.time()
+        rows = []
+        for i, params in enumerate(param_sets):
+            if base_seed is not None and "seed" not in params:
+                params = {**params, "seed": derive_seed(base_seed, i)}
+            rows.append((job_key(name, params, steps, engine), name, json.dumps(params, sort_keys=True),
+                         steps, engine, now))
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (key, name, params, steps, engine, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            added = self._db.total_changes - before
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return added
+
+    # --- CLAIM / COMPLETE ---
+
+    def claim(self, worker, lease=LEASE_SECONDS):
+        """
+        Lease the next runnable job: pending, or running with an expired lease
+
+        Returns:
+            Dictionary with id, name, params, steps, engine and attempts, or
+            None if nothing is runnable
+        """
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT id, name, params, steps, engine, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY id LIMIT 1",
+                (PENDING, RUNNING, now)).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                    "started_at = ? WHERE id = ?", (RUNNING, worker, now + lease, now, row[0]))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job_id, name, params, steps, engine, attempts = row
+        return {"id": job_id, "name": name, "params": json.loads(params), "steps": steps,
+                "engine": engine, "attempts": attempts + 1}
+
+    def renew(self, job_id, worker, lease=LEASE_SECONDS):
+        """Push the lease of a job this worker holds forward; False if it lost the job"""
+        cursor = self._db.execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+            (time.time() + lease, job_id, worker, RUNNING))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, elapsed):
+        """
+        Mark a job done
+
+        A job whose lease expired and was claimed again is still marked done
+        by whichever worker finishes first; the later one changes nothing.
+        """
+        self._db.execute(
+            "UPDATE jobs SET status = ?, lease_until = NULL, finished_at = ?, elapsed = ?, error = NULL "
+            "WHERE id = ? AND status != ?", (DONE, time.time(), elapsed, job_id, DONE))
+
+    def fail(self, job_id, error, max_attempts=MAX_ATTEMPTS):
+        """Record a failed attempt; the job is retried until it has had max_attempts"""
+        self._db.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "lease_until = NULL, error = ? WHERE id = ? AND status = ?",
+            (max_attempts, FAILED, PENDING, error, job_id, RUNNING))
+
+    def retry_failed(self):
+        """Return failed jobs to pending with a fresh attempt count; returns how many"""
+        cursor = self._db.execute(
+            "UPDATE jobs SET status = ?, attempts = 0, error = NULL WHERE status = ?", (PENDING, FAILED))
+        return cursor.rowcount
+
+    # --- STATUS ---
+
+    def status(self, window=THROUGHPUT_WINDOW):
+        """
+        Progress of the queue
+
+        Throughput is measured over the last `window` finished jobs, so it
+        tracks the workers currently running rather than the whole history.
+
+        Returns:
+            Dictionary with a count per status, total, active workers,
+            throughput (jobs per second, None before two jobs finish), eta
+            (seconds, None without a throughput) and the last error
+        """
+        now = time.time()
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, count in self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        expired, workers = self._db.execute(
+            "SELECT SUM(lease_until < ?), COUNT(DISTINCT CASE WHEN lease_until >= ? THEN worker END) "
+            "FROM jobs WHERE status = ?", (now, now, RUNNING)).fetchone()
+
+        finishes = [t for (t,) in self._db.execute(
+            "SELECT finished_at FROM jobs WHERE status = ? ORDER BY finished_at DESC LIMIT ?", (DONE, window))]
+        throughput = None
+        if len(finishes) >= 2 and finishes[0] > finishes[-1]:
+            throughput = (len(finishes) - 1) / (finishes[0] - finishes[-1])
+        remaining = counts[PENDING] + counts[RUNNING]
+        eta = remaining / throughput if throughput else None
+        if remaining == 0:
+            eta = 0.0
+
+        error = self._db.execute(
+            "SELECT id, error FROM jobs WHERE error IS NOT NULL ORDER BY id DESC LIMIT 1").fetchone()
+        return {**counts, "total": sum(counts.values()), "expired_leases": expired or 0,
+                "active_workers": workers, "throughput": throughput, "eta": eta, "last_error": error}
+
+# ==========================================
+# WORKER
+# ==========================================
+
+class _Heartbeat(threading.Thread):
+    """Renews a job's lease every lease / 3 seconds on its own connection"""
+
+    def __init__(self, path, job_id, worker, lease):
+        super().__init__(daemon=True)
+        self.path = path
+        self.job_id = job_id
+        self.worker = worker
+        self.lease = lease
+        self.stopped = threading.Event()
+
+    def run(self):
+        queue = JobQueue(self.path)
+        try:
+            while not self.stopped.wait(self.lease / 3):
+                if not queue.renew(self.job_id, self.worker, self.lease):
+                    break
+        finally:
+            queue.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def work(path, results_dir, worker=None, lease=LEASE_SECONDS, format="parquet", max_jobs=None,
+         wait=False, poll=5.0, checkpoint_every=None, max_attempts=MAX_ATTEMPTS):
+    """
+    Claim and run jobs until none are left
+
+    Every finished run is written through a results.ResultWriter into
+    results_dir as experiment <job id>, with a manifest of its own per
+    worker, and only then marked done. With checkpoint_every, a run also
+    checkpoints to results_dir/checkpoints/job-<id>.ckpt as it goes, so a
+    job re-leased after a crash resumes from there (on any machine that
+    sees the directory).
+
+    Args:
+        path: Queue database
+        results_dir: Directory shared by every worker of the sweep
+        worker: Worker name (default: host-pid)
+        lease: Seconds a claim stays valid between heartbeats
+        format: "parquet" or "arrow"
+        max_jobs: Stop after this many jobs (default: no limit)
+        wait: When nothing is claimable but jobs are still running elsewhere,
+            poll every `poll` seconds (to take over expired leases) instead of exiting
+        poll: Seconds between polls when waiting
+        checkpoint_every: Steps between resumable checkpoints (default: none)
+        max_attempts: Attempts before a raising job is marked failed
+
+    Returns:
+        Number of jobs this worker completed
+    """
+    from batch_run import run_single_experiment
+    from results import ResultWriter
+
+    worker = worker or default_worker_id()
+    queue = JobQueue(path)
+    writer = ResultWriter(results_dir, format, manifest=f"experiments-{worker}.jsonl")
+    checkpoints = os.path.join(results_dir, "checkpoints")
+    completed = 0
+    print(f"Worker {worker}: queue {path}, results {results_dir}")
+    try:
+        while max_jobs is None or completed < max_jobs:
+            job = queue.claim(worker, lease)
+            if job is None:
+                counts = queue.status()
+                if wait and counts[RUNNING]:
+                    time.sleep(poll)
+                    continue
+                break
+
+            checkpoint_path = None
+            if checkpoint_every:
+                os.makedirs(checkpoints, exist_ok=True)
+                checkpoint_path = os.path.join(checkpoints, f"job-{job['id']}.ckpt")
+            heartbeat = _Heartbeat(path, job["id"], worker, lease)
+            heartbeat.start()
+            start = time.perf_counter()
+            try:
+                model_data, agent_data = run_single_experiment(
+                    job["params"], job["steps"], results_dir, job["engine"], verbose=False,
+                    checkpoint_path=checkpoint_path, checkpoint_every=checkpoint_every)
+                writer.write(job["id"], model_data, agent_data, params=job["params"])
+            except Exception:
+                heartbeat.stop()
+                queue.fail(job["id"], traceback.format_exc(), max_attempts)
+                print(f"  job {job['id']} failed (attempt {job['attempts']})")
+                continue
+            heartbeat.stop()
+            elapsed = time.perf_counter() - start
+            queue.complete(job["id"], elapsed)
+            if checkpoint_path and os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+            completed += 1
+            print(f"  job {job['id']} done in {elapsed:.1f}s")
+    finally:
+        queue.close()
+    return completed
+
+def _work_process(kwargs):
+    return work(**kwargs)
+
+def print_status(stats):
+    print(f"{stats['total']} jobs: " + ", ".join(f"{stats[s]} {s}" for s in STATUSES))
+    print(f"  active workers: {stats['active_workers']}"
+          + (f" ({stats['expired_leases']} expired leases awaiting a worker)" if stats["expired_leases"] else ""))
+    if stats["throughput"] is not None:
+        print(f"  throughput: {stats['throughput'] * 60:.2f} jobs/min")
+    if stats["eta"] is not None:
+        print(f"  ETA: {stats['eta'] / 60:.1f} min")
+    if stats["last_error"] is not None:
+        job_id, error = stats["last_error"]
+        print(f"  last error (job {job_id}): {error.strip().splitlines()[-1]}")
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Adoption Simulator job queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="add jobs from a JSON list (or JSON lines) of parameter sets")
+    enqueue.add_argument("queue", help="queue database")
+    enqueue.add_argument("params", help="file with the parameter sets")
+    enqueue.add_argument("--steps", type=int, default=500)
+    enqueue.add_argument("--engine", default="agent", choices=["agent", "vectorized", "synchronous", "meanfield"])
+    enqueue.add_argument("--base-seed", type=int, help="derive a seed for every set without one")
+    enqueue.add_argument("--name", default="sweep", help="sweep name")
+
+    worker = commands.add_parser("work", help="run jobs until none are left")
+    worker.add_argument("queue", help="queue database")
+    worker.add_argument("results", help="results directory shared by all workers")
+    worker.add_argument("--processes", type=int, default=1, help="local worker processes")
+    worker.add_argument("--lease", type=float, default=LEASE_SECONDS, help="lease seconds")
+    worker.add_argument("--format", default="parquet", choices=["parquet", "arrow"])
+    worker.add_argument("--max-jobs", type=int, help="stop after this many jobs (per process)")
+    worker.add_argument("--wait", action="store_true",
+                        help="keep polling while other workers hold jobs, to take over expired leases")
+    worker.add_argument("--checkpoint-every", type=int, help="steps between resumable checkpoints")
+
+    status = commands.add_parser("status", help="progress, throughput and ETA")
+    status.add_argument("queue", help="queue database")
+
+    retry = commands.add_parser("retry-failed", help="return failed jobs to the queue")
+    retry.add_argument("queue", help="queue database")
+
+    args = parser.parse_args(argv)
+    if args.command == "enqueue":
+        with open(args.params) as handle:
+            text = handle.read()
+        try:
+            param_sets = json.loads(text)
+        except ValueError:
+            param_sets = [json.loads(line) for line in text.splitlines() if line.strip()]
+        queue = JobQueue(args.queue)
+        added = queue.enqueue(param_sets, args.steps, args.engine, args.base_seed, args.name)
+        print(f"Enqueued {added} of {len(param_sets)} jobs ({len(param_sets) - added} already queued)")
+        print_status(queue.status())
+    elif args.command == "work":
+        kwargs = {"path": args.queue, "results_dir": args.results, "lease": args.lease,
+                  "format": args.format, "max_jobs": args.max_jobs, "wait": args.wait,
+                  "checkpoint_every": args.checkpoint_every}
+        if args.processes <= 1:
+            completed = work(**kwargs)
+        else:
+            with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+                completed = sum(pool.map(_work_process, [kwargs] * args.processes))
+        print(f"Completed {completed} jobs")
+    elif args.command == "status":
+        print_status(JobQueue(args.queue).status())
+    elif args.command == "retry-failed":
+        print(f"Requeued {JobQueue(args.queue).retry_failed()} failed jobs")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+/**
+Delta-encoded grid for the AI Adoption Simulator
+====================================================================
+
+Client half of server.DeltaCanvasGrid. Each cell is a bitmask of the agent
+states on it (bit s set when at least one agent in state s is there). The
+server sends a keyframe with the per-state styles and every occupied cell,
+then only the cells whose mask changed. Only those cells are redrawn.
+
+Frame fields:
+  keyframe: true for a full frame (clear everything first)
+  styles:   (keyframes) one portrayal per state, and draw_order (states by layer)
+  cells:    flat [x0, y0, mask0, x1, y1, mask1, ...]; mask 0 empties a cell
+*/
+
+const DeltaCanvasModule = function (canvas_width, canvas_height, grid_width, grid_height) {
+  // Whole pixels per cell, at least one, so large grids widen the canvas
+  const cellSize = Math.max(1, Math.floor(Math.min(canvas_width / grid_width, canvas_height / grid_height)));
+  const width = cellSize * grid_width;
+  const height = cellSize * grid_height;
+  const drawLines = cellSize >= 4;
+  const drawShapes = cellSize >= 6;
+
+  const canvas = document.createElement("canvas");
+  Object.assign(canvas, { width: width, height: height, className: "world-grid" });
+  const parent = document.createElement("div");
+  parent.style.height = `${height}px`;
+  parent.className = "world-grid-parent";
+  parent.appendChild(canvas);
+  document.getElementById("elements").appendChild(parent);
+  const context = canvas.getContext("2d");
+
+  let styles = [];
+  let drawOrder = [];
+
+  const drawCell = (x, y, mask) => {
+    const left = x * cellSize;
+    const top = (grid_height - y - 1) * cellSize;
+    context.clearRect(left, top, cellSize, cellSize);
+
+    for (const state of drawOrder) {
+      if (!(mask & (1 << state))) continue;
+      const p = styles[state];
+      context.fillStyle = p.Color;
+      context.strokeStyle = p.stroke_color || p.Color;
+
+      if (!drawShapes) {
+        // Too small for shapes: fill the cell with the top layer's color
+        context.fillRect(left, top, cellSize, cellSize);
+      } else if (p.Shape == "rect") {
+        const w = p.w * cellSize;
+        const h = p.h * cellSize;
+        context.fillRect(left + (cellSize - w) / 2, top + (cellSize - h) / 2, w, h);
+        context.strokeRect(left + (cellSize - w) / 2, top + (cellSize - h) / 2, w, h);
+      } else {
+        context.beginPath();
+        context.arc(left + cellSize / 2, top + cellSize / 2, p.r * (cellSize / 2 - 1), 0, Math.PI * 2);
+        context.fill();
+        context.stroke();
+      }
+    }
+
+    if (drawLines) {
+      context.strokeStyle = "#eee";
+      context.strokeRect(left + 0.5, top + 0.5, cellSize - 1, cellSize - 1);
+    }
+  };
+
+  const drawGrid = () => {
+    context.clearRect(0, 0, width, height);
+    if (!drawLines) return;
+    context.strokeStyle = "#eee";
+    for (let x = 0; x < grid_width; x++)
+      for (let y = 0; y < grid_height; y++)
+        context.strokeRect(x * cellSize + 0.5, y * cellSize + 0.5, cellSize - 1, cellSize - 1);
+  };
+
+  this.render = (data) => {
+    if (data.keyframe) {
+      styles = data.styles;
+      drawOrder = data.draw_order;
+      drawGrid();
+    }
+    const cells = data.cells;
+    for (let i = 0; i < cells.length; i += 3) drawCell(cells[i], cells[i + 1], cells[i + 2]);
+  };
+
+  this.reset = () => {
+    context.clearRect(0, 0, width, height);
+  };
+};
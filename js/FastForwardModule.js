@@ -0,0 +1,60 @@
+/**
+Fast-forward control for the AI Adoption Simulator
+====================================================================
+
+Client half of server.FastForwardControl. Asks the server to advance the
+model N steps without rendering, shows its progress, and lets the user
+cancel. When the server is done it sends the final step count, then a
+normal frame carrying the final grid and the chart history.
+*/
+
+const FastForwardModule = function (default_steps) {
+  const box = document.createElement("div");
+  box.className = "input-group input-group-sm";
+  box.style = "max-width: 500px; margin-bottom: 10px;";
+  box.innerHTML = `
+    <input type="number" class="form-control" min="1" value="${default_steps}">
+    <button class="btn btn-primary" type="button">Fast-forward</button>
+    <button class="btn btn-secondary" type="button" disabled>Cancel</button>
+    <span class="input-group-text" style="min-width: 180px;"></span>
+  `;
+  document.getElementById("elements").appendChild(box);
+  const [input, forwardButton, cancelButton, status] = box.children;
+
+  const setBusy = (busy) => {
+    forwardButton.disabled = busy;
+    cancelButton.disabled = !busy;
+    input.disabled = busy;
+    startModelButton.disabled = busy;
+    stepModelButton.disabled = busy;
+  };
+
+  forwardButton.onclick = () => {
+    const steps = Math.floor(Number(input.value));
+    if (!(steps > 0)) return;
+    controller.stop();
+    setBusy(true);
+    status.innerText = "Starting...";
+    send({ type: "fast_forward", steps: steps });
+  };
+  cancelButton.onclick = () => send({ type: "cancel_fast_forward" });
+
+  ws.addEventListener("message", (message) => {
+    const msg = JSON.parse(message.data);
+    if (msg.type == "fast_forward_progress") {
+      status.innerText = `Step ${msg.step} (${msg.done} / ${msg.total})`;
+    } else if (msg.type == "fast_forward_done") {
+      controller.tick = msg.step;
+      stepDisplay.innerText = msg.step;
+      setBusy(false);
+      const verb = msg.cancelled ? "Cancelled" : "Done";
+      status.innerText = `${verb} at step ${msg.step}, ${Math.round(msg.steps_per_sec)} steps/s`;
+    }
+  });
+
+  this.render = () => {};
+
+  this.reset = () => {
+    status.innerText = "";
+  };
+};
@@ -0,0 +1,73 @@
+/**
+Line chart that accepts several rows per frame
+====================================================================
+
+Client half of server.HistoryChartModule. Each frame carries every row
+collected since the previous one, labelled with its model step, so a
+fast-forward fills in the whole history in one update.
+
+Frame fields:
+  steps: model step of each row
+  rows:  one list of series values per row
+  reset: clear the chart first (a playback seeked backwards)
+*/
+
+const HistoryChartModule = function (series, canvas_width, canvas_height) {
+  const canvas = document.createElement("canvas");
+  Object.assign(canvas, {
+    width: canvas_width,
+    height: canvas_height,
+    style: "border:1px dotted",
+  });
+  document.getElementById("elements").appendChild(canvas);
+  const context = canvas.getContext("2d");
+
+  const convertColorOpacity = (hex) => {
+    if (hex.indexOf("#") != 0) {
+      return "rgba(0,0,0,0.1)";
+    }
+    hex = hex.replace("#", "");
+    const r = parseInt(hex.substring(0, 2), 16);
+    const g = parseInt(hex.substring(2, 4), 16);
+    const b = parseInt(hex.substring(4, 6), 16);
+    return `rgba(${r},${g},${b},0.1)`;
+  };
+
+  const datasets = series.map((s) => ({
+    backgroundColor: convertColorOpacity(s.Color),
+    borderColor: s.Color,
+    label: s.Label,
+    data: [],
+  }));
+
+  const chart = new Chart(context, {
+    type: "line",
+    data: { labels: [], datasets: datasets },
+    options: {
+      responsive: true,
+      animation: false,
+      tooltips: { mode: "index", intersect: false },
+      hover: { mode: "nearest", intersect: true },
+      scales: {
+        x: { display: true, title: { display: true }, ticks: { maxTicksLimit: 11 } },
+        y: { display: true, title: { display: true } },
+      },
+    },
+  });
+
+  this.render = (data) => {
+    if (data.reset) this.reset();
+    if (!data.steps.length) return;
+    for (let r = 0; r < data.steps.length; r++) {
+      chart.data.labels.push(data.steps[r]);
+      for (let i = 0; i < datasets.length; i++) datasets[i].data.push(data.rows[r][i]);
+    }
+    chart.update();
+  };
+
+  this.reset = () => {
+    chart.data.labels.length = 0;
+    datasets.forEach((dataset) => (dataset.data.length = 0));
+    chart.update();
+  };
+};
@@ -0,0 +1,77 @@
+/**
+Playback controls for the AI Adoption Simulator
+====================================================================
+
+Client half of server.PlaybackControl. A seek bar over the recorded steps
+and a speed menu (recorded steps per frame; mesa's frames-per-second
+slider still sets the frame rate). Dragging the bar stops playback and
+seeks as it moves, keeping at most one seek in flight so the server is
+never more than one frame behind the pointer.
+
+Frame fields:
+  step:  recorded step shown
+  first: first recorded step
+  last:  last recorded step
+  speed: recorded steps per frame
+*/
+
+const PlaybackModule = function (speeds) {
+  const box = document.createElement("div");
+  box.className = "input-group input-group-sm";
+  box.style = "max-width: 500px; margin-bottom: 10px; align-items: center;";
+  box.innerHTML = `
+    <input type="range" class="form-range" style="flex: 1; margin-right: 10px;" min="0" max="0" value="0">
+    <span class="input-group-text" style="min-width: 120px;"></span>
+    <select class="form-select" style="max-width: 90px;">
+      ${speeds.map((speed) => `<option value="${speed}"${speed == 1 ? " selected" : ""}>${speed}x</option>`).join("")}
+    </select>
+  `;
+  document.getElementById("elements").appendChild(box);
+  const [bar, label, speedMenu] = box.children;
+
+  let waiting = false;
+  let pending = null;
+
+  const seek = (step) => {
+    if (waiting) {
+      pending = step;
+      return;
+    }
+    waiting = true;
+    send({ type: "seek", step: step });
+  };
+
+  bar.addEventListener("input", () => {
+    controller.stop();
+    clearTimeout(controller.timeout);
+    seek(Number(bar.value));
+  });
+
+  speedMenu.onchange = () => send({ type: "playback_speed", speed: Number(speedMenu.value) });
+
+  this.render = (data) => {
+    waiting = false;
+    if (pending !== null) {
+      const step = pending;
+      pending = null;
+      seek(step);
+    }
+    bar.min = data.first;
+    bar.max = data.last;
+    if (!waiting) bar.value = data.step;
+    label.innerText = `Step ${data.step} / ${data.last}`;
+    controller.tick = data.step;
+    stepDisplay.innerText = data.step;
+    // Seeking back from the end makes the recording playable again
+    if (controller.finished && data.step < data.last) {
+      controller.finished = false;
+      startModelButton.firstElementChild.innerText = "Start";
+    }
+  };
+
+  this.reset = () => {
+    waiting = false;
+    pending = null;
+    speedMenu.value = "1";
+  };
+};
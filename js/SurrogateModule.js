@@ -0,0 +1,49 @@
+/**
+Surrogate prediction panel for the AI Adoption Simulator
+====================================================================
+
+Client half of server.SurrogatePanel. Shows the surrogate's predicted
+end-of-run metrics for the current parameters: with every frame, and
+right after a slider moves (a "surrogate_prediction" message), before the
+model is reset or run.
+
+Data fields:
+  rows:    [{target, mean, low, high, spread}] - prediction, 95% interval
+           of the expected value, and the run-to-run standard deviation
+  notes:   warnings about parameters outside what the surrogate was trained on
+*/
+
+const SurrogateModule = function () {
+  const box = document.createElement("div");
+  box.style = "max-width: 500px; margin-bottom: 10px; font-family: monospace; font-size: 0.85em;";
+  document.getElementById("elements").appendChild(box);
+
+  const format = (value) => Math.abs(value) >= 100 ? value.toFixed(0) : value.toPrecision(3);
+
+  const show = (data) => {
+    if (!data) return;
+    const rows = data.rows.map((row) => `
+      <tr>
+        <td>${row.target}</td>
+        <td style="text-align: right;"><b>${format(row.mean)}</b></td>
+        <td style="text-align: right;">${format(row.low)} - ${format(row.high)}</td>
+        <td style="text-align: right;">&plusmn;${format(row.spread)}</td>
+      </tr>`).join("");
+    const notes = data.notes.map((note) => `<div style="color: #b36b00;">${note}</div>`).join("");
+    box.innerHTML = `
+      <table class="table table-sm" style="margin-bottom: 4px;">
+        <tr><th>Metric</th><th style="text-align: right;">Predicted</th>
+            <th style="text-align: right;">95% interval</th><th style="text-align: right;">Run-to-run</th></tr>
+        ${rows}
+      </table>${notes}`;
+  };
+
+  ws.addEventListener("message", (message) => {
+    const msg = JSON.parse(message.data);
+    if (msg.type == "surrogate_prediction") show(msg.data);
+  });
+
+  this.render = show;
+
+  this.reset = () => {};
+};
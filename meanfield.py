@@ -0,0 +1,774 @@
+"""
+Mean-field engine for AI Adoption Simulator
+Difference equations over the five state populations and their wealth,
+derived from the worker rules, to screen thousands of parameter sets in
+seconds before running the agent-based model on the promising ones
+"""
+
+import argparse
+import inspect
+import itertools
+import sys
+import time
+from math import comb
+import mesa
+import numpy as np
+import pandas as pd
+from checkpoint import apply_checkpoint, read_checkpoint, write_checkpoint
+from collector import ColumnarDataCollector
+from inequality import WEALTH_ACCURACY
+from model import MODEL_REPORTERS, EvolutionaryModel
+from ranking import TOP_K
+from stopping import FLOW_TOLERANCE, StopConditions, stop_params
+from streams import SHARED
+from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT, NUM_STATES, PARAM_SPECS
+
+# Neighborhoods of the rules, center excluded: radius-2 square influence, radius-1 merges
+SQUARE_CELLS = 24
+ADJACENT_CELLS = 8
+
+# Adoption and automation spread from agent to neighbor, so agents do not see
+# a uniform mix around them: an augmented worker became one because augmented
+# workers surrounded it. The neighborhood densities are scaled by these
+# factors (augmented as seen by humans, augmented as seen by augmented,
+# robots), fitted by calibrate() against agent-based runs (see README)
+AUG_CLUSTERING = 1.0
+AUG_SELF_CLUSTERING = 2.5
+AUTO_CLUSTERING = 0.75
+
+# Expected population below which a shrinking class dies out
+EXTINCTION = 0.5
+
+# Closure parameters of the mean field, on top of EvolutionaryModel's
+CLOSURE_PARAMS = {"aug_clustering": AUG_CLUSTERING, "aug_self_clustering": AUG_SELF_CLUSTERING,
+                  "auto_clustering": AUTO_CLUSTERING}
+
+# Candidate values calibrate() searches, every combination
+CALIBRATION_GRID = {
+    "aug_clustering": (0.75, 1.0, 1.25, 1.5, 2.0),
+    "aug_self_clustering": (1.0, 1.5, 2.0, 2.5, 3.0, 4.0),
+    "auto_clustering": (0.5, 0.75, 1.0, 1.25, 1.5, 2.0),
+}
+
+# Columns compared with agent-based runs by calibrate() and validate()
+VALIDATION_COLUMNS = ["Human", "Augmented", "Automated", "Displaced", "UBI Recipients", "Alive",
+                      "Wealth_Capital", "UBI (Opt-Out)", "UBI (Worker Div)"]
+
+_BINOMIAL = {n: np.array([comb(n, j) for j in range(n + 1)], dtype=np.float64)
+             for n in (SQUARE_CELLS, ADJACENT_CELLS)}
+
+def binomial_tail(n, q, k):
+    """
+    P(X >= k) for X ~ Binomial(n, q), elementwise
+
+    Args:
+        n: Number of neighbor cells (SQUARE_CELLS or ADJACENT_CELLS)
+        q: Array of per-cell probabilities (clipped to [0, 1])
+        k: Array of thresholds
+
+    Returns:
+        Array of tail probabilities
+    """
+    q = np.clip(np.asarray(q, dtype=np.float64), 0.0, 1.0)[..., None]
+    j = np.arange(n + 1)
+    pmf = _BINOMIAL[n] * q ** j * (1.0 - q) ** (n - j)
+    return np.where(j >= np.asarray(k)[..., None], pmf, 0.0).sum(axis=-1)
+
+def model_defaults():
+    """EvolutionaryModel's parameters and their defaults"""
+    signature = inspect.signature(EvolutionaryModel.__init__)
+    return {name: p.default for name, p in signature.parameters.items() if name != "self"}
+
+def _normal_cdf(z):
+    # Abramowitz & Stegun 7.1.26 (absolute error below 1e-7), without SciPy
+    x = np.abs(np.nan_to_num(z, posinf=40.0, neginf=-40.0)) / np.sqrt(2)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    half_tail = 0.5 * poly * np.exp(-x * x)
+    return np.where(z < 0, half_tail, 1.0 - half_tail)
+
+def _per_capita(total, count):
+    return np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+
+# ==========================================
+# DIFFERENCE EQUATIONS
+# ==========================================
+
+class MeanFieldBatch:
+    """
+    The mean-field dynamics of many parameter sets, advanced together
+
+    State per parameter set: the expected population, total wealth and
+    total squared wealth of each of the five states, the robots' total
+    revenue, and the payouts of the next step. Each step follows WorkerAgent.step:
+
+      1. Economics: transfers in and cost of living out for every non-robot
+         class; robots earn their revenue minus the robot tax, which funds
+         next step's payouts (as in EvolutionaryModel._update_payouts).
+      2. UBI recipients whose savings ran out leave.
+      3. Displaced workers are rehired at hiring_chance, into augmented work
+         at upskill_chance.
+      4. Robots with at least combination_threshold robot neighbors absorb
+         one (a pair merges once, so a fraction P/(1+P) of robots is absorbed).
+      5. Humans and augmented workers earn their wage and leave if broke,
+         then react to their radius-2 neighborhood: displacement by augmented
+         neighbors, adoption, automation (a new robot plus a displaced
+         creator) and displacement by robots, whose revenue gains the
+         displaced wage.
+
+    Neighbor counts are Binomial(24 or 8, density) with the density of the
+    neighbor's state scaled by its clustering factor. Wealth inside a class
+    is summarized by its mean and variance (see _remove_broke), and robots
+    share one pool of revenue.
+
+    Args:
+        param_sets: List of parameter dictionaries; missing parameters take
+            EvolutionaryModel's defaults, and the CLOSURE_PARAMS names
+            override the closure factors
+
+    Raises:
+        ValueError: If a parameter set has a name EvolutionaryModel does not take
+    """
+
+    def __init__(self, param_sets):
+        defaults = {**model_defaults(), **CLOSURE_PARAMS}
+        for params in param_sets:
+            unknown = set(params) - set(defaults)
+            if unknown:
+                raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+        self.size = len(param_sets)
+        self.params = param_sets
+        p = {name: np.array([params.get(name, default) for params in param_sets], dtype=np.float64)
+             for name, default in defaults.items()
+             if isinstance(default, (int, float)) and not isinstance(default, bool)}
+        self.p = p
+        self.cells = p["width"] * p["height"]
+
+        # --- SEEDING (same order and caps as EvolutionaryModel) ---
+        capacity = np.minimum(p["N"], self.cells)
+        automated = np.minimum(np.floor(p["seeds_automated"]), capacity)
+        augmented = np.minimum(np.floor(p["seeds_augmented"]), capacity - automated)
+        ubi = np.minimum(np.floor(p["N"] * p["initial_ubi_fraction"]), capacity - automated - augmented)
+        human = capacity - automated - augmented - ubi
+        self.counts = np.zeros((self.size, NUM_STATES))
+        self.counts[:, HUMAN] = human
+        self.counts[:, AUGMENTED] = augmented
+        self.counts[:, AUTOMATED] = automated
+        self.counts[:, UBI_RECIPIENT] = ubi
+        self.wealth = self.counts * p["starting_wealth"][:, None]
+        self.wealth[:, AUTOMATED] = 0.0
+        self.wealth_sq = self.wealth * p["starting_wealth"][:, None]
+        self.revenue = automated * p["wage_augmented"]
+
+        zeros = np.zeros(self.size)
+        self.government_pot = zeros.copy()
+        self.ubi_payout_opt_out = zeros.copy()
+        self.ubi_payout_worker = zeros.copy()
+        self.total_removed = zeros.copy()
+        self.total_merged = zeros.copy()
+        self.total_retrained = zeros.copy()
+        self.removed_this_step = zeros.copy()
+        self.retrained_this_step = zeros.copy()
+        self.displaced_this_step = zeros.copy()
+        self.steps = 0
+
+    # --- WEALTH MOMENTS ---
+    # Each class carries its count, total wealth and total squared wealth.
+    # Transitions take a uniform share of a class (all three scale alike),
+    # so mixing classes of different wealth widens the spread, and a class
+    # loses the members below zero of a normal with its mean and variance.
+
+    def _shift(self, state, amount):
+        """Add a per-capita amount to every member of a class"""
+        self.wealth_sq[:, state] += 2 * amount * self.wealth[:, state] + self.counts[:, state] * amount ** 2
+        self.wealth[:, state] += self.counts[:, state] * amount
+
+    def _take(self, state, count):
+        """Take `count` members of a class at random; returns their (count, wealth, squared wealth)"""
+        share = _per_capita(count, self.counts[:, state])
+        taken = (count, self.wealth[:, state] * share, self.wealth_sq[:, state] * share)
+        self.counts[:, state] -= count
+        self.wealth[:, state] -= taken[1]
+        self.wealth_sq[:, state] -= taken[2]
+        return taken
+
+    def _put(self, state, taken):
+        self.counts[:, state] += taken[0]
+        self.wealth[:, state] += taken[1]
+        self.wealth_sq[:, state] += taken[2]
+
+    def _remove_broke(self, state):
+        """Remove the members of a class with no wealth left; returns how many"""
+        n = self.counts[:, state]
+        mean = _per_capita(self.wealth[:, state], n)
+        sd = np.sqrt(np.maximum(_per_capita(self.wealth_sq[:, state], n) - mean ** 2, 0.0))
+        z = np.divide(-mean, sd, out=np.where(mean <= 0, np.inf, -np.inf), where=sd > 0)
+        tail = _normal_cdf(z)
+        density = np.exp(-0.5 * np.minimum(z, 40.0) ** 2) / np.sqrt(2 * np.pi)
+        removed = n * tail
+        self.counts[:, state] -= removed
+        self.wealth[:, state] -= n * (mean * tail - sd * density)
+        self.wealth_sq[:, state] -= n * ((mean ** 2 + sd ** 2) * tail - mean * sd * density)
+        empty = self.counts[:, state] <= 1e-9
+        self.counts[empty, state] = 0.0
+        self.wealth[empty, state] = 0.0
+        self.wealth_sq[empty, state] = 0.0
+        return removed
+
+    def step(self):
+        p = self.p
+        n = self.counts
+        col = p["cost_of_living"]
+        start_counts = n.copy()
+
+        # Densities every agent sees at the start of the step (its own agent excluded)
+        aug_density = p["aug_clustering"] * n[:, AUGMENTED] / self.cells
+        aug_density_other = p["aug_self_clustering"] * np.maximum(n[:, AUGMENTED] - 1, 0) / self.cells
+        auto_density = p["auto_clustering"] * n[:, AUTOMATED] / self.cells
+        auto_density_other = p["auto_clustering"] * np.maximum(n[:, AUTOMATED] - 1, 0) / self.cells
+
+        # 1. Economics
+        self._shift(UBI_RECIPIENT, self.ubi_payout_opt_out - col)
+        for state in (HUMAN, AUGMENTED, DISPLACED):
+            self._shift(state, self.ubi_payout_worker - col)
+        tax = self.revenue * p["robot_tax_rate"]
+        self._shift(AUTOMATED, _per_capita(self.revenue - tax, n[:, AUTOMATED]))
+        self.government_pot = tax
+
+        # 2. UBI recipients out of savings leave
+        removed = self._remove_broke(UBI_RECIPIENT)
+
+        # 3. Rehiring
+        rehired = self._take(DISPLACED, n[:, DISPLACED] * p["hiring_chance"])
+        upskilled = p["upskill_chance"]
+
+        # 4. Merges: revenue and wealth stay with the absorbing robot
+        merging = binomial_tail(ADJACENT_CELLS, auto_density_other, p["combination_threshold"])
+        merged = n[:, AUTOMATED] * merging / (1.0 + merging)
+        n[:, AUTOMATED] -= merged
+
+        # 5. Workers: wage, leave if broke, then the neighborhood rules
+        self._shift(HUMAN, p["wage_human"])
+        self._shift(AUGMENTED, p["wage_augmented"])
+        removed = removed + self._remove_broke(HUMAN) + self._remove_broke(AUGMENTED)
+        humans = n[:, HUMAN].copy()
+        augmented = n[:, AUGMENTED].copy()
+
+        squeeze = binomial_tail(SQUARE_CELLS, aug_density, p["adopt_human_augmented_thresh"])
+        pressure = binomial_tail(SQUARE_CELLS, auto_density, p["displacement_threshold"])
+        automating = binomial_tail(SQUARE_CELLS, aug_density_other, p["automation_threshold"])
+
+        human_squeezed = humans * squeeze * p["human_displacement_chance"]
+        human_adopted = humans * squeeze * (1.0 - p["human_displacement_chance"]) * p["adopt_human_augmented_prob"]
+        human_pushed = (humans - human_squeezed - human_adopted) * pressure
+        spawned = augmented * automating * p["automation_chance"]
+        augmented_pushed = (augmented - spawned) * pressure
+
+        # --- APPLY THE FLOWS ---
+        human_displaced = self._take(HUMAN, human_squeezed + human_pushed)
+        human_augmented = self._take(HUMAN, human_adopted)
+        augmented_displaced = self._take(AUGMENTED, spawned + augmented_pushed)
+        self._put(DISPLACED, human_displaced)
+        self._put(DISPLACED, augmented_displaced)
+        self._put(AUGMENTED, human_augmented)
+        self._put(HUMAN, [part * (1.0 - upskilled) for part in rehired])
+        self._put(AUGMENTED, [part * upskilled for part in rehired])
+        n[:, AUTOMATED] += spawned
+
+        # A shrinking class with less than half an agent left dies out, so absorbing states are reached
+        extinct = (n < EXTINCTION) & (n < start_counts)
+        n[extinct] = 0.0
+        self.wealth[extinct] = 0.0
+        self.wealth_sq[extinct] = 0.0
+        self.revenue[extinct[:, AUTOMATED]] = 0.0
+
+        # Robots: new ones earn wage_augmented; pushed workers' wages are split among the robots
+        self.revenue += (spawned * p["wage_augmented"] + human_pushed * p["wage_human"]
+                         + augmented_pushed * p["wage_augmented"])
+
+        self.removed_this_step = removed
+        self.retrained_this_step = rehired[0]
+        self.displaced_this_step = human_squeezed + human_pushed + spawned + augmented_pushed
+        self.total_removed += removed
+        self.total_merged += merged
+        self.total_retrained += rehired[0]
+        self._update_payouts()
+        self.steps += 1
+
+    def _update_payouts(self):
+        p = self.p
+        workers = self.counts[:, HUMAN] + self.counts[:, AUGMENTED] + self.counts[:, DISPLACED]
+        self.ubi_payout_opt_out = _per_capita(self.government_pot * p["ubi_class_tax_share"],
+                                              self.counts[:, UBI_RECIPIENT])
+        self.ubi_payout_worker = _per_capita(self.government_pot * (1 - p["ubi_class_tax_share"]), workers)
+
+    def top_wealth(self, k=TOP_K):
+        """Wealth of the k richest agents, taking every agent of a class at its per-capita wealth"""
+        per_capita = _per_capita(self.wealth, self.counts)
+        order = np.argsort(-per_capita, axis=1)
+        counts = np.take_along_axis(self.counts, order, axis=1)
+        taken = np.clip(k - (np.cumsum(counts, axis=1) - counts), 0.0, counts)
+        return (taken * np.take_along_axis(per_capita, order, axis=1)).sum(axis=1)
+
+    def columns(self):
+        """The model reporter columns for the current step, one value per parameter set"""
+        n, W = self.counts, self.wealth
+        return {
+            "Human": n[:, HUMAN].copy(),
+            "Augmented": n[:, AUGMENTED].copy(),
+            "Automated": n[:, AUTOMATED].copy(),
+            "Displaced": n[:, DISPLACED].copy(),
+            "UBI Recipients": n[:, UBI_RECIPIENT].copy(),
+            "Fired (Step)": self.displaced_this_step.copy(),
+            "Hired (Step)": self.retrained_this_step.copy(),
+            "Removed (Step)": self.removed_this_step.copy(),
+            "TotalWealth_Human": W[:, HUMAN].copy(),
+            "TotalWealth_Augmented": W[:, AUGMENTED].copy(),
+            "TotalWealth_Automated": W[:, AUTOMATED].copy(),
+            "TotalWealth_UBI": W[:, UBI_RECIPIENT].copy(),
+            "Total Wealth": W.sum(axis=1),
+            "Wealth_Labor": W[:, HUMAN] + W[:, AUGMENTED],
+            "Wealth_Capital": W[:, AUTOMATED].copy(),
+            "Wealth_State": W[:, UBI_RECIPIENT].copy(),
+            "Alive": n.sum(axis=1),
+            "Total Removed": self.total_removed.copy(),
+            "Merged (Singularity)": self.total_merged.copy(),
+            "Top 10 Wealth": self.top_wealth(TOP_K),
+            "UBI (Opt-Out)": self.ubi_payout_opt_out.copy(),
+            "UBI (Worker Div)": self.ubi_payout_worker.copy(),
+            "Cost of Living": self.p["cost_of_living"].copy(),
+        }
+
+    def run(self, steps, columns=None):
+        """
+        Advance every parameter set `steps` steps
+
+        Args:
+            steps: Number of steps
+            columns: Columns to keep the history of (default: all)
+
+        Returns:
+            Dictionary of column -> array of shape (steps, parameter sets),
+            row i holding step i + 1
+        """
+        history = None
+        for i in range(steps):
+            self.step()
+            values = self.columns()
+            if history is None:
+                names = list(values) if columns is None else list(columns)
+                history = {name: np.empty((steps, self.size)) for name in names}
+            for name in history:
+                history[name][i] = values[name]
+        return history or {}
+
+# ==========================================
+# MODEL
+# ==========================================
+
+# Per-step flows, totals and payouts, read from the batch by MeanFieldModel's reporters
+BATCH_SCALARS = ("removed_this_step", "retrained_this_step", "displaced_this_step", "total_removed",
+                 "total_merged", "total_retrained", "government_pot", "ubi_payout_opt_out", "ubi_payout_worker")
+
+# Arrays holding a batch's state, saved by MeanFieldModel.checkpoint
+STATE_ARRAYS = ("counts", "wealth", "wealth_sq", "revenue") + BATCH_SCALARS
+
+# The agent-based reporters, with the top-10 sum taken from the class per-capita wealth
+MEANFIELD_REPORTERS = {**MODEL_REPORTERS, "Top 10 Wealth": lambda m: m.batch.top_wealth(TOP_K)[0]}
+
+class MeanFieldModel(mesa.Model):
+    """
+    The mean-field dynamics of one parameter set, as a drop-in engine
+
+    Takes EvolutionaryModel's parameters and collects the same model
+    reporter columns (populations are expected values, so they are not
+    whole numbers), so it runs through batch_run.run_single_experiment,
+    sweeps and the job queue as engine="meanfield". Stop conditions apply
+    as usual. A single 500-step run takes about 0.4 s, almost all of it
+    NumPy call overhead on one-element arrays; screen() runs thousands of
+    parameter sets as one batch at about a millisecond each.
+
+    Checkpoints, restore() overrides and the result cache work as for the
+    other engines. Not supported: wealth_stats adds no columns (the mean
+    field keeps no wealth distribution beyond each class's mean and
+    variance), and an event log raises ValueError. seed, rng_mode, compact_agents and the
+    logging switches are accepted and have no effect, since the equations
+    are deterministic.
+
+    Args:
+        aug_clustering, aug_self_clustering, auto_clustering: Closure
+            factors (see CLOSURE_PARAMS)
+    """
+
+    def __init__(self, N=350, width=30, height=30,
+                 starting_wealth=50, cost_of_living=1.0,
+                 wage_human=1.0, wage_augmented=2.5,
+                 seeds_human=300, seeds_augmented=20, seeds_automated=20,
+                 initial_ubi_fraction=0.0,
+                 ubi_class_tax_share=0.5,
+                 adopt_human_augmented_thresh=3, adopt_human_augmented_prob=0.3,
+                 human_displacement_chance=0.1,
+                 automation_threshold=4, automation_chance=0.1,
+                 displacement_threshold=2, combination_threshold=2,
+                 hiring_chance=0.30, upskill_chance=0.3,
+                 robot_tax_rate=0.0,
+                 enable_logging=False, seed=None,
+                 debug_aggregates=False, collect_every=1, profile_memory=False,
+                 wealth_stats=False, wealth_accuracy=WEALTH_ACCURACY,
+                 stop_absorbing=False, stop_stationary_window=0, stop_stationary_tolerance=0,
+                 stop_flow_window=0, stop_flow_tolerance=FLOW_TOLERANCE,
+                 rng_mode=SHARED, compact_agents=False, event_log=None,
+                 aug_clustering=AUG_CLUSTERING, aug_self_clustering=AUG_SELF_CLUSTERING,
+                 auto_clustering=AUTO_CLUSTERING):
+
+        super().__init__(seed=seed)
+        if event_log is not None:
+            raise ValueError("The mean-field engine has no agents, so it cannot write an event log")
+        params = {
+            "N": N, "width": width, "height": height,
+            "starting_wealth": starting_wealth, "cost_of_living": cost_of_living,
+            "wage_human": wage_human, "wage_augmented": wage_augmented,
+            "seeds_human": seeds_human, "seeds_augmented": seeds_augmented, "seeds_automated": seeds_automated,
+            "initial_ubi_fraction": initial_ubi_fraction, "ubi_class_tax_share": ubi_class_tax_share,
+            "adopt_human_augmented_thresh": adopt_human_augmented_thresh,
+            "adopt_human_augmented_prob": adopt_human_augmented_prob,
+            "human_displacement_chance": human_displacement_chance,
+            "automation_threshold": automation_threshold, "automation_chance": automation_chance,
+            "displacement_threshold": displacement_threshold, "combination_threshold": combination_threshold,
+            "hiring_chance": hiring_chance, "upskill_chance": upskill_chance,
+            "robot_tax_rate": robot_tax_rate,
+            "aug_clustering": aug_clustering, "aug_self_clustering": aug_self_clustering,
+            "auto_clustering": auto_clustering,
+        }
+        # Parameters are model attributes too, so checkpoints save them and restore() can override them
+        for name, value in params.items():
+            setattr(self, name, value)
+        self.initial_N = N
+        self.collect_wealth_stats = False
+        self.batch = MeanFieldBatch([params])
+
+        self.datacollector = ColumnarDataCollector(MEANFIELD_REPORTERS, collect_every=collect_every)
+
+        # --- STOP CONDITIONS ---
+        self.stop_absorbing = stop_absorbing
+        self.stop_stationary_window = stop_stationary_window
+        self.stop_stationary_tolerance = stop_stationary_tolerance
+        self.stop_flow_window = stop_flow_window
+        self.stop_flow_tolerance = stop_flow_tolerance
+        self.stopping = StopConditions.from_model(self)
+        self.stop_step = None
+        self.stop_reason = None
+        self.events = None
+
+    # --- STATE, AS READ BY THE REPORTERS ---
+
+    @property
+    def state_counts(self):
+        return self.batch.counts[0].tolist()
+
+    @property
+    def state_wealth(self):
+        return self.batch.wealth[0].tolist()
+
+    @property
+    def agent_count(self):
+        return float(self.batch.counts[0].sum())
+
+    def __getattr__(self, name):
+        # Per-step flows, totals and payouts live in the batch, one value per parameter set
+        if name in BATCH_SCALARS:
+            return float(getattr(self.batch, name)[0])
+        raise AttributeError(name)
+
+    def step(self):
+        self.batch.step()
+        self._advance_time()
+        self.datacollector.collect(self)
+
+        if self.stopping and self.running:
+            self.stopping.update(self)
+
+    # --- CHECKPOINTS ---
+
+    def checkpoint(self, target):
+        """Saves the full simulation state to a file path or binary file object"""
+        state = {name: getattr(self.batch, name) for name in STATE_ARRAYS}
+        write_checkpoint(self, target, state, extra={"batch_steps": self.batch.steps})
+
+    @classmethod
+    def restore(cls, source, event_log=None, **overrides):
+        """
+        Rebuilds a model saved with checkpoint()
+
+        Keyword arguments override saved parameters (e.g. robot_tax_rate=0.5)
+        to branch a policy variant off the saved state.
+
+        Raises:
+            ValueError: If event_log is given (see the class docstring)
+        """
+        if event_log is not None:
+            raise ValueError("The mean-field engine has no agents, so it cannot write an event log")
+        header, state, collector_arrays = read_checkpoint(source, cls.__name__)
+        attributes = header["attributes"]
+        params = {name: attributes[name] for name in inspect.signature(cls.__init__).parameters
+                  if name in attributes and name != "seed" and not name.startswith("stop_")}
+        model = cls(**params, seed=attributes["_seed"], **stop_params({**attributes, **overrides}))
+        apply_checkpoint(model, header, collector_arrays, overrides)
+        model.batch = MeanFieldBatch([{name: getattr(model, name) for name in model.batch.params[0]}])
+        for name in STATE_ARRAYS:
+            setattr(model.batch, name, state[name])
+        model.batch.steps = header["batch_steps"]
+        return model
+
+# ==========================================
+# SCREENING
+# ==========================================
+
+def screen(param_sets, steps=500, base_params=None, columns=None):
+    """
+    End-of-run mean-field metrics of many parameter sets, run as one batch
+
+    Args:
+        param_sets: List of parameter dictionaries
+        steps: Number of steps
+        base_params: Fixed parameters shared by every set
+        columns: Reporter columns to return (default: all)
+
+    Returns:
+        DataFrame with one row per parameter set: its param_* columns and the
+        columns' values after the last step
+    """
+    base_params = dict(base_params or {})
+    batch = MeanFieldBatch([{**base_params, **params} for params in param_sets])
+    for _ in range(steps):
+        batch.step()
+    values = batch.columns()
+    frame = pd.DataFrame({f"param_{name}": [params.get(name) for params in param_sets]
+                          for name in dict.fromkeys(k for params in param_sets for k in params)})
+    for name in columns or values:
+        frame[name] = values[name]
+    return frame
+
+def prefilter(param_sets, score, keep=0.1, steps=500, base_params=None, ascending=False):
+    """
+    The parameter sets worth a full simulation, by their mean-field score
+
+    Args:
+        param_sets: Candidate parameter dictionaries
+        score: Column to rank by, or a callable(DataFrame of screen()) -> Series
+        keep: Number of sets to keep, or the fraction of them when below 1
+        steps: Number of mean-field steps
+        base_params: Fixed parameters shared by every set
+        ascending: Keep the lowest scores instead of the highest
+
+    Returns:
+        Tuple of (kept parameter sets, best first; the screen() frame with a score column)
+    """
+    frame = screen(param_sets, steps, base_params)
+    frame["score"] = frame[score] if isinstance(score, str) else score(frame)
+    count = int(round(keep * len(param_sets))) if keep < 1 else int(keep)
+    order = frame["score"].sort_values(ascending=ascending, kind="stable").index[:max(count, 1)]
+    return [param_sets[i] for i in order], frame
+
+# ==========================================
+# CALIBRATION AND VALIDATION
+# ==========================================
+
+# Scenarios the clustering factors are fitted on, and held-out ones they are checked on
+CALIBRATION_SCENARIOS = {
+    "default": {},
+    "ubi_viability": {"robot_tax_rate": 0.5, "initial_ubi_fraction": 0.2, "seeds_automated": 50},
+    "fast_automation": {"automation_chance": 0.3, "automation_threshold": 3, "seeds_augmented": 40},
+    "slow_hiring": {"hiring_chance": 0.1, "robot_tax_rate": 0.3},
+}
+VALIDATION_SCENARIOS = {
+    "adoption_cascade": {"adopt_human_augmented_thresh": 2, "adopt_human_augmented_prob": 0.5},
+    "high_pressure": {"displacement_threshold": 1, "seeds_automated": 40, "robot_tax_rate": 0.2},
+    "costly_living": {"cost_of_living": 1.5, "robot_tax_rate": 0.6, "ubi_class_tax_share": 0.3, "initial_ubi_fraction": 0.1},
+    "retraining": {"hiring_chance": 0.6, "upskill_chance": 0.7, "automation_chance": 0.2},
+}
+
+def abm_trajectories(scenarios, steps=300, replicates=4, engine="agent", columns=VALIDATION_COLUMNS,
+                     base_params=None):
+    """
+    Replicate mean and standard deviation of agent-based runs, per scenario
+
+    Runs use seeds 0..replicates-1, like batch_run.compare_engines.
+
+    Returns:
+        Dictionary of scenario -> (mean, std) DataFrames indexed by step
+    """
+    from batch_run import ENGINES
+    base_params = dict(base_params or {})
+    results = {}
+    for name, params in scenarios.items():
+        runs = []
+        for seed in range(replicates):
+            model = ENGINES[engine](**{**base_params, **params, "seed": seed})
+            for _ in range(steps):
+                model.step()
+            runs.append(model.datacollector.get_model_vars_dataframe()[columns].to_numpy(dtype=np.float64))
+        runs = np.stack(runs)
+        index = pd.Index(np.arange(1, steps + 1), name="Step")
+        results[name] = (pd.DataFrame(runs.mean(axis=0), index=index, columns=columns),
+                         pd.DataFrame(runs.std(axis=0, ddof=1) if replicates > 1 else np.zeros(runs.shape[1:]),
+                                      index=index, columns=columns))
+    return results
+
+def _errors(history, column, i, mean, std):
+    """Error measures of one mean-field trajectory against the replicate mean"""
+    predicted = history[column][:, i]
+    actual = mean[column].to_numpy()
+    scale = max(np.abs(actual).mean(), 1.0)
+    return {
+        "abm_end": actual[-1],
+        "meanfield_end": predicted[-1],
+        "end_error": (predicted[-1] - actual[-1]) / max(abs(actual[-1]), 1.0),
+        "nrmse": np.sqrt(np.mean((predicted - actual) ** 2)) / scale,
+        "within_2sd": abs(predicted[-1] - actual[-1]) <= 2 * std[column].iloc[-1],
+    }
+
+def calibrate(trajectories, scenarios, grid=CALIBRATION_GRID, columns=VALIDATION_COLUMNS, base_params=None):
+    """
+    Fit the closure factors to agent-based trajectories
+
+    Every combination of the grid is run for every scenario in one
+    mean-field batch; the one with the lowest mean NRMSE (root mean square
+    error over all steps, divided by the column's mean magnitude) across
+    scenarios and columns wins.
+
+    Args:
+        trajectories: Output of abm_trajectories for `scenarios`
+        scenarios: Dictionary of scenario name -> parameters
+        grid: Dictionary of closure factor -> candidate values
+        columns: Columns the error is averaged over
+        base_params: Fixed parameters shared by every scenario
+
+    Returns:
+        Tuple of (best factors dictionary, DataFrame of the factors and their
+        mean NRMSE, best first)
+    """
+    base_params = dict(base_params or {})
+    steps = len(next(iter(trajectories.values()))[0])
+    names = list(grid)
+    combos = list(itertools.product(*grid.values()))
+    runs = [(combo, name) for combo in combos for name in scenarios]
+    batch = MeanFieldBatch([{**base_params, **scenarios[name], **dict(zip(names, combo))} for combo, name in runs])
+    history = batch.run(steps, columns)
+    scores = {}
+    for i, (combo, name) in enumerate(runs):
+        mean, std = trajectories[name]
+        scores.setdefault(combo, []).extend(_errors(history, c, i, mean, std)["nrmse"] for c in columns)
+    table = pd.DataFrame([{**dict(zip(names, combo)), "nrmse": np.mean(scores[combo])} for combo in combos])
+    table = table.sort_values("nrmse", kind="stable").reset_index(drop=True)
+    return {name: float(table[name].iloc[0]) for name in names}, table
+
+def validate(trajectories, scenarios, factors=None, columns=VALIDATION_COLUMNS, base_params=None):
+    """
+    Error of the mean field against agent-based trajectories
+
+    Args:
+        trajectories: Output of abm_trajectories for `scenarios`
+        scenarios: Dictionary of scenario name -> parameters
+        factors: Closure factors (default: the module's fitted ones)
+        columns: Columns to report
+        base_params: Fixed parameters shared by every scenario
+
+    Returns:
+        DataFrame indexed by (scenario, column) with the agent-based and
+        mean-field end values, the relative end error, the trajectory NRMSE
+        and whether the end value is within two replicate standard deviations
+    """
+    base_params = dict(base_params or {})
+    factors = dict(factors or CLOSURE_PARAMS)
+    steps = len(next(iter(trajectories.values()))[0])
+    names = list(scenarios)
+    batch = MeanFieldBatch([{**base_params, **scenarios[name], **factors} for name in names])
+    history = batch.run(steps, columns)
+    rows = []
+    for i, name in enumerate(names):
+        mean, std = trajectories[name]
+        rows += [{"scenario": name, "column": c, **_errors(history, c, i, mean, std)} for c in columns]
+    return pd.DataFrame(rows).set_index(["scenario", "column"])
+
+def validation_report(steps=300, replicates=4, engine="agent", calibration=CALIBRATION_SCENARIOS,
+                      validation=VALIDATION_SCENARIOS):
+    """
+    Calibrate on one set of scenarios, validate on held-out ones, and print both
+
+    Returns:
+        Tuple of (fitted factors, calibration table, validation DataFrame)
+    """
+    start = time.perf_counter()
+    fit_runs = abm_trajectories(calibration, steps, replicates, engine)
+    check_runs = abm_trajectories(validation, steps, replicates, engine)
+    abm_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    factors, table = calibrate(fit_runs, calibration)
+    report = validate(check_runs, validation, factors)
+    fit_report = validate(fit_runs, calibration, factors)
+    meanfield_time = time.perf_counter() - start
+
+    print(f"\n=== Mean-field calibration: {len(calibration)} scenarios x {replicates} {engine} runs, {steps} steps ===")
+    print(table.head(5).to_string(float_format=lambda v: f"{v:.3f}"))
+    print("Fitted: " + ", ".join(f"{name}={value}" for name, value in factors.items()))
+    for title, frame in (("calibration", fit_report), ("held-out validation", report)):
+        print(f"\n=== Mean-field error, {title} scenarios ===")
+        print(frame.to_string(float_format=lambda v: f"{v:.3f}"))
+        summary = frame.groupby(level="column").agg(nrmse=("nrmse", "mean"), end_error=("end_error", lambda e: e.abs().mean()),
+                                                    within_2sd=("within_2sd", "mean"))
+        print(f"\nMean over scenarios:\n{summary.to_string(float_format=lambda v: f'{v:.3f}')}")
+    print(f"\nAgent-based runs: {abm_time:.1f}s; calibration and validation: {meanfield_time:.2f}s")
+    return factors, table, report
+
+# ==========================================
+# MAIN
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Adoption Simulator mean-field engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("validate", help="calibrate against agent-based runs and report the error")
+    report.add_argument("--steps", type=int, default=300)
+    report.add_argument("--replicates", type=int, default=4)
+    report.add_argument("--engine", default="agent", choices=["agent", "vectorized", "synchronous"])
+
+    screening = commands.add_parser("screen", help="screen a sweep design and list the best points")
+    screening.add_argument("params", help="comma-separated parameters to vary (ranges from PARAM_SPECS)")
+    screening.add_argument("--design", default="sobol", choices=["factorial", "lhs", "sobol"])
+    screening.add_argument("--points", type=int, default=4096, help="design points (lhs and sobol)")
+    screening.add_argument("--levels", type=int, default=5, help="levels per parameter (factorial)")
+    screening.add_argument("--steps", type=int, default=500)
+    screening.add_argument("--score", default="Alive", help="column to rank by")
+    screening.add_argument("--lowest", action="store_true", help="keep the lowest scores")
+    screening.add_argument("--keep", type=float, default=20, help="points to keep (a fraction when below 1)")
+    screening.add_argument("--output", help="write the kept points to this JSON file (for jobqueue.py enqueue)")
+    args = parser.parse_args(argv)
+
+    if args.command == "validate":
+        validation_report(args.steps, args.replicates, args.engine)
+        return 0
+
+    from sweep import build_design, param_space
+    names = [name.strip() for name in args.params.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PARAM_SPECS]
+    if unknown:
+        parser.error(f"no slider range for {unknown}")
+    points = build_design(param_space(names), args.design, args.points, args.levels)
+    start = time.perf_counter()
+    kept, frame = prefilter(points, args.score, args.keep, args.steps, ascending=args.lowest)
+    elapsed = time.perf_counter() - start
+    print(f"Screened {len(points)} points x {args.steps} steps in {elapsed:.2f}s; best {len(kept)} by {args.score}:")
+    print(frame.loc[frame["score"].sort_values(ascending=args.lowest, kind="stable").index[:len(kept)]]
+          .to_string(float_format=lambda v: f"{v:.3f}"))
+    if args.output:
+        import json
+        with open(args.output, "w") as output:
+            json.dump(kept, output, indent=1)
+        print(f"\nKept points saved: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,51 @@
 import mesa
-from agent import WorkerAgent
-from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT
+import numpy as np
+from agent import CompactWorkerAgent, WorkerAgent
+from checkpoint import apply_checkpoint, read_checkpoint, write_checkpoint
+from collector import ColumnarDataCollector
+from profiling import PhaseProfiler
+from inequality import WEALTH_ACCURACY, WealthStats, wealth_stat_reporters
+from ranking import TOP_K, TopKIndex
+from stopping import FLOW_TOLERANCE, StopConditions, stop_params
+from spatial import IndexedMultiGrid, sample_cells
+from streams import SHARED, CounterActivation, make_streams
+from events import open_event_log
+from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT, NUM_STATES
+
+# Model reporters read the running per-state aggregates, so every one is O(1)
+# (the top-earner sum is O(k) off the engine's top-k query). Shared by every
+# engine that keeps `state_counts`, `state_wealth`, `agent_count` and `top_earners`.
+MODEL_REPORTERS = {
+    "Human": lambda m: m.state_counts[HUMAN],
+    "Augmented": lambda m: m.state_counts[AUGMENTED],
+    "Automated": lambda m: m.state_counts[AUTOMATED],
+    "Displaced": lambda m: m.state_counts[DISPLACED],
+    "UBI Recipients": lambda m: m.state_counts[UBI_RECIPIENT],
+
+    "Fired (Step)": lambda m: m.displaced_this_step,
+    "Hired (Step)": lambda m: m.retrained_this_step,
+    "Removed (Step)": lambda m: m.removed_this_step,
+
+    "TotalWealth_Human": lambda m: m.state_wealth[HUMAN],
+    "TotalWealth_Augmented": lambda m: m.state_wealth[AUGMENTED],
+    "TotalWealth_Automated": lambda m: m.state_wealth[AUTOMATED], 
+    "TotalWealth_UBI": lambda m: m.state_wealth[UBI_RECIPIENT],
+    "Total Wealth": lambda m: sum(m.state_wealth),
+
+    "Wealth_Labor": lambda m: m.state_wealth[HUMAN] + m.state_wealth[AUGMENTED],
+    "Wealth_Capital": lambda m: m.state_wealth[AUTOMATED],
+    "Wealth_State": lambda m: m.state_wealth[UBI_RECIPIENT],
+
+    "Alive": lambda m: m.agent_count,
+    "Total Removed": lambda m: m.total_removed,
+    "Merged (Singularity)": lambda m: m.total_merged,
+    "Top 10 Wealth": lambda m: sum(wealth for _, wealth in m.top_earners(TOP_K)),
+    
+    # UPDATED METRICS
+    "UBI (Opt-Out)": lambda m: m.ubi_payout_opt_out,
+    "UBI (Worker Div)": lambda m: m.ubi_payout_worker,
+    "Cost of Living": lambda m: m.cost_of_living 
+}
 
 class EvolutionaryModel(mesa.Model):
     def __init__(self, N=350, width=30, height=30, 
@@ -18,11 +63,22 @@ class EvolutionaryModel(mesa.Model):
                  displacement_threshold=2, combination_threshold=2,  
                  hiring_chance=0.30, upskill_chance=0.3,
                  robot_tax_rate=0.0,
-                 enable_logging=False, seed=None): 
+                 enable_logging=False, seed=None,
+                 debug_aggregates=False, collect_every=1, profile_memory=False,
+                 wealth_stats=False, wealth_accuracy=WEALTH_ACCURACY,
+                 stop_absorbing=False, stop_stationary_window=0, stop_stationary_tolerance=0,
+                 stop_flow_window=0, stop_flow_tolerance=FLOW_TOLERANCE,
+                 rng_mode=SHARED, compact_agents=False, event_log=None): 
                  
         super().__init__(seed=seed)
-        self.grid = mesa.space.MultiGrid(width, height, True)
-        self.schedule = mesa.time.RandomActivation(self)
+        # compact_agents=True also keeps the grid from caching a neighborhood per cell
+        self.grid = IndexedMultiGrid(width, height, True, cache_neighborhoods=not compact_agents)
+
+        # rng_mode="counter" keys every draw on (seed, unique_id, step, slot) and
+        # orders activation by those draws; "shared" uses model.random throughout
+        self.rng_mode = rng_mode
+        self.streams = make_streams(rng_mode, self._seed)
+        self.schedule = CounterActivation(self) if self.streams else mesa.time.RandomActivation(self)
         
         # --- ID MANAGEMENT (NEW) ---
         # Initialize counter at N so new agents get unique IDs starting from N
@@ -67,41 +123,67 @@ class EvolutionaryModel(mesa.Model):
         self.retrained_this_step = 0 
         self.displaced_this_step = 0 
 
-        self.datacollector = mesa.DataCollector(
-            model_reporters={
-                "Human": lambda m: self.count_state(m, HUMAN),
-                "Augmented": lambda m: self.count_state(m, AUGMENTED),
-                "Automated": lambda m: self.count_state(m, AUTOMATED),
-                "Displaced": lambda m: self.count_state(m, DISPLACED),
-                "UBI Recipients": lambda m: self.count_state(m, UBI_RECIPIENT),
-                
-                "Fired (Step)": lambda m: m.displaced_this_step,
-                "Hired (Step)": lambda m: m.retrained_this_step,
-                "Removed (Step)": lambda m: m.removed_this_step,
-                
-                "TotalWealth_Human": lambda m: self.sum_wealth(m, HUMAN),
-                "TotalWealth_Augmented": lambda m: self.sum_wealth(m, AUGMENTED),
-                "TotalWealth_Automated": lambda m: self.sum_wealth(m, AUTOMATED), 
-                "TotalWealth_UBI": lambda m: self.sum_wealth(m, UBI_RECIPIENT),
-                "Total Wealth": lambda m: sum([a.wealth for a in m.schedule.agents]),
-                
-                "Wealth_Labor": lambda m: self.sum_wealth(m, HUMAN) + self.sum_wealth(m, AUGMENTED),
-                "Wealth_Capital": lambda m: self.sum_wealth(m, AUTOMATED),
-                "Wealth_State": lambda m: self.sum_wealth(m, UBI_RECIPIENT),
+        # --- RUNNING AGGREGATES ---
+        # Per-state population and wealth, updated by WorkerAgent on every change.
+        # With debug_aggregates=True each step cross-checks them against a full scan.
+        self.state_counts = [0] * NUM_STATES
+        self.state_wealth = [0.0] * NUM_STATES
+        self.debug_aggregates = debug_aggregates
 
-                "Alive": lambda m: m.schedule.get_agent_count(),
-                "Total Removed": lambda m: m.total_removed,
-                "Merged (Singularity)": lambda m: m.total_merged,
-                
-                # UPDATED METRICS
-                "UBI (Opt-Out)": lambda m: m.ubi_payout_opt_out,
-                "UBI (Worker Div)": lambda m: m.ubi_payout_worker,
-                "Cost of Living": lambda m: m.cost_of_living 
-            }
-        )
+        # Candidates for the richest agents of each state (leaderboard, top-earner reporter)
+        self.top_wealth = TopKIndex(self)
+
+        # --- INSTRUMENTATION ---
+        # enable_logging swaps in timed agent and method wrappers; without it nothing is wrapped
+        self.profiler = None
+        # compact_agents=True uses slotted agents without a per-instance __dict__
+        self.compact_agents = compact_agents
+        self.agent_class = CompactWorkerAgent if compact_agents else WorkerAgent
+        reporters = MODEL_REPORTERS
+        if enable_logging:
+            self.profiler = PhaseProfiler(trace_memory=profile_memory)
+            self.agent_class = self.profiler.subclass(self.agent_class, {
+                "step": "agent_step", "settle_economics": "economics", "move": "movement", "merge": "merges",
+            })
+            self.profiler.instrument(self, {"on_state_change": "transitions", "remove_agent": "removals"}, per_state=True)
+            self.profiler.instrument(self, {"_update_payouts": "payouts"})
+            self.profiler.instrument(self.grid, {"count_around": "neighbor_queries", "get_neighbors": "neighbor_queries"})
+            self.profiler.instrument_step(self)
+            reporters = {**MODEL_REPORTERS, **self.profiler.reporters()}
+
+        # Opt-in Gini / percentile / max wealth columns per state, one vectorized pass per collected step
+        self.collect_wealth_stats = wealth_stats
+        self.wealth_accuracy = wealth_accuracy
+        self.wealth_stats = WealthStats(wealth_accuracy) if wealth_stats else None
+        if wealth_stats:
+            reporters = {**reporters, **wealth_stat_reporters()}
 
-        all_coords = [(x, y) for x in range(self.grid.width) for y in range(self.grid.height)]
-        self.random.shuffle(all_coords) 
+        self.datacollector = ColumnarDataCollector(reporters, collect_every=collect_every)
+        if self.profiler:
+            self.profiler.instrument(self.datacollector, {"collect": "data_collection"})
+
+        # --- STOP CONDITIONS ---
+        # Checked after every step; the first that holds sets running=False
+        self.stop_absorbing = stop_absorbing
+        self.stop_stationary_window = stop_stationary_window
+        self.stop_stationary_tolerance = stop_stationary_tolerance
+        self.stop_flow_window = stop_flow_window
+        self.stop_flow_tolerance = stop_flow_tolerance
+        self.stopping = StopConditions.from_model(self)
+        self.stop_step = None
+        self.stop_reason = None
+
+        # --- EVENT LOG ---
+        # Optional binary log of every transition (a path or an events.EventLog)
+        self.events = open_event_log(event_log)
+
+        # Random distinct cells without materializing every coordinate (O(N) memory)
+        n_cells = self.grid.width * self.grid.height
+        if self.streams:
+            free_cells = self.streams.sample_cells(n_cells, min(N, n_cells)).tolist()
+        else:
+            free_cells = sample_cells(self.random, n_cells, min(N, n_cells))
+        free_cells.reverse()
 
         current_agent_count = 0
         
@@ -109,17 +191,16 @@ class EvolutionaryModel(mesa.Model):
             nonlocal current_agent_count
             for _ in range(int(count)):
                 if current_agent_count >= N: return
-                if not all_coords: return
-                a = WorkerAgent(current_agent_count, self)
+                if not free_cells: return
+                a = self.agent_class(current_agent_count, self)
                 a.state = state_type
                 
                 if state_type == AUTOMATED:
                     a.revenue = self.wage_augmented
                     a.wealth = 0 
 
-                x, y = all_coords.pop()
-                self.schedule.add(a)
-                self.grid.place_agent(a, (x, y))
+                x, y = divmod(free_cells.pop(), self.grid.height)
+                self.add_agent(a, (x, y))
                 current_agent_count += 1
 
         place_chunk(AUTOMATED, self.seeds_automated)
@@ -137,6 +218,99 @@ class EvolutionaryModel(mesa.Model):
         self.current_id_counter += 1
         return _id
 
+    @property
+    def agent_count(self):
+        return self.schedule.get_agent_count()
+
+    def top_earners(self, k=TOP_K, state=None):
+        """
+        The k wealthiest agents, richest first
+
+        Args:
+            k: Number of agents
+            state: Rank only agents in this state (default: all agents)
+
+        Returns:
+            List of (unique_id, wealth) tuples
+        """
+        states = range(NUM_STATES) if state is None else [state]
+        ranked = [a for s in states for a in self.top_wealth.top(s, k)]
+        if state is None:
+            ranked = sorted(ranked, key=lambda a: a.wealth, reverse=True)[:k]
+        return [(a.unique_id, a.wealth) for a in ranked]
+
+    def wealth_arrays(self):
+        """Every agent's state and wealth as NumPy arrays, for the wealth statistics"""
+        agents = self.schedule.agents
+        states = np.fromiter((a.state for a in agents), dtype=np.int8, count=len(agents))
+        wealth = np.fromiter((a.wealth for a in agents), dtype=np.float64, count=len(agents))
+        return states, wealth
+
+    # --- AGENT LIFECYCLE ---
+
+    def add_agent(self, agent, pos):
+        """Places an agent on the grid, schedules it and starts tracking it in the aggregates"""
+        self.schedule.add(agent)
+        self.grid.place_agent(agent, pos)
+        self.state_counts[agent.state] += 1
+        self.state_wealth[agent.state] += agent.wealth
+        self.top_wealth.enter(agent, agent.state)
+        agent.tracked = True
+
+    def remove_agent(self, agent):
+        """Takes an agent off the grid and schedule and out of the aggregates"""
+        self.grid.remove_agent(agent)
+        self.schedule.remove(agent)
+        agent.tracked = False
+        self._leave_state(agent.state, agent.wealth)
+        self.top_wealth.leave(agent, agent.state)
+
+    def on_state_change(self, agent, old_state, new_state):
+        """Moves an agent's count and wealth between per-state aggregates and grid counts"""
+        if agent.pos is not None:
+            self.grid.update_state(agent.pos, old_state, new_state)
+        self._leave_state(old_state, agent.wealth)
+        self.state_counts[new_state] += 1
+        self.state_wealth[new_state] += agent.wealth
+        self.top_wealth.leave(agent, old_state)
+        self.top_wealth.enter(agent, new_state)
+
+    def _leave_state(self, state, wealth):
+        self.state_counts[state] -= 1
+        if self.state_counts[state] == 0:
+            # Drop accumulated rounding error once a state is empty
+            self.state_wealth[state] = 0.0
+        else:
+            self.state_wealth[state] -= wealth
+
+    def check_aggregates(self):
+        """Cross-checks the running aggregates and grid counts against a full scan of the schedule"""
+        for state in range(NUM_STATES):
+            count = self.count_state(self, state)
+            wealth = self.sum_wealth(self, state)
+            if self.state_counts[state] != count:
+                raise AssertionError(
+                    f"Step {self.schedule.steps}: state {state} count is {self.state_counts[state]}, scan found {count}"
+                )
+            if abs(self.state_wealth[state] - wealth) > 1e-6 * max(1.0, abs(wealth)):
+                raise AssertionError(
+                    f"Step {self.schedule.steps}: state {state} wealth is {self.state_wealth[state]}, scan found {wealth}"
+                )
+
+        # Per-cell occupancy counts kept by the grid
+        scanned = np.zeros_like(self.grid.counts)
+        for a in self.schedule.agents:
+            scanned[a.state][a.pos] += 1
+        if not np.array_equal(scanned, self.grid.counts):
+            raise AssertionError(f"Step {self.schedule.steps}: grid occupancy counts differ from a scan")
+
+        # Top-k index: same wealth values as sorting a scan
+        for state in range(NUM_STATES):
+            indexed = [a.wealth for a in self.top_wealth.top(state)]
+            scanned = sorted((a.wealth for a in self.schedule.agents if a.state == state), reverse=True)
+            if indexed != scanned[:TOP_K]:
+                raise AssertionError(f"Step {self.schedule.steps}: top-{TOP_K} index for state {state} differs from a scan")
+
     @staticmethod
     def count_state(model, state):
         return len([a for a in model.schedule.agents if a.state == state])
@@ -146,19 +320,86 @@ class EvolutionaryModel(mesa.Model):
         agents = [a for a in model.schedule.agents if a.state == state]
         return sum([a.wealth for a in agents])
 
-    def step(self):
-        self.removed_this_step = 0 
-        self.retrained_this_step = 0 
-        self.displaced_this_step = 0 
-        self.government_pot = 0
-        self.schedule.step()
-        
-        # --- UPDATED PAYMENT CALCULATOR ---
-        ubi_agents = [a for a in self.schedule.agents if a.state == UBI_RECIPIENT]
-        worker_agents = [a for a in self.schedule.agents if a.state in [HUMAN, AUGMENTED, DISPLACED]]
-        
-        count_ubi = len(ubi_agents)
-        count_workers = len(worker_agents)
+    # --- CHECKPOINTS ---
+
+    def checkpoint(self, target):
+        """
+        Saves the full simulation state to a file path or binary file object
+
+        Agents are stored in schedule order together with their slot in their
+        grid cell, so a restored model replays exactly like the original.
+        """
+        agents = self.schedule.agents
+        cell_slot = {}
+        for contents, _ in self.grid.coord_iter():
+            for slot, agent in enumerate(contents):
+                cell_slot[agent.unique_id] = slot
+
+        agent_arrays = {
+            "unique_id": np.array([a.unique_id for a in agents], dtype=np.int64),
+            "state": np.array([a.state for a in agents], dtype=np.int8),
+            "wealth": np.array([a.wealth for a in agents], dtype=np.float64),
+            "revenue": np.array([a.revenue for a in agents], dtype=np.float64),
+            "displaced_by": np.array([a.displaced_by for a in agents], dtype=np.int8),
+            "x": np.array([a.pos[0] for a in agents], dtype=np.int32),
+            "y": np.array([a.pos[1] for a in agents], dtype=np.int32),
+            "slot": np.array([cell_slot[a.unique_id] for a in agents], dtype=np.int32),
+        }
+        write_checkpoint(self, target, agent_arrays, extra={
+            "width": self.grid.width,
+            "height": self.grid.height,
+            "schedule": [self.schedule.steps, self.schedule.time],
+        })
+
+    @classmethod
+    def restore(cls, source, event_log=None, **overrides):
+        """
+        Rebuilds a model saved with checkpoint()
+
+        Keyword arguments override saved attributes (e.g. robot_tax_rate=0.5) to
+        branch a policy variant off the saved state; seed=... also re-seeds the RNG.
+        An event_log path continues that log from the checkpoint's step.
+        """
+        header, agent_arrays, collector_arrays = read_checkpoint(source, cls.__name__)
+        attributes = header["attributes"]
+        model = cls(N=0, width=header["width"], height=header["height"], seed=attributes["_seed"],
+                    wealth_stats=attributes.get("collect_wealth_stats", False),
+                    wealth_accuracy=attributes.get("wealth_accuracy", WEALTH_ACCURACY),
+                    rng_mode=attributes.get("rng_mode", SHARED),
+                    compact_agents=attributes.get("compact_agents", False),
+                    **stop_params({**attributes, **overrides}))
+        apply_checkpoint(model, header, collector_arrays, overrides)
+        model.streams = make_streams(model.rng_mode, model._seed)
+        model.schedule.steps, model.schedule.time = header["schedule"]
+
+        agents = []
+        for uid, state, wealth, revenue, displaced_by in zip(
+                agent_arrays["unique_id"].tolist(), agent_arrays["state"].tolist(),
+                agent_arrays["wealth"].tolist(), agent_arrays["revenue"].tolist(),
+                agent_arrays["displaced_by"].tolist()):
+            a = model.agent_class(uid, model)
+            a._state = state
+            a._wealth = wealth
+            a.revenue = revenue
+            a.displaced_by = displaced_by
+            a.tracked = True
+            agents.append(a)
+
+        # Refill every cell in its saved order, then rebuild the schedule order
+        x, y = agent_arrays["x"], agent_arrays["y"]
+        for i in np.lexsort((agent_arrays["slot"], y, x)).tolist():
+            model.grid.place_agent(agents[i], (int(x[i]), int(y[i])))
+        for a in agents:
+            model.schedule.add(a)
+        model.top_wealth.invalidate()
+        model.events = open_event_log(event_log, resume_step=model._steps)
+        return model
+
+    def _update_payouts(self):
+        """Splits this step's robot-tax pot into the per-head payouts made next step"""
+        count_ubi = self.state_counts[UBI_RECIPIENT]
+        count_workers = (self.state_counts[HUMAN] + self.state_counts[AUGMENTED]
+                         + self.state_counts[DISPLACED])
         
         # Split the pot based on the slider
         pot_ubi = self.government_pot * self.ubi_class_tax_share
@@ -173,5 +414,22 @@ class EvolutionaryModel(mesa.Model):
             self.ubi_payout_worker = pot_workers / count_workers
         else:
             self.ubi_payout_worker = 0
-            
-        self.datacollector.collect(self)
\ No newline at end of file
+
+    def step(self):
+        self.removed_this_step = 0 
+        self.retrained_this_step = 0 
+        self.displaced_this_step = 0 
+        self.government_pot = 0
+        self.schedule.step()
+        if self.events is not None:
+            self.events.end_step(self._steps)
+        
+        if self.debug_aggregates:
+            self.check_aggregates()
+        
+        self._update_payouts()
+
+        self.datacollector.collect(self)
+
+        if self.stopping and self.running:
+            self.stopping.update(self)
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Per-phase profiling for AI Adoption Simulator
+Opt-in timers around the phases of a step (enable_logging=True on a model),
+with optional tracemalloc memory tracking. A model built without profiling
+has nothing wrapped, so it pays no cost.
+"""
+
+from collections import defaultdict
+import time
+import tracemalloc
+from constants import STATE_MAP
+
+# Phases reported for every engine, in report order
+PHASES = (
+    "step", "agent_step", "economics", "movement", "neighbor_queries",
+    "transitions", "merges", "removals", "payouts", "data_collection",
+)
+
+SNAPSHOT_EVERY = 100
+SNAPSHOT_TOP = 10
+
+class PhaseProfiler:
+    """
+    Cumulative wall time and call counts per phase, and per agent state
+
+    Times are inclusive: a phase that calls another (an agent's step calling
+    move, say) counts the inner phase's time too.
+
+    Args:
+        trace_memory: Track allocations with tracemalloc (slows the run noticeably)
+        snapshot_every: With trace_memory, keep the top allocation sites every this many steps
+        top: Number of allocation sites kept per snapshot
+    """
+
+    def __init__(self, trace_memory=False, snapshot_every=SNAPSHOT_EVERY, top=SNAPSHOT_TOP):
+        self.time = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.state_time = defaultdict(float)
+        self.state_calls = defaultdict(int)
+        self.trace_memory = trace_memory
+        self.snapshot_every = snapshot_every
+        self.top = top
+        self.snapshots = []
+        self.steps = 0
+        # Only a profiler that started tracemalloc stops it again (see stop())
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        self.final_memory = None
+        if self.started_tracing:
+            tracemalloc.start()
+
+    # --- INSTRUMENTATION ---
+
+    def timed(self, func, phase, per_state=False):
+        """
+        Wrap func so every call is timed under `phase`
+
+        With per_state, the first argument must be an agent and the call is also
+        recorded under the agent's state at entry.
+        """
+        time_, calls = self.time, self.calls
+        if not per_state:
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    time_[phase] += time.perf_counter() - start
+                    calls[phase] += 1
+            return wrapper
+
+        state_time, state_calls = self.state_time, self.state_calls
+        def wrapper(agent, *args, **kwargs):
+            key = (phase, agent.state)
+            start = time.perf_counter()
+            try:
+                return func(agent, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                time_[phase] += elapsed
+                calls[phase] += 1
+                state_time[key] += elapsed
+                state_calls[key] += 1
+        return wrapper
+
+    def instrument(self, obj, methods, per_state=False):
+        """Replace obj's bound methods {name: phase} with timed ones on this instance only"""
+        for name, phase in methods.items():
+            setattr(obj, name, self.timed(getattr(obj, name), phase, per_state))
+
+    def subclass(self, cls, methods):
+        """A subclass of cls whose methods {name: phase} are timed per agent state"""
+        namespace = {name: self.timed(getattr(cls, name), phase, per_state=True)
+                     for name, phase in methods.items()}
+        # Keeps a slotted class (CompactWorkerAgent) free of a per-instance __dict__
+        namespace["__slots__"] = ()
+        return type(f"Profiled{cls.__name__}", (cls,), namespace)
+
+    def instrument_step(self, model):
+        """Time model.step and take memory snapshots as steps complete"""
+        step = self.timed(model.step, "step")
+        def profiled_step():
+            step()
+            self.steps += 1
+            if self.trace_memory and self.snapshot_every and self.steps % self.snapshot_every == 0:
+                self.take_snapshot()
+        model.step = profiled_step
+
+    # --- MEMORY ---
+
+    def take_snapshot(self):
+        """Record the current top allocation sites (by size) under the current step"""
+        if not tracemalloc.is_tracing():
+            return
+        stats = tracemalloc.take_snapshot().statistics("lineno")[:self.top]
+        self.snapshots.append({
+            "step": self.steps,
+            "top": [(str(stat.traceback), stat.size, stat.count) for stat in stats],
+        })
+
+    def stop(self):
+        """
+        Stop tracemalloc if this profiler started it
+
+        Tracing stays on for the whole process until stopped, so every later
+        model would pay for it. The timers, snapshots and report() (with the
+        traced memory at the time of stopping) stay available.
+        """
+        if self.started_tracing and tracemalloc.is_tracing():
+            self.final_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.started_tracing = False
+
+    # --- OUTPUT ---
+
+    def reporters(self):
+        """Extra DataCollector reporters: cumulative milliseconds per phase (and traced memory)"""
+        reporters = {
+            f"Time: {phase} (ms)": (lambda m, phase=phase: self.time[phase] * 1000)
+            for phase in PHASES if phase != "step"
+        }
+        if self.trace_memory:
+            reporters["Traced Memory (MB)"] = lambda m: tracemalloc.get_traced_memory()[0] / 1e6
+            reporters["Traced Peak (MB)"] = lambda m: tracemalloc.get_traced_memory()[1] / 1e6
+        return reporters
+
+    def report(self):
+        """Text summary: time and calls per phase, then per phase and agent state"""
+        total = self.time["step"] or sum(self.time.values()) or 1.0
+        lines = [f"=== Profile: {self.steps} steps, {self.time['step']:.3f}s in step() ===",
+                 f"  {'phase':20s} {'seconds':>10s} {'share':>7s} {'calls':>10s} {'us/call':>10s}"]
+        for phase in PHASES:
+            if self.calls[phase]:
+                lines.append(f"  {phase:20s} {self.time[phase]:10.3f} {self.time[phase] / total:7.1%} "
+                             f"{self.calls[phase]:10d} {self.time[phase] / self.calls[phase] * 1e6:10.1f}")
+
+        if self.state_calls:
+            lines.append(f"  {'phase / state':32s} {'seconds':>10s} {'calls':>10s} {'us/call':>10s}")
+            for (phase, state), calls in sorted(self.state_calls.items(), key=lambda item: PHASES.index(item[0][0])):
+                seconds = self.state_time[(phase, state)]
+                name = f"{phase} / {STATE_MAP[state]['name']}"
+                lines.append(f"  {name:32s} {seconds:10.3f} {calls:10d} {seconds / calls * 1e6:10.1f}")
+
+        memory = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else self.final_memory
+        if self.trace_memory and memory:
+            current, peak = memory
+            lines.append(f"  traced memory: {current / 1e6:.1f} MB now, {peak / 1e6:.1f} MB peak")
+        for snapshot in self.snapshots[-1:]:
+            lines.append(f"  top allocations at step {snapshot['step']}:")
+            for where, size, count in snapshot["top"]:
+                lines.append(f"    {size / 1024:10.1f} KiB {count:8d} blocks  {where}")
+        return "\n".join(lines)
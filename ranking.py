@@ -0,0 +1,108 @@
+"""
+Top-k wealth index for AI Adoption Simulator
+Keeps, per agent state, a small set of candidates for the k richest agents so
+the leaderboard and the top-earner reporter never sort the whole population
+"""
+
+import heapq
+from constants import NUM_STATES
+
+TOP_K = 10
+
+class TopKIndex:
+    """
+    Candidates for the k wealthiest agents of each state
+
+    For every state the index holds a set of candidate agents and `bound`, an
+    upper bound on the wealth of every agent of that state outside the set.
+    An agent whose wealth rises above the bound joins the candidates. When the
+    set grows past 2k it is cut back to its k richest, and the bound is raised
+    to the richest agent cut. Falling wealth needs no update: the bound stays
+    an upper bound.
+
+    A query sorts the candidates (at most 2k of them). The answer is exact
+    when the k-th best candidate is at or above the bound. Otherwise a
+    candidate has fallen below an outsider, and the state is rebuilt from a
+    scan of the schedule.
+
+    The model forwards every change: wealth_changed() from the agent's wealth
+    setter, enter()/leave() on additions, removals and state changes.
+
+    Args:
+        model: EvolutionaryModel whose agents are indexed
+        k: Number of top agents kept per state
+    """
+
+    def __init__(self, model, k=TOP_K):
+        self.model = model
+        self.k = k
+        self.capacity = 2 * k
+        self.members = [{} for _ in range(NUM_STATES)]
+        self.bound = [float("-inf")] * NUM_STATES
+        self.rebuilds = 0
+
+    # --- UPDATES ---
+
+    def wealth_changed(self, agent, state, wealth):
+        """Called after an agent in `state` changed its wealth to `wealth`"""
+        if wealth > self.bound[state]:
+            self._admit(agent, state)
+
+    def enter(self, agent, state):
+        """An agent joined `state` (added to the model or transitioned into it)"""
+        if agent.wealth > self.bound[state]:
+            self._admit(agent, state)
+
+    def leave(self, agent, state):
+        """An agent left `state` (removed from the model or transitioned out of it)"""
+        self.members[state].pop(agent.unique_id, None)
+
+    def invalidate(self):
+        """Forget everything; each state is rebuilt from a scan on its next query"""
+        self.members = [{} for _ in range(NUM_STATES)]
+        self.bound = [float("inf")] * NUM_STATES
+
+    def _admit(self, agent, state):
+        members = self.members[state]
+        if agent.unique_id in members:
+            return
+        members[agent.unique_id] = agent
+        if len(members) > self.capacity:
+            ranked = sorted(members.values(), key=lambda a: a.wealth, reverse=True)
+            for dropped in ranked[self.k:]:
+                del members[dropped.unique_id]
+            self.bound[state] = max(self.bound[state], ranked[self.k].wealth)
+
+    def _rebuild(self, state):
+        agents = [a for a in self.model.schedule.agents if a.state == state]
+        # Keep a full 2k candidates so several must fall before the next rebuild
+        ranked = heapq.nlargest(self.capacity + 1, agents, key=lambda a: a.wealth)
+        self.members[state] = {a.unique_id: a for a in ranked[:self.capacity]}
+        self.bound[state] = ranked[self.capacity].wealth if len(ranked) > self.capacity else float("-inf")
+        self.rebuilds += 1
+
+    # --- QUERIES ---
+
+    def top(self, state, k=None):
+        """
+        The k wealthiest agents in `state`, richest first
+
+        Args:
+            state: Agent state to rank
+            k: Number of agents (at most the index's k; defaults to it)
+
+        Returns:
+            List of agents
+        """
+        k = self.k if k is None else k
+        if k > self.k:
+            agents = [a for a in self.model.schedule.agents if a.state == state]
+            return heapq.nlargest(k, agents, key=lambda a: a.wealth)
+
+        members = self.members[state]
+        ranked = sorted(members.values(), key=lambda a: a.wealth, reverse=True)
+        complete = len(members) == self.model.state_counts[state]
+        if not complete and (len(ranked) < self.k or ranked[self.k - 1].wealth < self.bound[state]):
+            self._rebuild(state)
+            ranked = sorted(self.members[state].values(), key=lambda a: a.wealth, reverse=True)
+        return ranked[:k]
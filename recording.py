@@ -0,0 +1,479 @@
+"""
+Run recordings for AI Adoption Simulator
+Record a run's agents (position, state, wealth) step by step as keyframes
+plus deltas, next to its collected series, and play the recording back in
+the server without running the model
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+import numpy as np
+import pandas as pd
+from collector import ColumnarDataCollector, ColumnView
+from constants import NUM_STATES, PARAM_SPECS
+from headless import grid_size
+
+FORMAT_VERSION = 1
+
+# A full frame every this many steps; a seek decodes at most this many frames
+KEYFRAME_EVERY = 50
+
+# Wealth is stored in integer cents, so deltas are exact and compress well
+CENTS = 100
+
+# Playback speeds offered by the server, in recorded steps per frame
+SPEEDS = [0.25, 0.5, 1, 2, 5, 10, 25, 50]
+
+# ==========================================
+# FILE FORMAT
+# ==========================================
+# A recording is a zip archive:
+#
+#   meta.json           grid size, parameters, recorded steps, keyframe steps,
+#                       collector layout
+#   series.npz          the collected columns (ColumnarDataCollector.get_state)
+#   frames/<step>       one deflated frame per recorded step
+#
+# Agents are kept sorted by unique_id. A keyframe holds every agent; a delta
+# holds the rows removed since the previous frame (as row numbers), every
+# surviving agent's change of cell and of wealth (agents move every step, and
+# both differences repeat a few values, so they deflate well), the rows that
+# changed state, and the agents added. Each frame is a run of arrays preceded
+# by their lengths.
+
+KEYFRAME_FIELDS = (("uid", np.int64), ("cell", np.int32), ("state", np.int8), ("cents", np.int64))
+DELTA_FIELDS = (
+    ("removed", np.int32),
+    ("cell_diff", np.int32),
+    ("changed", np.int32), ("changed_state", np.int8),
+    ("cents_diff", np.int64),
+    ("added_uid", np.int64), ("added_cell", np.int32), ("added_state", np.int8), ("added_cents", np.int64),
+)
+
+def _pack(fields, arrays):
+    lengths = np.array([len(arrays[name]) for name, _ in fields], dtype=np.int64)
+    return lengths.tobytes() + b"".join(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes()
+                                        for name, dtype in fields)
+
+def _unpack(fields, data):
+    lengths = np.frombuffer(data, dtype=np.int64, count=len(fields))
+    offset = lengths.nbytes
+    arrays = {}
+    for (name, dtype), n in zip(fields, lengths.tolist()):
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=n, offset=offset)
+        offset += n * np.dtype(dtype).itemsize
+    return arrays
+
+def _frame_name(step):
+    return f"frames/{step}"
+
+def agent_snapshot(model):
+    """
+    Every agent's unique_id, cell (x * height + y), state and wealth in cents
+
+    Works with both engines; rows are sorted by unique_id.
+
+    Returns:
+        Tuple of (uid int64, cell int32, state int8, cents int64) arrays
+    """
+    if hasattr(model, "cell"):
+        uid, cell, state, wealth = model.unique_id, model.cell, model.state, model.wealth
+    else:
+        height = grid_size(model)[1]
+        agents = model.schedule.agents
+        n = len(agents)
+        uid = np.fromiter((a.unique_id for a in agents), dtype=np.int64, count=n)
+        cell = np.fromiter((a.pos[0] * height + a.pos[1] for a in agents), dtype=np.int64, count=n)
+        state = np.fromiter((a.state for a in agents), dtype=np.int8, count=n)
+        wealth = np.fromiter((a.wealth for a in agents), dtype=np.float64, count=n)
+    order = np.argsort(uid, kind="stable")
+    return (uid[order].astype(np.int64), cell[order].astype(np.int32), state[order].astype(np.int8),
+            np.rint(wealth[order] * CENTS).astype(np.int64))
+
+# ==========================================
+# RECORDER
+# ==========================================
+
+class Recorder:
+    """
+    Records a model's agents after every step, and its series at the end
+
+    The current state of the model is recorded when the recorder is created
+    (usually step 0); call capture() after each model step and close() at
+    the end, which adds the data collector's series. The archive is only
+    readable once closed.
+
+    Args:
+        path: Recording file to write (usually *.rec)
+        model: Model to record (EvolutionaryModel or a vectorized engine)
+        keyframe_every: Steps between full frames
+        params: Model parameters, kept in the recording for reference
+    """
+
+    def __init__(self, path, model, keyframe_every=KEYFRAME_EVERY, params=None):
+        self.path = path
+        self.model = model
+        self.keyframe_every = keyframe_every
+        self.params = dict(params or {})
+        self.steps = []
+        self.keyframes = []
+        self.bytes_written = 0
+        self._previous = None
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self.capture()
+
+    def capture(self):
+        """Record the model's current step"""
+        step = int(self.model._steps)
+        if self.steps and step <= self.steps[-1]:
+            raise ValueError(f"Step {step} was already recorded (last recorded step {self.steps[-1]})")
+        current = agent_snapshot(self.model)
+        if not self.keyframes or step - self.keyframes[-1] >= self.keyframe_every:
+            data = _pack(KEYFRAME_FIELDS, dict(zip(("uid", "cell", "state", "cents"), current)))
+            self.keyframes.append(step)
+        else:
+            data = _pack(DELTA_FIELDS, self._delta(self._previous, current))
+        info = zipfile.ZipInfo(_frame_name(step), date_time=(1980, 1, 1, 0, 0, 0))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self._zip.writestr(info, data)
+        self.bytes_written += len(data)
+        self.steps.append(step)
+        self._previous = current
+
+    @staticmethod
+    def _delta(previous, current):
+        old_uid, old_cell, old_state, old_cents = previous
+        uid, cell, state, cents = current
+        rows = np.minimum(np.searchsorted(old_uid, uid), max(len(old_uid) - 1, 0))
+        kept = (old_uid[rows] == uid) if len(old_uid) else np.zeros(len(uid), dtype=bool)
+        old_rows = rows[kept]
+        removed = np.ones(len(old_uid), dtype=bool)
+        removed[old_rows] = False
+        changed = np.flatnonzero(state[kept] != old_state[old_rows])
+        added = ~kept
+        return {
+            "removed": np.flatnonzero(removed),
+            "cell_diff": cell[kept] - old_cell[old_rows],
+            "changed": changed, "changed_state": state[kept][changed],
+            "cents_diff": cents[kept] - old_cents[old_rows],
+            "added_uid": uid[added], "added_cell": cell[added], "added_state": state[added],
+            "added_cents": cents[added],
+        }
+
+    def close(self):
+        """Write the collected series and the index, and close the archive"""
+        header, arrays = self.model.datacollector.get_state()
+        series = io.BytesIO()
+        np.savez(series, **arrays)
+        width, height = grid_size(self.model)
+        meta = {
+            "version": FORMAT_VERSION,
+            "engine": type(self.model).__name__,
+            "width": width,
+            "height": height,
+            "keyframe_every": self.keyframe_every,
+            "steps": self.steps,
+            "keyframes": self.keyframes,
+            "params": self.params,
+            "collector": header,
+        }
+        self._zip.writestr("series.npz", series.getvalue())
+        self._zip.writestr("meta.json", json.dumps(meta, default=repr))
+        self._zip.close()
+
+def record_run(params, steps, path, engine="agent", keyframe_every=KEYFRAME_EVERY):
+    """
+    Run a model and record it
+
+    Args:
+        params: Model parameters
+        steps: Number of steps (fewer if a stop_* condition ends the run)
+        path: Recording file to write
+        engine: Key into batch_run.ENGINES
+        keyframe_every: Steps between full frames
+
+    Returns:
+        The finished model
+    """
+    from batch_run import ENGINES
+    model = ENGINES[engine](**params)
+    recorder = Recorder(path, model, keyframe_every, params)
+    for _ in range(steps):
+        if not model.running:
+            break
+        model.step()
+        recorder.capture()
+    recorder.close()
+    return model
+
+# ==========================================
+# READER
+# ==========================================
+
+class Recording:
+    """
+    Random access to a recording written by Recorder
+
+    frame(step) decodes the keyframe at or before the step and the deltas
+    after it, so any step costs at most keyframe_every frame decodes.
+
+    Args:
+        path: Recording file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        meta = json.loads(self._zip.read("meta.json"))
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version {meta['version']}")
+        self.engine = meta["engine"]
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.keyframe_every = meta["keyframe_every"]
+        self.params = meta["params"]
+        self.steps = np.asarray(meta["steps"], dtype=np.int64)
+        self.keyframes = np.asarray(meta["keyframes"], dtype=np.int64)
+        with np.load(io.BytesIO(self._zip.read("series.npz"))) as arrays:
+            self.collector = ColumnarDataCollector({})
+            self.collector.set_state(meta["collector"], dict(arrays))
+
+    @property
+    def first_step(self):
+        return int(self.steps[0])
+
+    @property
+    def last_step(self):
+        return int(self.steps[-1])
+
+    def nearest_step(self, step):
+        """The last recorded step at or before `step` (the first one if it is earlier)"""
+        return int(self.steps[max(np.searchsorted(self.steps, step, side="right") - 1, 0)])
+
+    def _read(self, step):
+        return self._zip.read(_frame_name(step))
+
+    def keyframe(self, step):
+        """The agents at a keyframe step as (uid, cell, state, cents)"""
+        arrays = _unpack(KEYFRAME_FIELDS, self._read(step))
+        return arrays["uid"], arrays["cell"], arrays["state"], arrays["cents"]
+
+    def apply_delta(self, agents, step):
+        """The agents at `step`, given the agents at the recorded step before it"""
+        uid, cell, state, cents = agents
+        delta = _unpack(DELTA_FIELDS, self._read(step))
+        removed = delta["removed"]
+        uid, cell, state, cents = (np.delete(a, removed) for a in (uid, cell, state, cents))
+        cell += delta["cell_diff"]
+        state[delta["changed"]] = delta["changed_state"]
+        cents += delta["cents_diff"]
+        if len(delta["added_uid"]):
+            tail = len(uid)
+            uid = np.concatenate([uid, delta["added_uid"]])
+            cell = np.concatenate([cell, delta["added_cell"]])
+            state = np.concatenate([state, delta["added_state"]])
+            cents = np.concatenate([cents, delta["added_cents"]])
+            if tail and uid[tail] < uid[tail - 1]:
+                order = np.argsort(uid, kind="stable")
+                uid, cell, state, cents = uid[order], cell[order], state[order], cents[order]
+        return uid, cell, state, cents
+
+    def frame(self, step, start=None):
+        """
+        The agents at a recorded step
+
+        Args:
+            step: Recorded step (see nearest_step)
+            start: Optional (step, agents) already decoded at an earlier step
+                of the same keyframe interval, to continue from
+
+        Returns:
+            Tuple of (uid, cell, state, cents) arrays, sorted by uid
+        """
+        keyframe = int(self.keyframes[np.searchsorted(self.keyframes, step, side="right") - 1])
+        if start is not None and keyframe <= start[0] <= step:
+            origin, agents = start
+        else:
+            origin, agents = keyframe, self.keyframe(keyframe)
+        first = np.searchsorted(self.steps, origin, side="right")
+        last = np.searchsorted(self.steps, step, side="right")
+        for delta_step in self.steps[first:last].tolist():
+            agents = self.apply_delta(agents, delta_step)
+        return agents
+
+    def close(self):
+        self._zip.close()
+
+# ==========================================
+# PLAYBACK
+# ==========================================
+
+class PlaybackGrid:
+    """Grid size and per-state occupancy counts, as read by server.DeltaCanvasGrid"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.counts = np.zeros((NUM_STATES, width, height), dtype=np.int32)
+
+    def update(self, cell, state):
+        cells = self.width * self.height
+        flat = np.bincount(state.astype(np.int64) * cells + cell, minlength=NUM_STATES * cells)
+        self.counts = flat.reshape(NUM_STATES, self.width, self.height)
+
+class PlaybackCollector:
+    """
+    The recorded series up to the current playback step
+
+    Exposes what the server charts read from a data collector: steps,
+    model_vars (columns the recording lacks, e.g. wealth statistics of a run
+    recorded without them, read as empty values) and
+    get_model_vars_dataframe().
+    """
+
+    def __init__(self, collector):
+        self._collector = collector
+        self._columns = collector.columns()
+        self._rows = 0
+
+    def seek(self, step):
+        self._rows = int(np.searchsorted(self._collector.steps, step, side="right"))
+
+    @property
+    def steps(self):
+        return self._collector.steps[:self._rows]
+
+    @property
+    def model_vars(self):
+        rows = self._rows
+        return _Columns({name: ColumnView(values[:rows]) for name, values in self._columns.items()}, rows)
+
+    def get_model_vars_dataframe(self):
+        columns = {name: values[:self._rows] for name, values in self._columns.items()}
+        return pd.DataFrame(columns, index=pd.Index(self.steps, name="Step"))
+
+class _Columns(dict):
+    def __init__(self, columns, rows):
+        super().__init__(columns)
+        self._rows = rows
+
+    def __missing__(self, name):
+        return ColumnView(np.full(self._rows, None, dtype=object))
+
+class PlaybackModel:
+    """
+    Stands in for the model in the server, playing back a recording
+
+    Has what the server elements read (grid.counts, datacollector,
+    top_earners, _steps, running). step() advances `speed` recorded steps
+    (fractions accumulate, so 0.25 shows each step four times) and seek()
+    jumps to any step.
+
+    Args:
+        recording: Recording, or the path of a recording file
+    """
+
+    def __init__(self, recording):
+        if not isinstance(recording, Recording):
+            recording = Recording(recording)
+        self.recording = recording
+        self.width = recording.width
+        self.height = recording.height
+        self.grid = PlaybackGrid(recording.width, recording.height)
+        self.datacollector = PlaybackCollector(recording.collector)
+        self.speed = 1
+        self.running = True
+        self._steps = None
+        self._position = recording.first_step
+        self._agents = None
+        self.seek(recording.first_step)
+
+    @property
+    def first_step(self):
+        return self.recording.first_step
+
+    @property
+    def last_step(self):
+        return self.recording.last_step
+
+    @property
+    def agent_count(self):
+        return len(self._agents[0])
+
+    def seek(self, step):
+        """Show the recorded step at or before `step`; returns the step shown"""
+        step = self.recording.nearest_step(min(max(int(step), self.first_step), self.last_step))
+        start = None if self._steps is None else (self._steps, self._agents)
+        self._agents = self.recording.frame(step, start)
+        self._steps = step
+        self._position = step
+        uid, cell, state, cents = self._agents
+        self.grid.update(cell, state)
+        self.datacollector.seek(step)
+        self.running = step < self.last_step
+        return step
+
+    def step(self):
+        position = min(self._position + self.speed, self.last_step)
+        self.seek(int(position))
+        self._position = position
+
+    def top_earners(self, k=10, state=None):
+        """
+        The k wealthiest agents at the current step, richest first
+
+        Returns:
+            List of (unique_id, wealth) tuples
+        """
+        uid, cell, states, cents = self._agents
+        rows = np.arange(len(uid)) if state is None else np.flatnonzero(states == state)
+        if len(rows) > k:
+            rows = rows[np.argpartition(-cents[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-cents[rows], kind="stable")]
+        return list(zip(uid[rows].tolist(), (cents[rows] / CENTS).tolist()))
+
+# ==========================================
+# MAIN
+# ==========================================
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record an AI Adoption Simulator run for playback "
+                                                 "(python ai_sim.py --playback FILE)")
+    parser.add_argument("path", help="recording file to write, e.g. run.rec")
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--width", type=int, default=30)
+    parser.add_argument("--height", type=int, default=30)
+    parser.add_argument("--engine", default="agent", choices=["agent", "vectorized", "synchronous"])
+    parser.add_argument("--keyframe-every", type=int, default=KEYFRAME_EVERY, help="steps between full frames")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="model parameter (repeatable); the others keep the server's defaults")
+    args = parser.parse_args(argv)
+
+    # The server's defaults, with the wealth statistics its charts show
+    params = {name: spec[1] for name, spec in PARAM_SPECS.items()}
+    params.update(seed=args.seed, width=args.width, height=args.height, wealth_stats=True)
+    for item in args.param:
+        name, _, value = item.partition("=")
+        params[name] = _parse_value(value)
+
+    start = time.perf_counter()
+    model = record_run(params, args.steps, args.path, args.engine, args.keyframe_every)
+    elapsed = time.perf_counter() - start
+    print(f"Recorded steps 0-{model._steps} in {elapsed:.1f}s: {args.path} "
+          f"({os.path.getsize(args.path) / 1e6:.2f} MB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+Columnar result storage for AI Adoption Simulator
+Streams each experiment's data to Parquet or Arrow IPC files as it finishes,
+with typed columns, and reads back only the columns and experiments asked for
+"""
+
+import glob
+import json
+import os
+import tempfile
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+from constants import STATE_MAP, NUM_STATES
+
+# File formats: extension of each experiment's files
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Tables written per experiment: model-level rows, and agent-level rows when there are any
+MODEL_TABLE = "model"
+AGENT_TABLE = "agents"
+
+# Manifest of a directory; writers sharing a directory use one manifest each
+# (experiments-<name>.jsonl) and the reader merges every experiments*.jsonl
+MANIFEST = "experiments.jsonl"
+
+# Integer state columns stored as categoricals of the state names
+STATE_COLUMNS = ("state", "State")
+STATE_NAMES = [STATE_MAP[state]["name"] for state in range(NUM_STATES)]
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise ImportError("Parquet / Arrow output needs pyarrow: pip install pyarrow") from exc
+    return pa
+
+def experiment_params(model_data):
+    """Parameters of one experiment, read back from its param_* columns"""
+    if len(model_data) == 0:
+        return {}
+    row = model_data.iloc[0]
+    return {name[len("param_"):]: row[name].item() if isinstance(row[name], np.generic) else row[name]
+            for name in model_data.columns if name.startswith("param_")}
+
+# ==========================================
+# TYPED TABLES
+# ==========================================
+
+def wealth_columns(columns):
+    """Columns holding wealth (float32=True narrows these)"""
+    return [name for name in columns if "wealth" in name.lower()]
+
+def arrow_table(frame, float32=None):
+    """
+    A DataFrame as a pyarrow Table with storage-friendly types
+
+    The index becomes a leading "Step" column. Integer state columns become
+    dictionaries of state names, text columns (e.g. stop_reason) become
+    dictionaries of strings, nullable integers keep their nulls, and the
+    requested float columns are narrowed to float32. Dictionaries always
+    use int32 indices, so tables of different experiments share a schema.
+
+    Args:
+        frame: Model or agent data of one experiment (param_* columns are dropped)
+        float32: Columns to store as float32: a list of names, or True for
+            every wealth column
+
+    Returns:
+        pyarrow.Table
+    """
+    pa = _pyarrow()
+    if float32 is True:
+        float32 = wealth_columns(frame.columns)
+    float32 = set(float32 or ())
+
+    names = ["Step"]
+    arrays = [pa.array(np.asarray(frame.index, dtype=np.int64))]
+    for name in frame.columns:
+        if name.startswith("param_") or name == "experiment_id":
+            continue
+        values = frame[name]
+        if name in STATE_COLUMNS and values.dtype.kind in "iu":
+            array = pa.DictionaryArray.from_arrays(pa.array(values.to_numpy(), pa.int32()), pa.array(STATE_NAMES))
+        elif values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            array = pa.array(values, type=pa.string(), from_pandas=True).dictionary_encode()
+        elif name in float32:
+            array = pa.array(values.to_numpy(dtype=np.float32))
+        else:
+            array = pa.array(values, from_pandas=True)
+        names.append(name)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=names)
+
+# ==========================================
+# WRITER
+# ==========================================
+
+class ResultWriter:
+    """
+    Writes experiments to a directory of Parquet or Arrow IPC files as they finish
+
+    Each experiment gets one file per table, in Hive-style partition
+    directories:
+
+        <directory>/experiments.jsonl
+        <directory>/model/[<param>=<value>/...]experiment_id=<i>/part-0.parquet
+        <directory>/agents/...                   (only when there is agent data)
+
+    Parameters are not repeated in every row: they live in the manifest
+    (one JSON line per experiment) and, for the names in `partition_by`, in
+    the directory path, so pyarrow.dataset, DuckDB or Spark can prune on
+    them. ResultReader puts them back as param_* columns. Files are written
+    to a temporary name and renamed into place, so a reader never sees a
+    partial file.
+
+    Args:
+        directory: Output directory (created if needed; existing experiments are kept)
+        format: "parquet" or "arrow" (Arrow IPC, lz4-compressed)
+        float32: Columns stored as float32 (a list of names, or True for
+            every wealth column)
+        partition_by: Parameter names that become partition directories
+        manifest: Manifest file name; give each concurrent writer of one
+            directory its own, e.g. "experiments-<worker>.jsonl"
+
+    Raises:
+        ValueError: If format is not one of FORMATS
+    """
+
+    def __init__(self, directory, format="parquet", float32=None, partition_by=(), manifest=MANIFEST):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format '{format}', expected one of {sorted(FORMATS)}")
+        _pyarrow()
+        self.directory = directory
+        self.format = format
+        self.float32 = float32
+        self.partition_by = tuple(partition_by)
+        self.manifest = manifest
+        self.experiments_written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _partition_dir(self, table, experiment_id, params):
+        parts = [table]
+        parts += [f"{name}={quote(str(params.get(name)), safe='')}" for name in self.partition_by]
+        parts.append(f"experiment_id={experiment_id}")
+        return os.path.join(*parts)
+
+    def _write_file(self, table, path):
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, partial = tempfile.mkstemp(suffix=".partial", dir=os.path.dirname(path))
+        os.close(handle)
+        try:
+            if self.format == "parquet":
+                pq.write_table(table, partial)
+            else:
+                feather.write_feather(table, partial, compression="lz4")
+            os.replace(partial, path)
+        except BaseException:
+            os.remove(partial)
+            raise
+
+    def write(self, experiment_id, model_data, agent_data=None, params=None):
+        """
+        Write one finished experiment
+
+        Args:
+            experiment_id: Integer id of the experiment (its partition)
+            model_data: Model-level DataFrame from run_single_experiment
+            agent_data: Agent-level DataFrame (skipped when None or empty)
+            params: Experiment parameters (default: read from the param_* columns)
+
+        Returns:
+            Dictionary of table name -> path relative to the directory
+        """
+        params = experiment_params(model_data) if params is None else dict(params)
+        files = {}
+        for name, frame in ((MODEL_TABLE, model_data), (AGENT_TABLE, agent_data)):
+            if frame is None or len(frame) == 0:
+                continue
+            relative = os.path.join(self._partition_dir(name, experiment_id, params),
+                                    f"part-0{FORMATS[self.format]}")
+            self._write_file(arrow_table(frame, self.float32), os.path.join(self.directory, relative))
+            files[name] = relative
+
+        entry = {"experiment_id": int(experiment_id), "params": params, "rows": len(model_data),
+                 "format": self.format, "files": files}
+        with open(os.path.join(self.directory, self.manifest), "a") as manifest:
+            manifest.write(json.dumps(entry, default=repr) + "\n")
+        self.experiments_written += 1
+        return files
+
+    def reader(self):
+        return ResultReader(self.directory)
+
+# ==========================================
+# READER
+# ==========================================
+
+class ResultReader:
+    """
+    Lazy access to a directory written by ResultWriter
+
+    Only the manifest is read up front. load() and iter_load() open just the
+    files of the selected experiments and read just the selected columns.
+
+    Args:
+        directory: Directory written by ResultWriter
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        entries = {}
+        for path in sorted(glob.glob(os.path.join(directory, "experiments*.jsonl"))):
+            with open(path) as manifest:
+                for line in manifest:
+                    # A line cut short by a crash is skipped
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    # A rewritten experiment replaces its earlier entry
+                    entries[entry["experiment_id"]] = entry
+        self._entries = dict(sorted(entries.items()))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def experiments(self, **params):
+        """
+        Experiment ids and parameters, optionally filtered
+
+        Args:
+            **params: Keep experiments whose parameter equals each given value
+
+        Returns:
+            DataFrame indexed by experiment_id with one param_* column per parameter
+        """
+        rows = [{"experiment_id": eid, **{f"param_{k}": v for k, v in entry["params"].items()}}
+                for eid, entry in self._entries.items()
+                if all(entry["params"].get(k) == v for k, v in params.items())]
+        return pd.DataFrame(rows, columns=["experiment_id"] if not rows else None).set_index("experiment_id")
+
+    def columns(self, table=MODEL_TABLE):
+        """Column names stored for `table`, across all experiments"""
+        names = {}
+        for entry in self._entries.values():
+            if table in entry["files"]:
+                names.update(dict.fromkeys(self._schema(entry, table).names))
+        return list(names)
+
+    def _path(self, entry, table):
+        return os.path.join(self.directory, entry["files"][table])
+
+    def _schema(self, entry, table):
+        pa = _pyarrow()
+        if entry["format"] == "parquet":
+            import pyarrow.parquet as pq
+            return pq.read_schema(self._path(entry, table))
+        with pa.memory_map(self._path(entry, table)) as source:
+            return pa.ipc.open_file(source).schema
+
+    def _read(self, entry, table, columns):
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        if columns is not None:
+            available = set(self._schema(entry, table).names)
+            columns = [name for name in columns if name in available]
+        if entry["format"] == "parquet":
+            return pq.read_table(self._path(entry, table), columns=columns)
+        return feather.read_table(self._path(entry, table), columns=columns)
+
+    def _select(self, experiments, where):
+        if experiments is None:
+            experiments = list(self.experiments(**(where or {})).index)
+        elif where:
+            keep = set(self.experiments(**where).index)
+            experiments = [eid for eid in experiments if eid in keep]
+        return [eid for eid in experiments if eid in self._entries]
+
+    def _table(self, eid, table, stored, params):
+        """One experiment's pyarrow Table, with its experiment_id and requested param_* columns"""
+        pa = _pyarrow()
+        entry = self._entries[eid]
+        data = self._read(entry, table, stored)
+        for name in params:
+            data = data.append_column(name, pa.array([entry["params"].get(name[len("param_"):])] * data.num_rows))
+        return data.append_column("experiment_id", pa.array(np.full(data.num_rows, eid, dtype=np.int64)))
+
+    @staticmethod
+    def _to_pandas(data):
+        pa = _pyarrow()
+        frame = data.to_pandas()
+        # Integer columns with nulls (stop_step of runs that did not stop) stay nullable integers
+        for field in data.schema:
+            if pa.types.is_integer(field.type) and data.column(field.name).null_count:
+                frame[field.name] = pd.array(data.column(field.name).to_pylist(), dtype="Int64")
+        return frame
+
+    def _tables(self, columns, experiments, where, table):
+        stored = None if columns is None else ["Step"] + [c for c in columns if not c.startswith("param_") and c != "Step"]
+        params = [] if columns is None else [c for c in columns if c.startswith("param_")]
+        for eid in self._select(experiments, where):
+            if table in self._entries[eid]["files"]:
+                yield eid, self._table(eid, table, stored, params)
+
+    def iter_load(self, columns=None, experiments=None, where=None, table=MODEL_TABLE):
+        """
+        Yield (experiment_id, DataFrame) one experiment at a time
+
+        Args:
+            columns: Columns to read ("Step" is always included); param_*
+                names are filled in from the manifest. None reads every column.
+            experiments: Experiment ids to read (default: all)
+            where: Dictionary of parameter values the experiments must have
+            table: "model" or "agents"
+        """
+        for eid, data in self._tables(columns, experiments, where, table):
+            yield eid, self._to_pandas(data)
+
+    def load(self, columns=None, experiments=None, where=None, table=MODEL_TABLE):
+        """
+        The selected columns of the selected experiments as one DataFrame
+
+        Same arguments as iter_load(). The experiments are concatenated as
+        Arrow tables and converted once; columns missing from some
+        experiments (e.g. wealth statistics enabled for only some runs) are
+        null there.
+
+        Returns:
+            DataFrame with an experiment_id column, in experiment order
+        """
+        pa = _pyarrow()
+        tables = [data for _, data in self._tables(columns, experiments, where, table)]
+        if not tables:
+            return pd.DataFrame(columns=(["Step"] + list(columns or [])) + ["experiment_id"])
+        return self._to_pandas(pa.concat_tables(tables, promote_options="default"))
@@ -1,6 +1,32 @@
+import asyncio
+import json
+import os
+import threading
+import time
 import mesa
+import numpy as np
+import tornado.escape
+import tornado.ioloop
+import tornado.websocket
 from model import EvolutionaryModel
-from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT, STATE_MAP
+from recording import PlaybackModel, Recording, SPEEDS
+from surrogate import Surrogate
+from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT, NUM_STATES, STATE_MAP, PARAM_SPECS
+
+# Default grid and canvas size; ai_sim.py --width/--height build larger grids
+GRID_WIDTH = 30
+GRID_HEIGHT = 30
+CANVAS_SIZE = 500
+
+# The grid element sends a full frame at least this often, sending only changed cells in between
+KEYFRAME_EVERY = 50
+
+# Fast-forward: steps offered by default, and seconds between progress messages
+FAST_FORWARD_STEPS = 1000
+PROGRESS_EVERY = 0.25
+
+# Browser-side modules for the custom elements below
+JS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "js")
 
 # ==========================================
 # HELPER CLASSES
@@ -19,44 +45,398 @@ class LeaderboardElement(mesa.visualization.TextElement):
             role_data = STATE_MAP[state_code]
             role_name = role_data["name"]
             color = role_data["color"]
-            agents = [a for a in model.schedule.agents if a.state == state_code]
-            top_list = sorted(agents, key=lambda a: a.wealth, reverse=True)[:10]
+            top_list = model.top_earners(10, state_code)
             html += f"<div style='flex: 1; min-width: 120px;'>"
             html += f"<b style='color:{color}; border-bottom: 1px solid {color}; display:block; margin-bottom:5px;'>{role_name}</b>"
             if not top_list:
                 html += "<span style='color:#ccc; font-size: 0.8em;'>None</span>"
             else:
-                for a in top_list:
-                    html += f"<span style='font-size: 0.8em;'>#{a.unique_id}: <b>${a.wealth:.0f}</b></span><br>"
+                for unique_id, wealth in top_list:
+                    html += f"<span style='font-size: 0.8em;'>#{unique_id}: <b>${wealth:.0f}</b></span><br>"
             html += "</div>"
         html += "</div>"
         return html
 
+class DeltaCanvasGrid(mesa.visualization.VisualizationElement):
+    """
+    Grid view that sends only the cells that changed since the last frame
+
+    Each cell is sent as a bitmask of the agent states on it, read from the
+    grid's per-cell occupancy counts. The first frame, every
+    `keyframe_every`-th frame, and any frame after a reset or a skipped step,
+    is a keyframe carrying the per-state portrayals and every occupied cell.
+    Other frames carry only the cells whose mask changed, and the browser
+    (js/DeltaCanvasModule.js) redraws just those cells. What was last sent
+    is kept per connection (see FastForwardServer.render_model), so every
+    browser tab gets deltas against its own previous frame.
+
+    Args:
+        grid_width, grid_height: Size of the grid, in cells
+        canvas_width, canvas_height: Size of the canvas, in pixels (widened to at least one pixel per cell)
+        keyframe_every: Frames between full keyframes
+    """
+    local_includes = ["DeltaCanvasModule.js"]
+    local_dir = JS_DIR
+    per_connection = True
+
+    def __init__(self, grid_width, grid_height, canvas_width=CANVAS_SIZE, canvas_height=CANVAS_SIZE,
+                 keyframe_every=KEYFRAME_EVERY):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.keyframe_every = keyframe_every
+        self.js_code = (f"elements.push(new DeltaCanvasModule({canvas_width}, {canvas_height}, "
+                        f"{grid_width}, {grid_height}));")
+        self.styles = [PORTRAYALS[state] for state in range(NUM_STATES)]
+        self.draw_order = sorted(range(NUM_STATES), key=lambda state: PORTRAYALS[state]["Layer"])
+
+    def state_masks(self, model):
+        """Per-cell bitmask of the states present, shape (width, height)"""
+        grid = model.grid
+        masks = np.zeros((grid.width, grid.height), dtype=np.int64)
+        if hasattr(grid, "counts"):
+            for state in range(NUM_STATES):
+                masks |= (grid.counts[state] > 0).astype(np.int64) << state
+        else:
+            for agent in model.schedule.agents:
+                if agent.pos is not None:
+                    masks[agent.pos] |= 1 << agent.state
+        return masks
+
+    def render(self, model, sent=None):
+        """
+        Args:
+            model: Model to draw
+            sent: This element's state for one connection, updated in place
+                (None sends a keyframe)
+        """
+        sent = {} if sent is None else sent
+        masks = self.state_masks(model)
+        keyframe = (sent.get("model") is not model or model._steps != sent["step"] + 1
+                    or sent["masks"].shape != masks.shape or sent["since_keyframe"] + 1 >= self.keyframe_every)
+
+        if keyframe:
+            cells = np.flatnonzero(masks)
+            since_keyframe = 0
+        else:
+            cells = np.flatnonzero(masks != sent["masks"])
+            since_keyframe = sent["since_keyframe"] + 1
+        sent.update(model=model, step=model._steps, masks=masks, since_keyframe=since_keyframe)
+
+        height = masks.shape[1]
+        flat = np.column_stack((cells // height, cells % height, masks.ravel()[cells])).ravel().tolist()
+        frame = {"keyframe": keyframe, "cells": flat}
+        if keyframe:
+            frame["styles"] = self.styles
+            frame["draw_order"] = self.draw_order
+        return frame
+
+class HistoryChartModule(mesa.visualization.ChartModule):
+    """
+    Line chart that sends every row collected since its previous frame
+
+    mesa's ChartModule sends only the latest value, so steps that were never
+    rendered (a fast-forward, or a skipped frame) would be missing from the
+    chart. This one tracks, per connection, the last model step it sent and
+    sends all newer rows of the collector, each labelled with its step
+    (js/HistoryChartModule.js). If the collector ends before that step (a
+    playback seeked backwards) or the model was replaced (a reset from
+    another tab), the frame is flagged "reset" and carries the whole history
+    again.
+    """
+    package_includes = [mesa.visualization.CHART_JS_FILE]
+    local_includes = ["HistoryChartModule.js"]
+    local_dir = JS_DIR
+    per_connection = True
+
+    def __init__(self, series, canvas_height=200, canvas_width=500, data_collector_name="datacollector"):
+        super().__init__(series, canvas_height, canvas_width, data_collector_name)
+        self.js_code = (f"elements.push(new HistoryChartModule({json.dumps(series)}, "
+                        f"{canvas_width}, {canvas_height}));")
+
+    def render(self, model, sent=None):
+        """
+        Args:
+            model: Model to chart
+            sent: This element's state for one connection, updated in place
+                (None sends the whole history)
+        """
+        sent = {} if sent is None else sent
+        collector = getattr(model, self.data_collector_name)
+        steps = np.asarray(collector.steps)
+        last_step = sent.get("last_step")
+        if sent.get("model") is not model:
+            reset = "model" in sent and last_step is not None
+            sent["model"], last_step = model, None
+        else:
+            reset = last_step is not None and bool(len(steps) == 0 or steps[-1] < last_step)
+            if reset:
+                last_step = None
+        new = np.ones(len(steps), dtype=bool) if last_step is None else steps > last_step
+        sent["last_step"] = last_step
+        if not new.any():
+            return {"steps": [], "rows": [], "reset": reset}
+        sent["last_step"] = int(steps[-1])
+        columns = collector.model_vars
+        rows = np.column_stack([np.asarray(columns[s["Label"]])[new] for s in self.series])
+        return {"steps": steps[new].tolist(), "rows": rows.tolist(), "reset": reset}
+
+class FastForwardControl(mesa.visualization.VisualizationElement):
+    """Input and buttons to advance the model many steps without rendering (js/FastForwardModule.js)"""
+    local_includes = ["FastForwardModule.js"]
+    local_dir = JS_DIR
+
+    def __init__(self, default_steps=FAST_FORWARD_STEPS):
+        self.js_code = f"elements.push(new FastForwardModule({default_steps}));"
+
+    def render(self, model):
+        return None
+
+class FastForwardSocketHandler(mesa.visualization.SocketHandler):
+    """
+    SocketHandler that also accepts "fast_forward" and "cancel_fast_forward"
+
+    While a fast-forward runs, single steps are ignored and a reset first
+    cancels it, since the model is being stepped on another thread.
+    """
+
+    def open(self):
+        # Per-connection element state, keyed by element (see FastForwardServer.render_model)
+        self.sent = {}
+        super().open()
+
+    @property
+    def viz_state_message(self):
+        return {"type": "viz_state", "data": self.application.render_model(self)}
+
+    async def on_message(self, message):
+        msg = tornado.escape.json_decode(message)
+        app = self.application
+        if msg["type"] == "fast_forward":
+            if app.fast_forward_task is None:
+                app.start_fast_forward(int(msg["steps"]), self)
+            return
+        if msg["type"] == "cancel_fast_forward":
+            app.cancel_fast_forward()
+            return
+        if app.fast_forward_task is not None:
+            if msg["type"] == "get_step":
+                return
+            if msg["type"] == "reset":
+                # The browser has already cleared its elements: skip the final frame
+                app.cancel_fast_forward(render=False)
+                await app.fast_forward_task
+        super().on_message(message)
+        if msg["type"] == "submit_params" and app.surrogate_panel is not None:
+            # Predict for the new slider values now, before the model is reset or run
+            values = {name: getattr(value, "value", value) for name, value in app.model_kwargs.items()}
+            self.write_message({"type": "surrogate_prediction", "data": app.surrogate_panel.prediction(values)})
+
+class FastForwardServer(mesa.visualization.ModularServer):
+    """
+    ModularServer with a fast-forward mode
+
+    A fast-forward steps the model on a worker thread, exactly as a headless
+    run would: the data collector records every step, but nothing is
+    rendered. The IOLoop stays free to relay progress and take a cancel. At
+    the end it sends one frame, in which the grid sends a keyframe and every
+    HistoryChartModule sends all the rows it has not sent yet.
+    """
+
+    socket_handler = FastForwardSocketHandler
+    surrogate_panel = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for rule in self.wildcard_router.rules:
+            if rule.target is mesa.visualization.SocketHandler:
+                rule.target = self.socket_handler
+        self.fast_forward_task = None
+        self._cancel = threading.Event()
+        self._render_after = True
+
+    def render_model(self, socket=None):
+        """
+        Every element's frame, for one connection
+
+        Elements with `per_connection` set send only what changed since
+        their previous frame, so they get the state of what they last sent
+        to this socket (socket.sent). Without a socket they send full frames.
+        """
+        sent = {} if socket is None else socket.sent
+        frames = []
+        for element in self.visualization_elements:
+            if getattr(element, "per_connection", False):
+                frames.append(element.render(self.model, sent.setdefault(element, {})))
+            else:
+                frames.append(element.render(self.model))
+        return frames
+
+    def start_fast_forward(self, steps, socket):
+        self._cancel.clear()
+        self._render_after = True
+        self.fast_forward_task = asyncio.ensure_future(self._fast_forward(steps, socket))
+
+    def cancel_fast_forward(self, render=True):
+        self._render_after = self._render_after and render
+        self._cancel.set()
+
+    async def _fast_forward(self, steps, socket):
+        loop = tornado.ioloop.IOLoop.current()
+        start = time.perf_counter()
+        try:
+            done = await loop.run_in_executor(None, self._advance, steps, socket, loop)
+        finally:
+            self.fast_forward_task = None
+        elapsed = time.perf_counter() - start
+        self._send(socket, {
+            "type": "fast_forward_done",
+            "step": self.model._steps,
+            "cancelled": done < steps,
+            "steps_per_sec": done / elapsed if elapsed > 0 else 0.0,
+        })
+        if self._render_after:
+            self._send(socket, {"type": "viz_state", "data": self.render_model(socket)})
+
+    def _advance(self, steps, socket, loop):
+        """Worker thread: step the model until done or cancelled; returns the steps taken"""
+        model = self.model
+        last_report = time.perf_counter()
+        for done in range(steps):
+            if self._cancel.is_set() or not model.running:
+                return done
+            model.step()
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_EVERY:
+                last_report = now
+                loop.add_callback(self._send, socket, {
+                    "type": "fast_forward_progress", "step": model._steps, "done": done + 1, "total": steps,
+                })
+        return steps
+
+    @staticmethod
+    def _send(socket, message):
+        try:
+            socket.write_message(message)
+        except tornado.websocket.WebSocketClosedError:
+            pass
+
+# --- SURROGATE ---
+
+class SurrogatePanel(mesa.visualization.VisualizationElement):
+    """
+    Predicted end-of-run metrics from a trained surrogate.Surrogate (js/SurrogateModule.js)
+
+    Renders the prediction for the running model's parameters with each
+    frame; FastForwardSocketHandler also sends one as soon as a slider
+    moves, so the trend shows before any simulation.
+    """
+    local_includes = ["SurrogateModule.js"]
+    local_dir = JS_DIR
+    js_code = "elements.push(new SurrogateModule());"
+
+    def __init__(self, surrogate):
+        self.surrogate = surrogate
+        self.defaults = surrogate.defaults()
+        # Held-fixed parameters worth a warning when they move: the sliders and the grid size
+        self.fixed = {name: value for name, value in surrogate.fixed_params().items()
+                      if name in PARAM_SPECS or name in ("width", "height")}
+
+    def prediction(self, values):
+        """
+        Prediction rows and warnings for a dictionary of parameter values
+
+        Parameters missing from `values` take their training values.
+        """
+        point = {name: values.get(name, self.defaults[name]) for name in self.surrogate.names}
+        notes = []
+        for name in self.surrogate.names:
+            low, high = self.surrogate.value_range(name)
+            if not low <= point[name] <= high:
+                notes.append(f"{name}={point[name]} is outside the trained range {low}-{high}")
+        for name, value in values.items():
+            if name in self.fixed and value != self.fixed[name]:
+                notes.append(f"{name}={value}, but the surrogate was trained with {self.fixed[name]}")
+        noise = self.surrogate.noise
+        rows = [{"target": target, "mean": mean, "low": mean - 1.96 * std, "high": mean + 1.96 * std,
+                 "spread": noise[target]}
+                for target, (mean, std) in self.surrogate.predict(point).items()]
+        return {"rows": rows, "notes": notes}
+
+    def render(self, model):
+        values = {name: getattr(model, name) for name in list(self.surrogate.names) + list(self.fixed)
+                  if hasattr(model, name)}
+        return self.prediction(values)
+
+# --- PLAYBACK ---
+
+class PlaybackControl(mesa.visualization.VisualizationElement):
+    """
+    Seek bar and speed menu for a recording played back by PlaybackModel (js/PlaybackModule.js)
+
+    Each frame carries the step shown and the recorded range, which keeps
+    the seek bar and mesa's step counter in line with the recording.
+    """
+    local_includes = ["PlaybackModule.js"]
+    local_dir = JS_DIR
+
+    def __init__(self, speeds=SPEEDS):
+        self.js_code = f"elements.push(new PlaybackModule({json.dumps(speeds)}));"
+
+    def render(self, model):
+        return {"step": model._steps, "first": model.first_step, "last": model.last_step,
+                "speed": model.speed}
+
+class PlaybackSocketHandler(FastForwardSocketHandler):
+    """FastForwardSocketHandler that also accepts "seek" and "playback_speed" for a PlaybackModel"""
+
+    async def on_message(self, message):
+        msg = tornado.escape.json_decode(message)
+        app = self.application
+        if msg["type"] == "seek":
+            app.model.seek(int(msg["step"]))
+            self.write_message(self.viz_state_message)
+            return
+        if msg["type"] == "playback_speed":
+            app.model.speed = float(msg["speed"])
+            return
+        await super().on_message(message)
+
+class PlaybackServer(FastForwardServer):
+    """
+    Server that plays back a recording instead of running a model
+
+    The model is a recording.PlaybackModel, so every element renders from
+    the recorded frames and series: stepping advances through the
+    recording at the chosen speed, and a seek decodes the nearest keyframe
+    plus the deltas after it. Reset returns to the start of the recording.
+    """
+    socket_handler = PlaybackSocketHandler
+
 # ==========================================
 # VISUALIZATION FUNCTIONS
 # ==========================================
 
-def agent_portrayal(agent):
-    p = STATE_MAP[agent.state].copy()
+def state_portrayal(state):
+    p = STATE_MAP[state]
     portrayal = {
         "Shape": "circle", "Filled": "true",
         "w": p["scale"], "h": p["scale"],
         "Layer": 1, "Color": p["color"]
     }
     
-    if agent.state == UBI_RECIPIENT:
+    if state == UBI_RECIPIENT:
         portrayal["Shape"] = "rect"
         portrayal["Layer"] = 0        
         portrayal["w"] = 1.0          
         portrayal["h"] = 1.0
         portrayal["stroke_color"] = "#228B22" 
     
-    elif agent.state == AUTOMATED:
+    elif state == AUTOMATED:
         portrayal["Layer"] = 2
         portrayal["r"] = 0.5
         portrayal["Color"] = "#ff0000"
         
-    elif agent.state == DISPLACED:
+    elif state == DISPLACED:
         portrayal["Shape"] = "rect"
         portrayal["Layer"] = 1
         portrayal["w"] = 0.75
@@ -73,51 +453,45 @@ def agent_portrayal(agent):
             
     return portrayal
 
+# A portrayal depends only on the agent's state, so build one per state up front
+PORTRAYALS = {state: state_portrayal(state) for state in STATE_MAP}
+
+def agent_portrayal(agent):
+    # CanvasGrid adds x/y to the dict it gets, so hand out a copy
+    return dict(PORTRAYALS[agent.state])
+
 # ==========================================
 # MODEL PARAMETERS
 # ==========================================
 
-model_params = {
-    "N": mesa.visualization.Slider("[Global] Total Agents", 350, 100, 400, 10),
-    "starting_wealth": mesa.visualization.Slider("[Global] Starting Wealth", 50, 10, 200, 10),
-    "cost_of_living": mesa.visualization.Slider("[Global] Cost of Living", 1.0, 0.0, 5.0, 0.1),
-
-    "initial_ubi_fraction": mesa.visualization.Slider("[Policy] % of Total Pop on UBI", 0.0, 0.0, 1.0, 0.05),
-
-    "seeds_human": mesa.visualization.Slider("[Seeds] Human (Remainder)", 300, 0, 400, 10),
-    "seeds_augmented": mesa.visualization.Slider("[Seeds] Augmented", 20, 0, 100, 1),
-    "seeds_automated": mesa.visualization.Slider("[Seeds] Automated", 20, 0, 50, 1),
-
-    "robot_tax_rate": mesa.visualization.Slider("[Policy] Robot Tax Rate", 0.0, 0.0, 1.0, 0.05),
-    
-    # --- NEW SLIDER ---
-    "ubi_class_tax_share": mesa.visualization.Slider("[Policy] Tax % to UBI Class", 0.5, 0.0, 1.0, 0.05),
-
-    "wage_human": mesa.visualization.Slider("[Econ] Wage: Human", 1.0, 0.0, 10.0, 0.1),
-    "wage_augmented": mesa.visualization.Slider("[Econ] Wage: Augmented", 2.5, 0.0, 10.0, 0.1),
-
-    "adopt_human_augmented_thresh": mesa.visualization.Slider("[Trans] Human->Aug Neighbors", 3, 1, 8, 1),
-    "adopt_human_augmented_prob": mesa.visualization.Slider("[Trans] Human->Aug Chance", 0.3, 0.0, 1.0, 0.05),
-    "human_displacement_chance": mesa.visualization.Slider("[Trans] Efficiency Disp. Chance", 0.1, 0.0, 1.0, 0.05),
-
-    "automation_threshold": mesa.visualization.Slider("[Trans] Aug->Auto Density", 4, 1, 8, 1),
-    "automation_chance": mesa.visualization.Slider("[Trans] Aug->Auto Chance", 0.1, 0.0, 1.0, 0.05),
-    "displacement_threshold": mesa.visualization.Slider("[Trans] Displacement Pressure", 2, 1, 8, 1),
-    "combination_threshold": mesa.visualization.Slider("[Trans] Auto Combine Density", 2, 1, 8, 1),
+def build_model_params(width=GRID_WIDTH, height=GRID_HEIGHT):
+    """
+    Sliders for every tunable parameter, plus the fixed grid size
 
-    "hiring_chance": mesa.visualization.Slider("[System] Hiring Chance", 0.30, 0.0, 1.0, 0.05),
-    "upskill_chance": mesa.visualization.Slider("[System] Upskill Chance", 0.3, 0.0, 1.0, 0.05),
-    "seed": mesa.visualization.NumberInput("Random Seed (Optional)", value=123), 
-}
+    Slider bounds live in constants.PARAM_SPECS so batch sweeps share them.
+    On grids larger than the default, the agent-count sliders are stretched to
+    keep the default density (350 agents on 30x30 cells).
+    """
+    scale = max(1.0, width * height / (GRID_WIDTH * GRID_HEIGHT))
+    params = {}
+    for name, (label, value, min_value, max_value, step) in PARAM_SPECS.items():
+        if name in ("N", "seeds_human") and scale > 1:
+            value, max_value = int(round(value * scale, -1)), int(round(max_value * scale, -1))
+            step = max(step, int(round(step * scale, -1)))
+        params[name] = mesa.visualization.Slider(label, value, min_value, max_value, step)
+    params["seed"] = mesa.visualization.NumberInput("Random Seed (Optional)", value=123)
+    params["width"] = width
+    params["height"] = height
+    params["wealth_stats"] = True
+    return params
 
 # ==========================================
 # VISUALIZATION ELEMENTS
 # ==========================================
 
-grid = mesa.visualization.CanvasGrid(agent_portrayal, 30, 30, 500, 500)
 leaderboard = LeaderboardElement()
 
-chart_pop = mesa.visualization.ChartModule([
+chart_pop = HistoryChartModule([
     {"Label": "Human", "Color": "#808080"},
     {"Label": "Augmented", "Color": "#4285f4"},
     {"Label": "Automated", "Color": "#ff0000"},
@@ -125,7 +499,7 @@ chart_pop = mesa.visualization.ChartModule([
     {"Label": "UBI Recipients", "Color": "#32CD32"} 
 ], canvas_height=150, canvas_width=500)
 
-chart_employment = mesa.visualization.ChartModule([
+chart_employment = HistoryChartModule([
     {"Label": "Displaced", "Color": "#ffd700"},      
     {"Label": "Fired (Step)", "Color": "#ff9900"},   
     {"Label": "Hired (Step)", "Color": "#00ff00"},   
@@ -138,7 +512,7 @@ chart_capital_bar = mesa.visualization.BarChartModule([
     {"Label": "Wealth_State", "Color": "#32CD32"}
 ], canvas_height=150, canvas_width=500)
 
-chart_wealth = mesa.visualization.ChartModule([
+chart_wealth = HistoryChartModule([
     {"Label": "TotalWealth_Human", "Color": "#808080"},
     {"Label": "TotalWealth_Augmented", "Color": "#4285f4"},
     {"Label": "TotalWealth_Automated", "Color": "#ff0000"},
@@ -147,13 +521,29 @@ chart_wealth = mesa.visualization.ChartModule([
 ], canvas_height=150, canvas_width=500)
 
 # --- UPDATED FISCAL CHART ---
-chart_fiscal = mesa.visualization.ChartModule([
+chart_fiscal = HistoryChartModule([
     {"Label": "UBI (Opt-Out)", "Color": "#00ff00"},    # Bright Green for Welfare
     {"Label": "UBI (Worker Div)", "Color": "#0000ff"}, # Blue for Worker Dividend
     {"Label": "Cost of Living", "Color": "#ff0000"} 
 ], canvas_height=150, canvas_width=500)
 
-chart_integrity = mesa.visualization.ChartModule([
+chart_gini = HistoryChartModule([
+    {"Label": "Gini_All", "Color": "Black"},
+    {"Label": "Gini_Human", "Color": "#808080"},
+    {"Label": "Gini_Augmented", "Color": "#4285f4"},
+    {"Label": "Gini_Automated", "Color": "#ff0000"},
+    {"Label": "Gini_Displaced", "Color": "#ffd700"},
+    {"Label": "Gini_UBI", "Color": "#32CD32"}
+], canvas_height=150, canvas_width=500)
+
+chart_percentiles = HistoryChartModule([
+    {"Label": "P10_All", "Color": "#9ecae1"},
+    {"Label": "P50_All", "Color": "#4292c6"},
+    {"Label": "P90_All", "Color": "#08519c"},
+    {"Label": "P99_All", "Color": "#08306b"}
+], canvas_height=150, canvas_width=500)
+
+chart_integrity = HistoryChartModule([
     {"Label": "Alive", "Color": "Black"},
     {"Label": "Total Removed", "Color": "#800080"},       
     {"Label": "Merged (Singularity)", "Color": "#00ced1"} 
@@ -163,9 +553,9 @@ chart_integrity = mesa.visualization.ChartModule([
 # SERVER
 # ==========================================
 
-server = mesa.visualization.ModularServer(
-    EvolutionaryModel, 
-    [
+def build_elements(grid):
+    """The grid, leaderboard and charts, in page order"""
+    return [
         grid, 
         SectionHeader("Wealth Leaderboard (Top 10 by Class)"),
         leaderboard, 
@@ -178,12 +568,56 @@ server = mesa.visualization.ModularServer(
         chart_wealth,
         SectionHeader("Fiscal Policy Monitor (UBI vs Cost of Living)"), 
         chart_fiscal,
+        SectionHeader("Wealth Inequality (Gini by Class, Percentiles of All Agents)"),
+        chart_gini,
+        chart_percentiles,
         SectionHeader("Simulation Integrity (Agent Conservation)"),
         chart_integrity
-    ], 
-    "Evolutionary Automata Simulation", 
-    model_params
-)
+    ]
+
+def build_server(width=GRID_WIDTH, height=GRID_HEIGHT, surrogate=None):
+    """
+    The visualization server for a width x height grid
+
+    Args:
+        surrogate: Path of a surrogate saved by surrogate.py; its predictions
+            for the slider values show above the grid
+    """
+    grid = DeltaCanvasGrid(width, height, CANVAS_SIZE, CANVAS_SIZE)
+    panel = SurrogatePanel(Surrogate.load(surrogate)) if surrogate else None
+    prediction = [SectionHeader("Surrogate Prediction (End of Run)"), panel] if panel else []
+    server = FastForwardServer(
+        EvolutionaryModel, 
+        [FastForwardControl()] + prediction + build_elements(grid), 
+        "Evolutionary Automata Simulation", 
+        build_model_params(width, height)
+    )
+    server.surrogate_panel = panel
+    return server
+
+def build_playback_server(path):
+    """
+    A server playing back the recording at `path` (see recording.py)
+
+    Only the recording is read: no model runs, and the parameter sidebar
+    shows the recorded parameters instead of sliders.
+    """
+    recording = Recording(path)
+    grid = DeltaCanvasGrid(recording.width, recording.height, CANVAS_SIZE, CANVAS_SIZE)
+    params = ", ".join(f"{name}={value}" for name, value in recording.params.items())
+    return PlaybackServer(
+        PlaybackModel,
+        [PlaybackControl()] + build_elements(grid),
+        "Evolutionary Automata Simulation (playback)",
+        {
+            "recording": recording,
+            "info": mesa.visualization.StaticText(
+                f"Recording {os.path.basename(path)}: steps {recording.first_step}-{recording.last_step}"
+                f" on {recording.width}x{recording.height}. {params}"),
+        },
+    )
+
+server = build_server()
 
 if __name__ == "__main__":
     server.launch()
\ No newline at end of file
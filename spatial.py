@@ -0,0 +1,124 @@
+"""
+Spatial occupancy index for AI Adoption Simulator
+A MultiGrid that keeps dense per-cell agent counts, so movement and
+neighborhood checks are array lookups instead of scans over cell lists
+"""
+
+import mesa
+import numpy as np
+from constants import UBI_RECIPIENT, NUM_STATES
+
+class IndexedMultiGrid(mesa.space.MultiGrid):
+    """
+    MultiGrid with per-cell counts of agents by state
+
+    `counts[state, x, y]` is the number of agents in `state` on cell (x, y) and
+    `blocking[x, y]` the number of agents that block movement (everyone but
+    UBI recipients). Placing, moving and removing agents keep both current;
+    the owner must call update_state() when an agent on the grid changes state.
+
+    Neighborhoods are cached per cell and radius, as mesa does, which on a
+    large grid costs a few kilobytes per visited cell. With
+    cache_neighborhoods=False toroidal Moore neighborhoods are rebuilt on
+    every query instead (same cells, same order), trading speed for memory.
+    """
+
+    def __init__(self, width, height, torus, cache_neighborhoods=True):
+        super().__init__(width, height, torus)
+        self.counts = np.zeros((NUM_STATES, width, height), dtype=np.int32)
+        self.blocking = np.zeros((width, height), dtype=np.int32)
+        self._flat_counts = self.counts.reshape(NUM_STATES, -1)
+        self.cache_neighborhoods = cache_neighborhoods
+        self._ring_cache = {}
+
+    # --- HOOKS ---
+
+    def place_agent(self, agent, pos):
+        super().place_agent(agent, pos)
+        self._count(agent.pos, agent.state, 1)
+
+    def remove_agent(self, agent):
+        self._count(agent.pos, agent.state, -1)
+        super().remove_agent(agent)
+
+    def update_state(self, pos, old_state, new_state):
+        """Moves one agent on cell `pos` from old_state to new_state in the counts"""
+        self._count(pos, old_state, -1)
+        self._count(pos, new_state, 1)
+
+    def _count(self, pos, state, delta):
+        self.counts[state][pos] += delta
+        if state != UBI_RECIPIENT:
+            self.blocking[pos] += delta
+
+    # --- QUERIES ---
+
+    def get_neighborhood(self, pos, moore, include_center=False, radius=1):
+        if self.cache_neighborhoods or not (moore and self.torus):
+            return super().get_neighborhood(pos, moore, include_center, radius)
+        # Same construction as MultiGrid's: row-major offsets, duplicates dropped, then the center
+        x, y = pos
+        offsets = range(-radius, radius + 1)
+        neighborhood = dict.fromkeys(((x + dx) % self.width, (y + dy) % self.height)
+                                     for dx in offsets for dy in offsets)
+        if not include_center:
+            neighborhood.pop(pos, None)
+        return tuple(neighborhood)
+
+    def is_blocked(self, pos):
+        """True if a non-UBI agent occupies the cell"""
+        return self.blocking[pos] > 0
+
+    def ring_cells(self, pos, radius):
+        """Flat indices of the Moore neighborhood of pos (center excluded), cached"""
+        key = (pos, radius)
+        cells = self._ring_cache.get(key)
+        if cells is None:
+            neighborhood = self.get_neighborhood(pos, moore=True, include_center=False, radius=radius)
+            cells = np.array([x * self.height + y for x, y in neighborhood], dtype=np.intp)
+            if self.cache_neighborhoods:
+                self._ring_cache[key] = cells
+        return cells
+
+    def count_around(self, pos, radius):
+        """
+        Per-state agent counts in the Moore neighborhood of pos, center excluded
+
+        Matches counting the states of grid.get_neighbors(pos, moore=True,
+        include_center=False, radius=radius).
+        """
+        return self._flat_counts[:, self.ring_cells(pos, radius)].sum(axis=1)
+
+def sample_cells(rng, n_cells, k):
+    """
+    The first k cells popped from a random.shuffle()d list of range(n_cells)
+
+    Replays random.shuffle's Fisher-Yates swaps but stores only the displaced
+    entries, so memory is O(k) rather than O(n_cells). The draws for the
+    remaining swaps are still made, leaving `rng` in the same state as a full
+    shuffle would, so seeded runs are unchanged.
+
+    Args:
+        rng: random.Random instance (the model's self.random)
+        n_cells: Number of cells to choose from
+        k: Number of distinct cells to pick (at most n_cells)
+
+    Returns:
+        List of k flat cell indices, in pop() order
+    """
+    randbelow = rng._randbelow
+    displaced = {}
+    picked = []
+    i = n_cells - 1
+    while i > 0 and len(picked) < k:
+        j = randbelow(i + 1)
+        # After this swap x[i] is final, and x[i] is what pop() returns next
+        picked.append(displaced.get(j, j))
+        displaced[j] = displaced.pop(i, i)
+        i -= 1
+    if len(picked) < k:
+        picked.append(displaced.get(0, 0))
+    while i > 0:
+        randbelow(i + 1)
+        i -= 1
+    return picked
@@ -0,0 +1,186 @@
+"""
+Early stopping for AI Adoption Simulator
+Ends a run once nothing interesting is left to simulate: the labor market is
+gone, the population has stopped changing, or the wealth flows have settled
+"""
+
+import numpy as np
+import pandas as pd
+from constants import HUMAN, AUGMENTED, DISPLACED
+
+# Values of model.stop_reason
+NO_WORKERS = "no_workers"          # no Human, Augmented or Displaced agents left
+SINGLE_AGENT = "single_agent"      # at most one agent alive
+STATIONARY = "stationary"          # state counts flat for stop_stationary_window steps
+FLOW_CONVERGED = "flow_converged"  # per-state wealth flows flat for stop_flow_window steps
+
+# Default tolerance of the flow condition, relative to total absolute wealth
+FLOW_TOLERANCE = 1e-3
+
+class StopConditions:
+    """
+    Stop conditions checked after every step
+
+    Absorbing: the run stops when no Human, Augmented or Displaced agent is
+    left (no labor market to evolve) or when at most one agent is alive.
+
+    Stationary: the state counts have stayed within `stationary_tolerance`
+    agents of their values at the start of the window for `stationary_window`
+    steps.
+
+    Flow convergence: the per-step change in each state's total wealth has
+    stayed within `flow_tolerance` (times the total absolute wealth) of its
+    value at the start of the window for `flow_window` steps.
+
+    Each windowed condition keeps an anchor (the values it compares against)
+    and the step the anchor was taken; a step that moves too far from the
+    anchor takes a new one. get_state()/set_state() carry these through
+    checkpoints, so a resumed run stops at the same step as an uninterrupted one.
+
+    Args:
+        absorbing: Stop on the absorbing states above
+        stationary_window: Steps of flat state counts before stopping (0 disables)
+        stationary_tolerance: Agents each count may move from the anchor
+        flow_window: Steps of flat wealth flows before stopping (0 disables)
+        flow_tolerance: Relative movement each flow may make from the anchor
+    """
+
+    def __init__(self, absorbing=False, stationary_window=0, stationary_tolerance=0,
+                 flow_window=0, flow_tolerance=FLOW_TOLERANCE):
+        self.absorbing = absorbing
+        self.stationary_window = stationary_window
+        self.stationary_tolerance = stationary_tolerance
+        self.flow_window = flow_window
+        self.flow_tolerance = flow_tolerance
+
+        self.count_anchor = None
+        self.count_since = 0
+        self.previous_wealth = None
+        self.flow_anchor = None
+        self.flow_since = 0
+
+    @classmethod
+    def from_model(cls, model):
+        """Conditions from the model's stop_* attributes, or None if all are disabled"""
+        if not (model.stop_absorbing or model.stop_stationary_window or model.stop_flow_window):
+            return None
+        return cls(model.stop_absorbing, model.stop_stationary_window, model.stop_stationary_tolerance,
+                   model.stop_flow_window, model.stop_flow_tolerance)
+
+    def update(self, model):
+        """
+        Check the conditions after a step; stop the model if one holds
+
+        Sets model.running to False and records model.stop_step and
+        model.stop_reason.
+
+        Returns:
+            The stop reason, or None to keep running
+        """
+        reason = self.check(model)
+        if reason is not None:
+            model.running = False
+            model.stop_step = model._steps
+            model.stop_reason = reason
+        return reason
+
+    def check(self, model):
+        """The first condition that holds for the model's current step, or None"""
+        counts = model.state_counts
+        step = model._steps
+
+        if self.absorbing:
+            if model.agent_count <= 1:
+                return SINGLE_AGENT
+            if counts[HUMAN] + counts[AUGMENTED] + counts[DISPLACED] == 0:
+                return NO_WORKERS
+
+        reason = None
+        if self.stationary_window:
+            if self.count_anchor is None or any(abs(count - anchor) > self.stationary_tolerance
+                                                for count, anchor in zip(counts, self.count_anchor)):
+                self.count_anchor = list(counts)
+                self.count_since = step
+            elif step - self.count_since >= self.stationary_window:
+                reason = STATIONARY
+
+        # Updated even when the counts already fired, so the wealth history never skips a step
+        if self.flow_window:
+            wealth = [float(w) for w in model.state_wealth]
+            if self.previous_wealth is not None:
+                flows = [w - p for w, p in zip(wealth, self.previous_wealth)]
+                limit = self.flow_tolerance * max(1.0, sum(abs(w) for w in wealth))
+                if self.flow_anchor is None or any(abs(flow - anchor) > limit
+                                                   for flow, anchor in zip(flows, self.flow_anchor)):
+                    self.flow_anchor = flows
+                    self.flow_since = step
+                elif step - self.flow_since >= self.flow_window:
+                    reason = reason or FLOW_CONVERGED
+            self.previous_wealth = wealth
+
+        return reason
+
+    # --- CHECKPOINT STATE ---
+
+    def get_state(self):
+        """Window anchors as a JSON-compatible dictionary"""
+        return {
+            "count_anchor": self.count_anchor,
+            "count_since": self.count_since,
+            "previous_wealth": self.previous_wealth,
+            "flow_anchor": self.flow_anchor,
+            "flow_since": self.flow_since,
+        }
+
+    def set_state(self, state):
+        """Restore anchors saved by get_state()"""
+        for name, value in state.items():
+            setattr(self, name, value)
+
+def stop_params(attributes):
+    """Constructor keyword arguments for the stop conditions saved in checkpoint attributes"""
+    return {
+        "stop_absorbing": attributes.get("stop_absorbing", False),
+        "stop_stationary_window": attributes.get("stop_stationary_window", 0),
+        "stop_stationary_tolerance": attributes.get("stop_stationary_tolerance", 0),
+        "stop_flow_window": attributes.get("stop_flow_window", 0),
+        "stop_flow_tolerance": attributes.get("stop_flow_tolerance", FLOW_TOLERANCE),
+    }
+
+# ==========================================
+# RESULTS
+# ==========================================
+
+def pad_stopped(model_data, collected_steps, steps, collect_every=1):
+    """
+    Extend a stopped run's model data to `steps` so it lines up with full runs
+
+    A row is added for every collection step the run skipped. It repeats the
+    last collected row, and its `padded` column is True.
+
+    Args:
+        model_data: DataFrame from the model's collector
+        collected_steps: Model step of each of its rows
+        steps: Number of steps the run was asked for
+        collect_every: The collector's collection interval
+
+    Returns:
+        DataFrame with a `padded` column
+    """
+    model_data = model_data.copy()
+    model_data["padded"] = False
+    if len(model_data) == 0:
+        return model_data
+
+    last = int(collected_steps[-1])
+    missing = np.arange(last - last % collect_every + collect_every, steps + 1, collect_every)
+    if len(missing) == 0:
+        return model_data
+
+    filler = model_data.iloc[[-1] * len(missing)].copy()
+    filler["padded"] = True
+    if isinstance(model_data.index, pd.RangeIndex):
+        filler.index = pd.RangeIndex(len(model_data), len(model_data) + len(missing))
+    else:
+        filler.index = pd.Index(missing, name=model_data.index.name)
+    return pd.concat([model_data, filler])
@@ -0,0 +1,165 @@
+"""
+Counter-based random streams for AI Adoption Simulator
+Every random decision is a pure function of (seed, unique_id, step, slot), so
+draws do not depend on activation order, batch layout or which process makes
+them, and both engines see the same number for the same decision
+"""
+
+import hashlib
+import mesa
+import numpy as np
+
+# Engine rng_mode values: one shared sequential generator (the default), or
+# counter-based streams keyed per decision
+SHARED = "shared"
+COUNTER = "counter"
+RNG_MODES = (SHARED, COUNTER)
+
+# Decision slots: one uniform draw per agent per slot per step, shared by both engines
+SLOT_ORDER = 0
+SLOT_HIRE = 1
+SLOT_UPSKILL = 2
+SLOT_MERGE = 3
+SLOT_MERGE_PRIORITY = 4
+SLOT_DISPLACE = 5
+SLOT_ADOPT = 6
+SLOT_AUTOMATE = 7
+SLOT_MOVE = 8  # move rounds use SLOT_MOVE + 2 * round (+1 for the priority draw)
+
+# Initial placement: one draw per grid cell (keyed by cell index instead of agent)
+SLOT_PLACE = 1023
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+TO_UNIT = 1.0 / (1 << 53)
+
+_GOLDEN = np.uint64(GOLDEN)
+_MIX1 = np.uint64(MIX1)
+_MIX2 = np.uint64(MIX2)
+
+# ==========================================
+# MIXING
+# ==========================================
+# The SplitMix64 finalizer, once on Python ints (masked to 64 bits) and once
+# on uint64 arrays (which wrap), so both give the same bits.
+
+def mix64(z):
+    z = ((z ^ (z >> 30)) * MIX1) & MASK64
+    z = ((z ^ (z >> 27)) * MIX2) & MASK64
+    return z ^ (z >> 31)
+
+def mix64_array(z):
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+def seed_key(seed):
+    """64-bit key for a model seed (integers directly, anything else hashed)"""
+    if isinstance(seed, (int, np.integer)) and not isinstance(seed, bool):
+        return int(seed) & MASK64
+    return int.from_bytes(hashlib.sha256(repr(seed).encode()).digest()[:8], "little")
+
+class CounterStreams:
+    """
+    Uniform draws addressed by (seed, id, step, slot)
+
+    The (seed, step, slot) triple is hashed into a stream key; the draw for
+    id i is SplitMix64 output number i + 1 of that stream, i.e.
+    mix64(key + (i + 1) * GOLDEN), and its top 53 bits make a float in [0, 1).
+    The scalar and array methods return identical values.
+
+    Args:
+        seed: Model seed
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.key = seed_key(seed)
+        self._keys = {}
+        self._keys_step = None
+
+    def stream_key(self, step, slot):
+        """Key of the (step, slot) stream (cached for the current step)"""
+        if step != self._keys_step:
+            self._keys = {}
+            self._keys_step = step
+        key = self._keys.get(slot)
+        if key is None:
+            key = mix64((mix64((self.key + (step + 1) * GOLDEN) & MASK64) + (slot + 1) * GOLDEN) & MASK64)
+            self._keys[slot] = key
+        return key
+
+    # --- SCALAR (agent engine) ---
+
+    def uniform(self, uid, step, slot):
+        """The draw in [0, 1) of agent `uid` for decision `slot` at `step`"""
+        key = self._keys.get(slot) if step == self._keys_step else None
+        if key is None:
+            key = self.stream_key(step, slot)
+        # mix64 inlined: this runs once per agent decision in the agent engine
+        z = (key + (uid + 1) * GOLDEN) & MASK64
+        z = ((z ^ (z >> 30)) * MIX1) & MASK64
+        z = ((z ^ (z >> 27)) * MIX2) & MASK64
+        return ((z ^ (z >> 31)) >> 11) * TO_UNIT
+
+    def choice(self, options, uid, step, slot):
+        """options[floor(u * len(options))] for the agent's draw u"""
+        return options[int(self.uniform(uid, step, slot) * len(options))]
+
+    # --- ARRAYS ---
+
+    def bits(self, ids, step, slot):
+        """Raw 64-bit draws for an integer array of ids"""
+        key = np.uint64(self.stream_key(step, slot))
+        return mix64_array(key + (np.asarray(ids).astype(np.uint64) + np.uint64(1)) * _GOLDEN)
+
+    def uniforms(self, ids, step, slot):
+        """uniform() for every id in an integer array"""
+        return (self.bits(ids, step, slot) >> np.uint64(11)).astype(np.float64) * TO_UNIT
+
+    def sample_cells(self, n_cells, k):
+        """
+        k distinct cells out of range(n_cells), as an int64 array
+
+        Cells are ranked by their own SLOT_PLACE draw and the k lowest are
+        taken in rank order, so the result depends only on the seed and the
+        grid size.
+        """
+        keys = self.bits(np.arange(n_cells), 0, SLOT_PLACE)
+        if k < n_cells:
+            chosen = np.argpartition(keys, k)[:k]
+        else:
+            chosen = np.arange(n_cells)
+        return chosen[np.argsort(keys[chosen], kind="stable")].astype(np.int64)
+
+def make_streams(rng_mode, seed):
+    """
+    CounterStreams for rng_mode "counter", None for "shared"
+
+    Raises:
+        ValueError: If rng_mode is not one of RNG_MODES
+    """
+    if rng_mode not in RNG_MODES:
+        raise ValueError(f"Unknown rng_mode '{rng_mode}', expected one of {RNG_MODES}")
+    return CounterStreams(seed) if rng_mode == COUNTER else None
+
+class CounterActivation(mesa.time.BaseScheduler):
+    """
+    Activates every agent once per step, in order of its SLOT_ORDER draw
+
+    The counter-mode replacement for RandomActivation: the order depends only
+    on the seed, the step and the agents' ids, not on the order agents were
+    added or on earlier draws. Agents added during a step first act on the
+    next one, as with RandomActivation.
+    """
+
+    def step(self):
+        agents = list(self._agents)
+        uids = np.fromiter((a.unique_id for a in agents), dtype=np.int64, count=len(agents))
+        draws = self.model.streams.uniforms(uids, self.model._steps, SLOT_ORDER)
+        for i in np.argsort(draws, kind="stable").tolist():
+            agents[i].step()
+        self.steps += 1
+        self.time += 1
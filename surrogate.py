@@ -0,0 +1,660 @@
+"""
+Surrogate emulator for AI Adoption Simulator
+Gaussian-process regression of end-of-run metrics over a parameter space,
+trained on a space-filling design of simulation runs, to answer parameter
+queries with uncertainty in microseconds instead of a fresh simulation
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from batch_run import derive_seed, iter_experiments
+from meanfield import model_defaults
+from sweep import build_design, param_space
+from constants import PARAM_SPECS
+
+FORMAT_VERSION = 1
+
+# End-of-run metrics the emulator predicts, each averaged over the last
+# END_WINDOW steps of a run so one noisy step does not dominate
+TARGETS = {
+    "Alive": lambda frame: frame["Alive"],
+    "Displaced": lambda frame: frame["Displaced"],
+    "Capital Share": lambda frame: capital_share(frame),
+    "UBI (Opt-Out)": lambda frame: frame["UBI (Opt-Out)"],
+    "UBI (Worker Div)": lambda frame: frame["UBI (Worker Div)"],
+}
+END_WINDOW = 50
+
+def capital_share(frame):
+    """Robots' share of capital + labor + state wealth (the economic-health bar; displaced debts excluded)"""
+    held = frame["Wealth_Capital"] + frame["Wealth_Labor"] + frame["Wealth_State"]
+    return (frame["Wealth_Capital"] / held.where(held > 0)).fillna(0.0)
+
+# Hyperparameter bounds on the unit cube and standardized outputs: length
+# scales, signal variance, noise variance (the replicate spread)
+LENGTH_SCALE_BOUNDS = (0.02, 50.0)
+SIGNAL_BOUNDS = (1e-3, 1e2)
+NOISE_BOUNDS = (1e-6, 2.0)
+
+# Rows per block when predicting many points (bounds the n x m kernel matrix)
+PREDICT_BLOCK = 4096
+
+def end_metrics(model_data, window=END_WINDOW, targets=TARGETS):
+    """
+    End-of-run target values of one run
+
+    Args:
+        model_data: Model-level DataFrame of the run
+        window: Number of final rows averaged
+        targets: Dictionary of target name -> function(DataFrame) -> Series
+
+    Returns:
+        Dictionary of target name -> value
+    """
+    frame = model_data.tail(window)
+    return {name: float(metric(frame).mean()) for name, metric in targets.items()}
+
+# ==========================================
+# GAUSSIAN PROCESS
+# ==========================================
+# Matern-5/2 kernel with one length scale per parameter (ARD), a constant
+# mean and a noise term for the replicate spread. Hyperparameters maximize
+# the log marginal likelihood, with its analytic gradient.
+
+SQRT5 = np.sqrt(5.0)
+
+def _sq_distances(a, b):
+    """Squared Euclidean distances between the rows of a (m, d) and b (n, d)"""
+    return np.maximum((a * a).sum(axis=-1)[..., :, None] + (b * b).sum(axis=-1)[..., None, :]
+                      - 2.0 * a @ np.swapaxes(b, -1, -2), 0.0)
+
+def _matern(sq_dist, signal):
+    r = SQRT5 * np.sqrt(sq_dist)
+    return signal * (1.0 + r + r * r / 3.0) * np.exp(-r)
+
+def _neg_log_likelihood(theta, x, y):
+    """Negative log marginal likelihood and its gradient in log hyperparameters"""
+    n, d = x.shape
+    lengths, signal, noise = np.exp(theta[:d]), np.exp(theta[d]), np.exp(theta[d + 1])
+    diffs = (x[:, None, :] - x[None, :, :]) / lengths
+    sq = diffs ** 2
+    r = SQRT5 * np.sqrt(sq.sum(axis=2))
+    decay = np.exp(-r)
+    kernel = signal * (1.0 + r + r * r / 3.0) * decay
+    try:
+        chol = np.linalg.cholesky(kernel + noise * np.eye(n))
+    except np.linalg.LinAlgError:
+        return 1e10, np.zeros_like(theta)
+    alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, y))
+    value = 0.5 * y @ alpha + np.log(np.diag(chol)).sum() + 0.5 * n * np.log(2 * np.pi)
+
+    inverse = np.linalg.solve(chol.T, np.linalg.solve(chol, np.eye(n)))
+    inner = inverse - np.outer(alpha, alpha)
+    radial = signal * (5.0 / 3.0) * (1.0 + r) * decay
+    grad = np.empty_like(theta)
+    grad[:d] = 0.5 * np.einsum("ij,ij,ijk->k", inner, radial, sq)
+    grad[d] = 0.5 * (inner * kernel).sum()
+    grad[d + 1] = 0.5 * noise * np.trace(inner)
+    return value, grad
+
+def fit_hyperparameters(x, y, restarts=3, seed=0):
+    """
+    Maximum-likelihood kernel hyperparameters for one standardized output
+
+    Args:
+        x: (n, d) inputs on the unit cube
+        y: (n,) standardized outputs
+        restarts: Number of optimizer starts (the first at length scale 0.5)
+        seed: Seed for the other starting points
+
+    Returns:
+        Array of log hyperparameters: d length scales, signal and noise variance
+    """
+    from scipy.optimize import minimize
+    d = x.shape[1]
+    bounds = ([tuple(np.log(LENGTH_SCALE_BOUNDS))] * d + [tuple(np.log(SIGNAL_BOUNDS)), tuple(np.log(NOISE_BOUNDS))])
+    rng = np.random.default_rng(seed)
+    best = None
+    for start in range(restarts):
+        lengths = np.full(d, 0.5) if start == 0 else np.exp(rng.uniform(np.log(0.1), np.log(3.0), d))
+        theta0 = np.concatenate([np.log(lengths), [0.0, np.log(0.1)]])
+        result = minimize(_neg_log_likelihood, theta0, args=(x, y), jac=True, method="L-BFGS-B", bounds=bounds)
+        if best is None or result.fun < best.fun:
+            best = result
+    return best.x
+
+# ==========================================
+# SURROGATE
+# ==========================================
+
+class Surrogate:
+    """
+    Gaussian-process emulator of end-of-run metrics over a parameter space
+
+    Inputs are the space's parameters scaled to the unit cube; every other
+    parameter stays at base_params (or EvolutionaryModel's default). Each
+    target has its own kernel hyperparameters; predictions for all targets
+    share one pass over stacked arrays, so a single query costs a few
+    NumPy calls.
+
+    Args:
+        space: Output of sweep.param_space
+        steps: Steps per training run
+        base_params: Fixed parameters of every run
+        engine: Key into batch_run.ENGINES used for training runs
+        end_window: Final steps averaged into each target (see end_metrics)
+        base_seed: Seed of the training designs and of run seeds
+    """
+
+    def __init__(self, space, steps=500, base_params=None, engine="agent", end_window=END_WINDOW, base_seed=0):
+        self.space = space
+        self.names = list(space)
+        self.targets = list(TARGETS)
+        self.steps = steps
+        self.base_params = dict(base_params or {})
+        self.engine = engine
+        self.end_window = end_window
+        self.base_seed = base_seed
+        self.points = []
+        self.x = np.empty((0, len(self.names)))
+        self.y = np.empty((0, len(self.targets)))
+        self.theta = None
+        self.rounds = 0
+        ranges = np.array([self.value_range(name) for name in self.names], dtype=np.float64).reshape(-1, 2)
+        # A parameter with a single value sits at 0.5, where snap() puts it
+        single = ranges[:, 1] <= ranges[:, 0]
+        self._spans = np.where(single, 1.0, ranges[:, 1] - ranges[:, 0])
+        self._lows = np.where(single, ranges[:, 0] - 0.5, ranges[:, 0])
+
+    # --- ENCODING ---
+
+    def value_range(self, name):
+        """(low, high) of a parameter of the space"""
+        spec = self.space[name]
+        if "levels" in spec:
+            return min(spec["levels"]), max(spec["levels"])
+        return spec["low"], spec["high"]
+
+    def encode(self, points):
+        """(n, d) unit-cube coordinates of parameter dictionaries"""
+        values = np.array([[point[name] for name in self.names] for point in points], dtype=np.float64)
+        return (values.reshape(-1, len(self.names)) - self._lows) / self._spans
+
+    def decode(self, unit):
+        """Parameter dictionaries for unit-cube rows, snapped as by snap()"""
+        unit = self.snap(unit)
+        columns = {}
+        for j, name in enumerate(self.names):
+            spec = self.space[name]
+            low, high = self.value_range(name)
+            values = low + unit[:, j] * (high - low)
+            if "levels" in spec:
+                levels = sorted(spec["levels"])
+                columns[name] = [min(levels, key=lambda level: abs(level - v)) for v in values]
+            elif all(float(v).is_integer() for v in (low, high, spec["step"] or 1)):
+                columns[name] = [int(round(v)) for v in values]
+            else:
+                columns[name] = [round(float(v), 10) for v in values]
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def snap(self, unit):
+        """Move unit-cube rows onto each parameter's step grid or levels"""
+        unit = np.array(unit, dtype=np.float64)
+        for j, name in enumerate(self.names):
+            spec = self.space[name]
+            low, high = self.value_range(name)
+            if high <= low:
+                unit[:, j] = 0.5
+            elif "levels" in spec:
+                levels = (np.sort(np.array(spec["levels"], dtype=np.float64)) - low) / (high - low)
+                unit[:, j] = levels[np.minimum((unit[:, j] * len(levels)).astype(int), len(levels) - 1)]
+            elif spec.get("step"):
+                grid = spec["step"] / (high - low)
+                unit[:, j] = np.clip(np.round(unit[:, j] / grid) * grid, 0.0, 1.0)
+        return unit
+
+    def params_for(self, point):
+        """Full model parameters of a design point"""
+        return {**self.base_params, **point}
+
+    # --- TRAINING DATA ---
+
+    def add_runs(self, points, values):
+        """
+        Add training runs
+
+        Args:
+            points: Parameter dictionaries (the space's parameters)
+            values: (n, targets) array, or dictionaries of target values
+        """
+        if len(points) and isinstance(values[0], dict):
+            values = [[row[name] for name in self.targets] for row in values]
+        self.points += [dict(point) for point in points]
+        self.x = np.vstack([self.x, self.encode(points)])
+        self.y = np.vstack([self.y, np.asarray(values, dtype=np.float64).reshape(len(points), len(self.targets))])
+
+    def simulate(self, points, replicates=1, workers=1):
+        """
+        Run every point `replicates` times and add the runs as training data
+
+        Run i of the surrogate (counting earlier ones) is seeded with
+        derive_seed(base_seed, i), so retraining reproduces the same runs.
+        """
+        first = len(self.points)
+        jobs = [(first + i, {**self.params_for(point), "seed": derive_seed(self.base_seed, first + i)})
+                for i, point in enumerate(point for point in points for _ in range(replicates))]
+        results = {}
+        for index, model_data, _ in iter_experiments(iter(jobs), self.steps, workers=workers, engine=self.engine,
+                                                     total=len(jobs)):
+            results[index] = end_metrics(model_data, self.end_window)
+        self.add_runs([point for point in points for _ in range(replicates)],
+                      [results[index] for index, _ in jobs])
+
+    # --- FITTING ---
+
+    def fit(self, restarts=3):
+        """Fit each target's hyperparameters to the training data, then factorize"""
+        self.y_mean = self.y.mean(axis=0)
+        self.y_std = self.y.std(axis=0)
+        self.y_std[self.y_std == 0] = 1.0
+        scaled = (self.y - self.y_mean) / self.y_std
+        self.theta = np.array([fit_hyperparameters(self.x, scaled[:, t], restarts, seed=t)
+                               for t in range(len(self.targets))])
+        self._factorize()
+        return self
+
+    def _factorize(self):
+        """Stacked per-target arrays for prediction"""
+        d = len(self.names)
+        self._inv_lengths = np.exp(-self.theta[:, :d])
+        self._signal = np.exp(self.theta[:, d])
+        self._noise = np.exp(self.theta[:, d + 1])
+        self._scaled_x = self.x[None, :, :] * self._inv_lengths[:, None, :]
+        self._scaled_x_t = np.swapaxes(self._scaled_x, 1, 2).copy()
+        self._sq_norms = (self._scaled_x ** 2).sum(axis=2)[:, None, :]
+        kernel = _matern(_sq_distances(self._scaled_x, self._scaled_x), self._signal[:, None, None])
+        kernel += self._noise[:, None, None] * np.eye(len(self.x))
+        self._inverse = np.linalg.inv(kernel)
+        scaled = ((self.y - self.y_mean) / self.y_std).T
+        self._alpha = np.einsum("tij,tj->ti", self._inverse, scaled)
+
+    # --- PREDICTION ---
+
+    def predict_unit(self, unit, return_std=True):
+        """
+        Predictions at unit-cube rows
+
+        Returns:
+            (m, targets) array of means, plus the (m, targets) standard
+            deviations of the expected value when return_std is set
+        """
+        unit = np.atleast_2d(unit)
+        if len(unit) > PREDICT_BLOCK:
+            parts = [self.predict_unit(unit[i:i + PREDICT_BLOCK], return_std)
+                     for i in range(0, len(unit), PREDICT_BLOCK)]
+            if not return_std:
+                return np.vstack(parts)
+            return np.vstack([mean for mean, _ in parts]), np.vstack([std for _, std in parts])
+        # The kernel against the training inputs, per target: (targets, m, n)
+        scaled = unit[None, :, :] * self._inv_lengths[:, None, :]
+        sq = (scaled * scaled).sum(axis=2)[:, :, None] + self._sq_norms - 2.0 * (scaled @ self._scaled_x_t)
+        cross = _matern(np.maximum(sq, 0.0), self._signal[:, None, None])
+        mean = (cross @ self._alpha[:, :, None])[:, :, 0].T * self.y_std + self.y_mean
+        if not return_std:
+            return mean
+        explained = ((cross @ self._inverse) * cross).sum(axis=2).T
+        std = np.sqrt(np.maximum(self._signal - explained, 0.0)) * self.y_std
+        return mean, std
+
+    def predict(self, points, return_std=True):
+        """
+        Predicted end-of-run targets
+
+        Args:
+            points: One parameter dictionary, or a list of them (parameters
+                outside the space are ignored)
+            return_std: Add the standard deviation of each prediction
+
+        Returns:
+            For one dictionary: {target: (mean, std)} (or {target: mean});
+            for a list: DataFrame with a column per target (and {target}_std)
+        """
+        single = isinstance(points, dict)
+        unit = self.encode([points] if single else points)
+        result = self.predict_unit(unit, return_std)
+        mean, std = result if return_std else (result, None)
+        if single:
+            if not return_std:
+                return dict(zip(self.targets, mean[0].tolist()))
+            return {name: (m, s) for name, m, s in zip(self.targets, mean[0].tolist(), std[0].tolist())}
+        frame = pd.DataFrame(mean, columns=self.targets)
+        if return_std:
+            for t, name in enumerate(self.targets):
+                frame[f"{name}_std"] = std[:, t]
+        return frame
+
+    @property
+    def noise(self):
+        """Run-to-run standard deviation of each target, as fitted"""
+        return dict(zip(self.targets, (np.sqrt(self._noise) * self.y_std).tolist()))
+
+    def leave_one_out(self):
+        """
+        Leave-one-out check of the fitted emulator (closed form, no refitting)
+
+        Returns:
+            DataFrame per target: RMSE of the left-out runs, R^2 against the
+            target's variance, and the share of runs within the 95% interval
+            of their left-out prediction (replicate noise included)
+        """
+        rows = []
+        for t, name in enumerate(self.targets):
+            diagonal = np.diag(self._inverse[t])
+            residual = self._alpha[t] / diagonal * self.y_std[t]
+            sd = np.sqrt(1.0 / diagonal) * self.y_std[t]
+            variance = self.y[:, t].var()
+            rows.append({
+                "target": name,
+                "rmse": np.sqrt(np.mean(residual ** 2)),
+                "r2": 1.0 - np.mean(residual ** 2) / variance if variance > 0 else np.nan,
+                "coverage_95": np.mean(np.abs(residual) <= 1.96 * sd),
+            })
+        return pd.DataFrame(rows).set_index("target")
+
+    # --- ADAPTIVE REFINEMENT ---
+
+    def _scaled_std(self, unit, x):
+        """Mean over targets of the prediction std (in output std units) at unit rows, given inputs x"""
+        total = np.zeros(len(unit))
+        for t in range(len(self.targets)):
+            scaled_x = x * self._inv_lengths[t]
+            kernel = _matern(_sq_distances(scaled_x, scaled_x), self._signal[t]) + self._noise[t] * np.eye(len(x))
+            cross = _matern(_sq_distances(unit * self._inv_lengths[t], scaled_x), self._signal[t])
+            chol = np.linalg.cholesky(kernel)
+            v = np.linalg.solve(chol, cross.T)
+            total += np.sqrt(np.maximum(self._signal[t] - (v * v).sum(axis=0), 0.0))
+        return total / len(self.targets)
+
+    def select_points(self, n_points, candidates=1024):
+        """
+        The n_points candidates with the most uncertain predictions
+
+        Candidates are a scrambled Sobol sample, snapped to the step grid.
+        Points are chosen one at a time, each added to the inputs before the
+        next choice (the variance does not depend on the outputs), so a
+        batch spreads over the uncertain regions instead of piling into one.
+
+        Returns:
+            Tuple of (parameter dictionaries, their scaled std when chosen)
+        """
+        from scipy.stats import qmc
+        pool = self.snap(qmc.Sobol(d=len(self.names), scramble=True,
+                                   seed=derive_seed(self.base_seed, 1_000_000 + self.rounds)).random(candidates))
+        pool = np.unique(pool, axis=0)
+        x = self.x
+        chosen, scores = [], []
+        for _ in range(min(n_points, len(pool))):
+            std = self._scaled_std(pool, x)
+            best = int(np.argmax(std))
+            chosen.append(pool[best])
+            scores.append(float(std[best]))
+            x = np.vstack([x, pool[best]])
+            pool = np.delete(pool, best, axis=0)
+        return self.decode(np.array(chosen)), scores
+
+    def refine(self, n_points=8, rounds=1, candidates=1024, replicates=1, workers=1, restarts=2):
+        """
+        Add runs where the emulator is least certain, and refit
+
+        Each round selects n_points by select_points, runs them
+        `replicates` times, and refits the hyperparameters.
+
+        Returns:
+            DataFrame per round: the points added, the largest scaled std
+            among them, and the mean scaled std over the candidates after refitting
+        """
+        from scipy.stats import qmc
+        check = self.snap(qmc.Sobol(d=len(self.names), scramble=True, seed=self.base_seed + 1).random(512))
+        history = []
+        for _ in range(rounds):
+            points, scores = self.select_points(n_points, candidates)
+            print(f"\n=== Refinement round {self.rounds + 1}: {len(points)} points, max scaled std {scores[0]:.3f} ===")
+            self.simulate(points, replicates, workers)
+            self.rounds += 1
+            self.fit(restarts)
+            history.append({"round": self.rounds, "points": len(points), "max_std_selected": scores[0],
+                            "mean_std_after": float(self._scaled_std(check, self.x).mean()), "runs": len(self.x)})
+        return pd.DataFrame(history)
+
+    # --- SENSITIVITY ---
+
+    def sobol_indices(self, samples=8192, bootstrap=100, seed=0):
+        """
+        First-order and total Sobol indices of every target, from the emulator
+
+        Saltelli's estimator for the first-order index and Jansen's for the
+        total index, over samples x (parameters + 2) emulator evaluations on
+        a scrambled Sobol sample of the unit cube (snapped to the step grid).
+        Confidence intervals are 95% bootstrap percentiles over the sample rows.
+
+        Returns:
+            DataFrame indexed by (target, parameter) with S1, S1_conf, ST, ST_conf
+        """
+        from scipy.stats import qmc
+        d = len(self.names)
+        sample = qmc.Sobol(d=2 * d, scramble=True, seed=seed).random(samples)
+        a, b = self.snap(sample[:, :d]), self.snap(sample[:, d:])
+        mixed = np.repeat(a[None], d, axis=0)
+        for j in range(d):
+            mixed[j, :, j] = b[:, j]
+        values = self.predict_unit(np.vstack([a, b, mixed.reshape(-1, d)]), return_std=False)
+        # Centered outputs: the first-order estimator's variance grows with the mean
+        values = values - values[:2 * samples].mean(axis=0)
+        f_a, f_b = values[:samples], values[samples:2 * samples]
+        f_mixed = values[2 * samples:].reshape(d, samples, -1)
+
+        def estimate(rows):
+            variance = np.concatenate([f_a[rows], f_b[rows]]).var(axis=0)
+            variance[variance == 0] = np.nan
+            first = np.mean(f_b[rows][None] * (f_mixed[:, rows] - f_a[rows][None]), axis=1) / variance
+            total = 0.5 * np.mean((f_a[rows][None] - f_mixed[:, rows]) ** 2, axis=1) / variance
+            return first, total
+
+        first, total = estimate(np.arange(samples))
+        rng = np.random.default_rng(seed)
+        draws = [estimate(rng.integers(0, samples, samples)) for _ in range(bootstrap)]
+        rows = []
+        for t, target in enumerate(self.targets):
+            for j, name in enumerate(self.names):
+                row = {"target": target, "parameter": name, "S1": first[j, t], "ST": total[j, t]}
+                if draws:
+                    for key, k in (("S1", 0), ("ST", 1)):
+                        spread = np.percentile([draw[k][j, t] for draw in draws], [2.5, 97.5])
+                        row[f"{key}_conf"] = (spread[1] - spread[0]) / 2
+                rows.append(row)
+        return pd.DataFrame(rows).set_index(["target", "parameter"])
+
+    # --- FILES ---
+
+    def save(self, path):
+        """Save the training data and fitted hyperparameters (a compressed .npz archive)"""
+        header = {
+            "version": FORMAT_VERSION, "space": self.space, "targets": self.targets, "steps": self.steps,
+            "base_params": self.base_params, "engine": self.engine, "end_window": self.end_window,
+            "base_seed": self.base_seed, "rounds": self.rounds, "points": self.points,
+        }
+        payload = {"header": np.frombuffer(json.dumps(header).encode(), dtype=np.uint8),
+                   "x": self.x, "y": self.y, "theta": self.theta, "y_mean": self.y_mean, "y_std": self.y_std}
+        partial = f"{os.fspath(path)}.partial"
+        with open(partial, "wb") as handle:
+            np.savez_compressed(handle, **payload)
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a surrogate saved with save(), ready to predict
+
+        Raises:
+            ValueError: If the file is from another format version or targets
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            header = json.loads(archive["header"].tobytes())
+            arrays = {name: archive[name] for name in ("x", "y", "theta", "y_mean", "y_std")}
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported surrogate version {header.get('version')}")
+        if header["targets"] != list(TARGETS):
+            raise ValueError(f"Surrogate predicts {header['targets']}, expected {list(TARGETS)}")
+        surrogate = cls(header["space"], header["steps"], header["base_params"], header["engine"],
+                        header["end_window"], header["base_seed"])
+        surrogate.points = header["points"]
+        surrogate.rounds = header["rounds"]
+        for name, value in arrays.items():
+            setattr(surrogate, name, value)
+        surrogate._factorize()
+        return surrogate
+
+    def defaults(self):
+        """Every model parameter's value in training runs (the space's at EvolutionaryModel's defaults)"""
+        return {**model_defaults(), **self.base_params}
+
+    def fixed_params(self):
+        """Parameters every training run held fixed, with their values"""
+        return {name: value for name, value in self.defaults().items() if name not in self.space and name != "seed"}
+
+def train(names, n_points=64, replicates=1, steps=500, bounds=None, base_params=None, design="sobol",
+          engine="agent", workers=1, base_seed=0, refine_points=0, refine_rounds=0, restarts=3):
+    """
+    Train a surrogate on a space-filling design, then optionally refine it
+
+    Args:
+        names: Parameters to vary (ranges from constants.PARAM_SPECS)
+        n_points: Initial design points
+        replicates: Runs per design point
+        steps: Steps per run
+        bounds: Range overrides (see sweep.param_space)
+        base_params: Fixed parameters of every run
+        design: "sobol" or "lhs"
+        engine: Key into batch_run.ENGINES
+        workers: Worker processes for the runs
+        base_seed: Seed of the design and of the runs
+        refine_points: Points added per refinement round
+        refine_rounds: Refinement rounds after the initial fit
+        restarts: Optimizer starts per target
+
+    Returns:
+        The fitted Surrogate
+    """
+    space = param_space(names, bounds)
+    surrogate = Surrogate(space, steps, base_params, engine, base_seed=base_seed)
+    points = build_design(space, design, n_points, seed=base_seed)
+    print(f"\n=== Surrogate: {len(points)} {design} points x {replicates} replicates, {steps} steps ===")
+    surrogate.simulate(points, replicates, workers)
+    surrogate.fit(restarts)
+    if refine_points and refine_rounds:
+        print(surrogate.refine(refine_points, refine_rounds, replicates=replicates, workers=workers,
+                               restarts=restarts).to_string(index=False))
+    return surrogate
+
+def time_prediction(surrogate, repeats=2000):
+    """Mean seconds per single-point predict() call, uncertainty included"""
+    point = surrogate.decode(np.full((1, len(surrogate.names)), 0.5))[0]
+    surrogate.predict(point)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        surrogate.predict(point)
+    return (time.perf_counter() - start) / repeats
+
+def print_report(surrogate):
+    print(f"\n{len(surrogate.x)} runs over {', '.join(surrogate.names)}; {surrogate.steps} steps, "
+          f"targets averaged over the last {surrogate.end_window}")
+    print("\nLeave-one-out check:")
+    print(surrogate.leave_one_out().to_string(float_format=lambda v: f"{v:.4g}"))
+    print(f"\nPrediction: {time_prediction(surrogate) * 1e6:.0f} us per point, uncertainty included")
+
+# ==========================================
+# MAIN
+# ==========================================
+
+def _parse_values(items):
+    values = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        values[name] = json.loads(value)
+    return values
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Adoption Simulator surrogate emulator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    training = commands.add_parser("train", help="run a design and fit a surrogate")
+    training.add_argument("path", help="surrogate file to write")
+    training.add_argument("params", help="comma-separated parameters to vary (ranges from PARAM_SPECS)")
+    training.add_argument("--points", type=int, default=64, help="initial design points")
+    training.add_argument("--design", default="sobol", choices=["sobol", "lhs"])
+    training.add_argument("--replicates", type=int, default=1)
+    training.add_argument("--steps", type=int, default=500)
+    training.add_argument("--engine", default="agent", choices=["agent", "vectorized", "synchronous", "meanfield"])
+    training.add_argument("--workers", type=int, default=1)
+    training.add_argument("--seed", type=int, default=0)
+    training.add_argument("--refine", type=int, default=0, help="points per refinement round")
+    training.add_argument("--rounds", type=int, default=1, help="refinement rounds")
+    training.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                          help="fixed parameter of every run (repeatable)")
+
+    refining = commands.add_parser("refine", help="add runs where the surrogate is least certain")
+    refining.add_argument("path")
+    refining.add_argument("--points", type=int, default=8)
+    refining.add_argument("--rounds", type=int, default=1)
+    refining.add_argument("--replicates", type=int, default=1)
+    refining.add_argument("--workers", type=int, default=1)
+
+    predicting = commands.add_parser("predict", help="predict the targets at one point")
+    predicting.add_argument("path")
+    predicting.add_argument("values", nargs="*", metavar="NAME=VALUE")
+
+    sensitivity = commands.add_parser("sobol", help="Sobol sensitivity indices from the surrogate")
+    sensitivity.add_argument("path")
+    sensitivity.add_argument("--samples", type=int, default=8192)
+
+    checking = commands.add_parser("report", help="leave-one-out check and prediction time")
+    checking.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        names = [name.strip() for name in args.params.split(",") if name.strip()]
+        unknown = [name for name in names if name not in PARAM_SPECS]
+        if unknown:
+            parser.error(f"no slider range for {unknown}")
+        surrogate = train(names, args.points, args.replicates, args.steps, base_params=_parse_values(args.param),
+                          design=args.design, engine=args.engine, workers=args.workers, base_seed=args.seed,
+                          refine_points=args.refine, refine_rounds=args.rounds if args.refine else 0)
+        surrogate.save(args.path)
+        print_report(surrogate)
+        print(f"\nSurrogate saved: {args.path}")
+        return 0
+
+    surrogate = Surrogate.load(args.path)
+    if args.command == "refine":
+        print(surrogate.refine(args.points, args.rounds, replicates=args.replicates,
+                               workers=args.workers).to_string(index=False))
+        surrogate.save(args.path)
+        print_report(surrogate)
+    elif args.command == "predict":
+        point = {**surrogate.defaults(), **_parse_values(args.values)}
+        print(", ".join(f"{name}={point[name]}" for name in surrogate.names))
+        for name, (mean, std) in surrogate.predict(point).items():
+            print(f"  {name:<18} {mean:12.4g} +/- {2 * std:.3g}")
+    elif args.command == "sobol":
+        print(surrogate.sobol_indices(args.samples).to_string(float_format=lambda v: f"{v:.3f}"))
+    else:
+        print_report(surrogate)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
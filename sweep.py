@@ -0,0 +1,251 @@
+"""
+Parameter sweeps for AI Adoption Simulator
+Expand parameter ranges into experimental designs, run every design point
+with replicates, and aggregate per-step mean / confidence-interval tables
+"""
+
+from batch_run import STOP_COLUMNS, derive_seed, iter_experiments
+from results import experiment_params
+from constants import PARAM_SPECS
+import itertools
+import numpy as np
+import pandas as pd
+
+DESIGNS = ("factorial", "lhs", "sobol")
+
+# ==========================================
+# PARAMETER SPACE
+# ==========================================
+
+def param_space(names, bounds=None):
+    """
+    Build a sweep space for the given EvolutionaryModel parameters
+
+    Bounds default to the slider ranges in constants.PARAM_SPECS. Each entry of
+    `bounds` overrides one parameter with a (low, high) or (low, high, step)
+    tuple, or with an explicit list of levels.
+
+    Args:
+        names: Parameter names to vary
+        bounds: Optional dictionary of per-parameter overrides
+
+    Returns:
+        Dictionary mapping each name to {"low", "high", "step"} or {"levels"}
+    """
+    bounds = bounds or {}
+    space = {}
+    for name in names:
+        if name in bounds and isinstance(bounds[name], list):
+            space[name] = {"levels": list(bounds[name])}
+            continue
+        if name in bounds:
+            low, high, *rest = bounds[name]
+            step = rest[0] if rest else (PARAM_SPECS[name][4] if name in PARAM_SPECS else None)
+        elif name in PARAM_SPECS:
+            _, _, low, high, step = PARAM_SPECS[name]
+        else:
+            raise ValueError(f"No bounds for '{name}': pass them in bounds=")
+        if low > high:
+            raise ValueError(f"Lower bound above upper bound for '{name}'")
+        space[name] = {"low": low, "high": high, "step": step}
+    return space
+
+def _snap(spec, u):
+    """Map unit-interval samples onto a parameter's range, on its step grid"""
+    if "levels" in spec:
+        levels = spec["levels"]
+        picks = np.minimum((u * len(levels)).astype(int), len(levels) - 1)
+        return [levels[i] for i in picks]
+
+    low, high, step = spec["low"], spec["high"], spec["step"]
+    values = low + u * (high - low)
+    if step:
+        values = low + np.round((values - low) / step) * step
+        values = np.clip(values, low, high)
+    if all(float(v).is_integer() for v in (low, high, step or 1)):
+        return [int(round(v)) for v in values]
+    return [round(float(v), 10) for v in values]
+
+# ==========================================
+# DESIGNS
+# ==========================================
+
+def full_factorial(space, levels=5):
+    """
+    Every combination of per-parameter levels
+
+    Args:
+        space: Output of param_space
+        levels: Number of evenly spaced levels per ranged parameter
+
+    Returns:
+        List of parameter dictionaries
+    """
+    axes = []
+    for name, spec in space.items():
+        if "levels" in spec:
+            axes.append(spec["levels"])
+        else:
+            u = np.linspace(0.0, 1.0, levels) if levels > 1 else np.array([0.5])
+            axes.append(list(dict.fromkeys(_snap(spec, u))))
+    return [dict(zip(space, combo)) for combo in itertools.product(*axes)]
+
+def latin_hypercube(space, n_points, seed=0):
+    """Latin-hypercube sample of n_points design points"""
+    from scipy.stats import qmc
+    sample = qmc.LatinHypercube(d=len(space), seed=seed).random(n_points)
+    return _points_from_unit(space, sample)
+
+def sobol_design(space, n_points, seed=0):
+    """Scrambled Sobol sample of n_points design points (best with a power of two)"""
+    from scipy.stats import qmc
+    sample = qmc.Sobol(d=len(space), scramble=True, seed=seed).random(n_points)
+    return _points_from_unit(space, sample)
+
+def _points_from_unit(space, sample):
+    columns = {name: _snap(spec, sample[:, j]) for j, (name, spec) in enumerate(space.items())}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def build_design(space, design="factorial", n_points=None, levels=5, seed=0):
+    """Expand a space with the named design ("factorial", "lhs" or "sobol")"""
+    if design == "factorial":
+        return full_factorial(space, levels)
+    if n_points is None:
+        raise ValueError(f"The '{design}' design needs n_points")
+    if design == "lhs":
+        return latin_hypercube(space, n_points, seed)
+    if design == "sobol":
+        return sobol_design(space, n_points, seed)
+    raise ValueError(f"Unknown design '{design}', expected one of {DESIGNS}")
+
+# ==========================================
+# AGGREGATION
+# ==========================================
+
+class ReplicateStats:
+    """
+    Running per-point, per-step mean and variance (Welford's algorithm)
+
+    Memory grows with design points x steps x columns, never with the number
+    of replicate runs.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.count = {}
+        self.mean = {}
+        self.m2 = {}
+
+    def add(self, point_id, model_data):
+        values = model_data[self.columns].to_numpy(dtype=float)
+        if point_id not in self.count:
+            self.count[point_id] = 0
+            self.mean[point_id] = np.zeros_like(values)
+            self.m2[point_id] = np.zeros_like(values)
+
+        # Runs of different length (e.g. stopped early) align on the shared prefix
+        rows = min(len(values), len(self.mean[point_id]))
+        values = values[:rows]
+        mean, m2 = self.mean[point_id][:rows], self.m2[point_id][:rows]
+
+        self.count[point_id] += 1
+        delta = values - mean
+        mean += delta / self.count[point_id]
+        m2 += delta * (values - mean)
+        self.mean[point_id], self.m2[point_id] = mean, m2
+
+    def summary(self, confidence=0.95):
+        """Long table: one row per (point_id, Step) with mean and CI bounds per column"""
+        from scipy.stats import t
+        frames = []
+        for point_id in sorted(self.count):
+            n = self.count[point_id]
+            mean = self.mean[point_id]
+            if n > 1:
+                sem = np.sqrt(self.m2[point_id] / (n - 1) / n)
+                half = t.ppf(0.5 + confidence / 2, n - 1) * sem
+            else:
+                half = np.full_like(mean, np.nan)
+
+            frame = pd.DataFrame({"point_id": point_id, "Step": np.arange(len(mean)), "n": n})
+            for j, column in enumerate(self.columns):
+                frame[f"{column}_mean"] = mean[:, j]
+                frame[f"{column}_ci_low"] = mean[:, j] - half[:, j]
+                frame[f"{column}_ci_high"] = mean[:, j] + half[:, j]
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+# ==========================================
+# SWEEP RUNNER
+# ==========================================
+
+def run_sweep(space, design="factorial", n_points=None, levels=5, replicates=5,
+              steps=500, base_params=None, columns=None, base_seed=0,
+              workers=1, batch_size=None, engine="agent", confidence=0.95, writer=None):
+    """
+    Run every design point `replicates` times and aggregate per-step statistics
+
+    Runs are generated lazily and at most batch_size of them are in flight at
+    once; each finished run is folded into the running statistics and dropped.
+    Run r of the sweep is seeded with derive_seed(base_seed, r), so results are
+    reproducible whatever the worker count (up to float rounding, since runs
+    are folded in completion order).
+
+    Args:
+        space: Output of param_space
+        design: "factorial", "lhs" or "sobol"
+        n_points: Number of design points (lhs and sobol)
+        levels: Levels per parameter (factorial)
+        replicates: Runs per design point
+        steps: Number of steps per run
+        base_params: Fixed parameters shared by every run
+        columns: DataCollector columns to aggregate (defaults to every reporter,
+            plus `padded`, whose mean is the share of runs stopped by that step)
+        base_seed: Seed for the design and for per-run seeds
+        workers: Number of worker processes (1 runs serially, None uses every core)
+        batch_size: Cap on runs in flight (defaults to 2 per worker)
+        engine: Key into batch_run.ENGINES selecting the simulation engine
+        confidence: Confidence level of the reported intervals
+        writer: results.ResultWriter that also keeps every run, as experiment
+            `run` with its point_id among the parameters
+
+    Returns:
+        Tuple of (design, summary) DataFrames: the design points indexed by
+        point_id, and per-step mean / CI bounds for every point
+    """
+    points = build_design(space, design, n_points, levels, seed=base_seed)
+    base_params = dict(base_params or {})
+    total = len(points) * replicates
+
+    def jobs():
+        for run in range(total):
+            point_id = run // replicates
+            params = {**base_params, **points[point_id], "seed": derive_seed(base_seed, run)}
+            yield run, params
+
+    print(f"\n=== Sweep: {len(points)} {design} points x {replicates} replicates = {total} runs ===")
+    stats = None
+    for run, model_data, _ in iter_experiments(jobs(), steps, workers=workers, engine=engine,
+                                               max_pending=batch_size, total=total):
+        if stats is None:
+            stats = ReplicateStats(columns or [c for c in model_data.columns
+                                               if not c.startswith("param_") and c not in STOP_COLUMNS])
+        stats.add(run // replicates, model_data)
+        if writer is not None:
+            writer.write(run, model_data, params={**experiment_params(model_data), "point_id": run // replicates})
+
+    design_frame = pd.DataFrame(points).rename_axis("point_id")
+    return design_frame, stats.summary(confidence)
+
+# ==========================================
+# MAIN
+# ==========================================
+
+if __name__ == "__main__":
+    # Example: robot tax x UBI share grid, 5 replicates per point
+    space = param_space(["robot_tax_rate", "ubi_class_tax_share"])
+    design, summary = run_sweep(space, design="factorial", levels=3, replicates=5, steps=300,
+                                base_params={"initial_ubi_fraction": 0.2, "seeds_automated": 50},
+                                columns=["Alive", "Displaced", "UBI (Opt-Out)", "Wealth_Capital"])
+    print(design)
+    print(summary[summary["Step"] == summary["Step"].max()])
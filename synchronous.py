@@ -0,0 +1,151 @@
+"""
+Synchronous tiled engine for AI Adoption Simulator
+Updates every agent against the same buffers, so the neighborhood stencils of
+a step can be split into grid tiles and evaluated on several cores at once
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from streams import COUNTER
+from vectorized_model import VectorizedEvolutionaryModel
+
+# Halo of a tile: the radius of the widest stencil (the radius-2 square)
+HALO = 2
+
+# Default number of tiles (strips of grid columns) the stencils are split into
+DEFAULT_TILES = 16
+
+
+class SynchronousEvolutionaryModel(VectorizedEvolutionaryModel):
+    """
+    Double-buffered synchronous schedule for the EvolutionaryModel rules
+
+    RandomActivation updates agents one at a time, each seeing everything the
+    agents before it did, so a step is inherently serial. Here each phase of
+    a step (rehire, move, merge, work) updates all its agents at once: every
+    agent reads the occupancy grids and states left by the previous phase and
+    its changes are written to the state arrays, which the next phase reads.
+    This is VectorizedEvolutionaryModel with a single activation batch and
+    counter-based draws, so no result depends on evaluation order.
+
+    Conflicts are resolved deterministically:
+        moves: movers claiming the same free cell are ranked by their move
+            priority draw, then by unique_id; losers retry against the
+            updated grid (MOVE_ROUNDS rounds)
+        merges: robots claiming the same target the same way; a robot that
+            is absorbed this step cannot absorb another one
+        robot spawns: new robots are numbered in their creators' unique_id
+            order, join at the creator's cell and first act next step
+
+    The stencils that dominate a large step (the free Moore cells of every
+    mover and the radius-2 counts around every worker) are evaluated per
+    tile. The torus is split into `tiles` strips of columns; each tile reads
+    a slab of the occupancy grid holding its own columns plus a HALO-wide
+    halo on every side, wrapped across the grid edges. Slabs are views into
+    one padded grid, so building them copies nothing, and tiles run on a
+    pool of `workers` threads (NumPy releases the GIL in the gathers and
+    reductions). Each tile's results are written back to its agents' rows,
+    so a run is identical for every `tiles` and `workers` setting, and with
+    both at 1 it matches VectorizedEvolutionaryModel(activation_batches=1,
+    rng_mode="counter") exactly.
+
+    Args:
+        tiles: Number of column strips (at most the grid width)
+        workers: Threads evaluating tiles (1 evaluates them in the calling thread)
+        **kwargs: VectorizedEvolutionaryModel parameters; activation_batches
+            and rng_mode are fixed to 1 and "counter"
+
+    Raises:
+        ValueError: If activation_batches or rng_mode is given another value
+    """
+
+    def __init__(self, *args, tiles=DEFAULT_TILES, workers=1, **kwargs):
+        if kwargs.setdefault("activation_batches", 1) != 1:
+            raise ValueError("SynchronousEvolutionaryModel updates all agents in one batch (activation_batches=1)")
+        if kwargs.setdefault("rng_mode", COUNTER) != COUNTER:
+            raise ValueError(f"SynchronousEvolutionaryModel requires rng_mode='{COUNTER}'")
+        super().__init__(*args, **kwargs)
+        self.tiles = tiles
+        self.workers = workers
+        self._pool = None
+        self._pool_size = 0
+
+        # Stencil offsets as flat steps in a padded slab
+        padded_height = self.height + 2 * HALO
+        self._r1_slab = self._r1[0] * padded_height + self._r1[1]
+        self._r2_slab = self._r2[0] * padded_height + self._r2[1]
+
+    # --- TILES ---
+
+    def _map(self, func, tasks):
+        """func(task) for every task, on the worker pool when workers > 1"""
+        if self.workers <= 1 or len(tasks) <= 1:
+            return [func(task) for task in tasks]
+        if self._pool_size != self.workers:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+            self._pool_size = self.workers
+        return list(self._pool.map(func, tasks))
+
+    def close(self):
+        """Shut down the tile worker threads (a later step with workers > 1 starts new ones)"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_size = 0
+
+    def _tiled_stencil(self, cells, grids, offsets, reduce):
+        """
+        Evaluate a stencil over several occupancy grids, tile by tile
+
+        Args:
+            cells: Flat cell of each agent
+            grids: Flat (width * height) per-cell grids
+            offsets: Flat slab offsets of the stencil (_r1_slab or _r2_slab)
+            reduce: Applied to each (n, len(offsets)) block of gathered values
+
+        Returns:
+            One array per grid, reduce() of the values around every cell, in
+            the order of `cells`
+        """
+        tiles = max(1, min(int(self.tiles), self.width))
+        padded_height = self.height + 2 * HALO
+        padded = [np.pad(grid.reshape(self.width, self.height), HALO, mode="wrap") for grid in grids]
+
+        # Tile t holds columns [starts[t], starts[t + 1])
+        x = cells // self.height
+        tile = x * tiles // self.width
+        if tiles < 2 ** 15:
+            # Stable argsort of 16-bit keys is a radix sort
+            tile = tile.astype(np.int16)
+        starts = (np.arange(tiles + 1) * self.width + tiles - 1) // tiles
+        order = np.argsort(tile, kind="stable")
+        bounds = np.searchsorted(tile[order], np.arange(tiles + 1))
+
+        def run(t):
+            rows = order[bounds[t]:bounds[t + 1]]
+            local = ((x[rows] - starts[t] + HALO) * padded_height
+                     + cells[rows] % self.height + HALO)
+            gather = local[:, None] + offsets[None, :]
+            return [reduce(grid[starts[t]:starts[t + 1] + 2 * HALO].reshape(-1)[gather]) for grid in padded]
+
+        results = self._map(run, range(tiles))
+        outputs = []
+        for g in range(len(grids)):
+            merged = np.concatenate([result[g] for result in results])
+            output = np.empty_like(merged)
+            output[order] = merged
+            outputs.append(output)
+        return outputs
+
+    # --- STENCILS ---
+
+    def _free_options(self, movers, blocking):
+        free, = self._tiled_stencil(self.cell[movers], [blocking], self._r1_slab, lambda v: v == 0)
+        return free
+
+    def _square_counts(self, workers, aug_grid, auto_grid):
+        n_augmented, n_automated = self._tiled_stencil(
+            self.cell[workers], [aug_grid, auto_grid], self._r2_slab, lambda v: v.sum(axis=1))
+        return n_augmented, n_automated
@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import batch_run
+from batch_run import run_batch_experiments
+
+def test_batch_keeps_a_bounded_number_of_experiments_pending(tmp_path, monkeypatch):
+    submitted, reported, backlog = [], [0], []
+
+    class TrackingExecutor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            submitted.append(args[1])
+            backlog.append(len(submitted) - reported[0])
+            return super().submit(*args, **kwargs)
+
+    monkeypatch.setattr(batch_run, "ProcessPoolExecutor", TrackingExecutor)
+    monkeypatch.setattr(batch_run, "_report_progress", lambda done, *args: reported.__setitem__(0, done))
+
+    variations = [{"N": 60, "robot_tax_rate": rate / 10} for rate in range(10)]
+    model_data, _ = run_batch_experiments(variations, steps=3, output_dir=str(tmp_path), workers=2, base_seed=1)
+
+    assert sorted(submitted) == list(range(10))
+    assert max(backlog) <= 4
+    assert model_data["experiment_id"].unique().tolist() == list(range(10))
@@ -0,0 +1,21 @@
+from benchmark import compare_to_baseline, median_result
+
+def result(steps_per_sec, p50, p99, rss=100.0, collector=1e5):
+    return {"steps": 300, "steps_per_sec": steps_per_sec, "latency_p50_ms": p50, "latency_p99_ms": p99,
+            "peak_rss_mb": rss, "collector_bytes": collector, "phases": {"id": steps_per_sec}}
+
+def test_median_of_repeats():
+    merged = median_result([result(100, 9.0, 20.0), result(300, 3.0, 9.0), result(250, 4.0, 60.0)])
+
+    assert merged["steps_per_sec"] == 250 and merged["latency_p99_ms"] == 20.0
+    assert merged["steps"] == 300 and merged["repeats"] == 3
+    assert merged["phases"] == {"id": 250}
+
+def test_jitter_below_the_noise_floor_is_not_a_regression():
+    baseline = {"results": {"case": result(1000, 1.0, 4.0)}}
+
+    # 30-40% worse, but by less than 0.5 ms per step and 2 ms of p99 latency
+    assert compare_to_baseline({"case": result(700, 1.3, 5.5)}, baseline, threshold=0.25) == []
+    regressions = compare_to_baseline({"case": result(400, 2.5, 9.0, rss=200.0)}, baseline)
+    assert [line.split(":")[0] for line in regressions] == [
+        "case/steps_per_sec", "case/latency_p50_ms", "case/latency_p99_ms", "case/peak_rss_mb"]
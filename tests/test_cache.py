@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+
+from batch_run import run_single_experiment
+from cache import ResultCache, cache_key
+from model import MODEL_REPORTERS
+
+PARAMS = {"seed": 11, "N": 120, "seeds_automated": 20}
+
+def run(steps, cache, tmp_path):
+    model_data, _ = run_single_experiment(PARAMS, steps=steps, output_dir=str(tmp_path), verbose=False,
+                                          cache=cache)
+    return model_data[[column for column in model_data.columns if column in MODEL_REPORTERS]]
+
+def test_hit_returns_the_stored_run(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    first = run(15, cache, tmp_path)
+
+    path, cached_steps = cache.lookup("agent", PARAMS, 15)
+    second = run(15, cache, tmp_path)
+
+    assert cached_steps == 15 and os.path.exists(path)
+    pd.testing.assert_frame_equal(second, first)
+
+def test_longer_run_continues_from_a_cached_prefix(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    run(10, cache, tmp_path)
+
+    continued = run(25, cache, tmp_path)
+
+    pd.testing.assert_frame_equal(continued, run(25, None, tmp_path))
+    assert cache.lookup("agent", PARAMS, 30)[1] == 25
+    assert cache.lookup("agent", PARAMS, 20)[1] == 10
+
+def test_unseeded_runs_and_other_params_miss(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    run(10, cache, tmp_path)
+
+    assert cache.lookup("agent", {**PARAMS, "seed": None}, 10) == (None, 0)
+    assert cache.lookup("agent", {**PARAMS, "N": 121}, 10) == (None, 0)
+    assert cache.lookup("vectorized", PARAMS, 10) == (None, 0)
+    assert cache_key("agent", PARAMS) != cache_key("agent", {**PARAMS, "seed": 12})
+
+def test_eviction_drops_the_least_recently_used_entry(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    run(5, cache, tmp_path)
+    run(10, cache, tmp_path)
+    oldest, _ = cache.lookup("agent", PARAMS, 5)
+    newest, _ = cache.lookup("agent", PARAMS, 10)
+    os.utime(oldest, (1, 1))
+
+    cache.max_bytes = os.path.getsize(newest)
+    removed = cache.evict()
+
+    assert removed == 1
+    assert not os.path.exists(oldest) and os.path.exists(newest)
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from batch_run import ENGINES, run_branched_experiments, run_single_experiment
+from model import MODEL_REPORTERS
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_restored_model_continues_exactly(engine, tmp_path):
+    path = tmp_path / "run.ckpt"
+    model = ENGINES[engine](seed=5, robot_tax_rate=0.3, initial_ubi_fraction=0.1)
+    for _ in range(30):
+        model.step()
+    model.checkpoint(path)
+    for _ in range(30):
+        model.step()
+
+    restored = ENGINES[engine].restore(path)
+    for _ in range(30):
+        restored.step()
+
+    pd.testing.assert_frame_equal(restored.datacollector.get_model_vars_dataframe(),
+                                  model.datacollector.get_model_vars_dataframe())
+
+def test_restore_overrides_parameters(tmp_path):
+    path = tmp_path / "run.ckpt"
+    model = ENGINES["agent"](seed=5)
+    for _ in range(10):
+        model.step()
+    model.checkpoint(path)
+
+    branch = ENGINES["agent"].restore(path, robot_tax_rate=0.5)
+
+    assert branch.robot_tax_rate == 0.5
+    assert branch._steps == model._steps
+
+def test_branch_without_overrides_matches_an_uninterrupted_run(tmp_path):
+    params = {"seed": 8, "N": 150, "seeds_automated": 30}
+    expected, _ = run_single_experiment(params, steps=25, output_dir=str(tmp_path), verbose=False)
+
+    branched, _ = run_branched_experiments(params, [{}], prefix_steps=10, steps=25, output_dir=str(tmp_path))
+
+    columns = [column for column in expected.columns if column in MODEL_REPORTERS]
+    pd.testing.assert_frame_equal(branched[columns].reset_index(drop=True),
+                                  expected[columns].reset_index(drop=True))
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path):
+    params = {"seed": 8, "N": 150}
+    path = str(tmp_path / "run.ckpt")
+    expected, _ = run_single_experiment(params, steps=30, output_dir=str(tmp_path), verbose=False)
+
+    run_single_experiment(params, steps=12, output_dir=str(tmp_path), verbose=False, checkpoint_path=path)
+    resumed, _ = run_single_experiment(params, steps=30, output_dir=str(tmp_path), verbose=False,
+                                       checkpoint_path=path)
+
+    columns = [column for column in expected.columns if column in MODEL_REPORTERS]
+    pd.testing.assert_frame_equal(resumed[columns].reset_index(drop=True),
+                                  expected[columns].reset_index(drop=True))
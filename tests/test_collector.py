@@ -0,0 +1,59 @@
+import mesa
+import numpy as np
+import pandas as pd
+import pytest
+
+from collector import ColumnarDataCollector
+from model import MODEL_REPORTERS, EvolutionaryModel
+
+class Counter:
+    def __init__(self):
+        self._steps = 0
+
+def test_matches_mesa_data_collector():
+    model = EvolutionaryModel(seed=2, N=120, initial_ubi_fraction=0.2, robot_tax_rate=0.5)
+    columnar = ColumnarDataCollector(MODEL_REPORTERS, capacity=4)
+    reference = mesa.DataCollector(model_reporters=MODEL_REPORTERS)
+    for _ in range(20):
+        model.step()
+        columnar.collect(model)
+        reference.collect(model)
+
+    pd.testing.assert_frame_equal(columnar.get_model_vars_dataframe(), reference.get_model_vars_dataframe(),
+                                  check_dtype=False)
+
+def test_window_keeps_the_most_recent_rows():
+    model = Counter()
+    collector = ColumnarDataCollector({"step": lambda m: m._steps}, window=3)
+    for step in range(10):
+        model._steps = step
+        collector.collect(model)
+
+    assert collector.steps.tolist() == [7, 8, 9]
+    assert collector.get_model_vars_dataframe()["step"].tolist() == [7, 8, 9]
+    assert collector.rows_dropped == 7
+
+def test_collect_every_skips_steps():
+    model = Counter()
+    collector = ColumnarDataCollector({"step": lambda m: m._steps}, collect_every=4)
+    for step in range(10):
+        model._steps = step
+        collector.collect(model)
+
+    assert collector.get_model_vars_dataframe().index.tolist() == [0, 4, 8]
+
+def test_integer_column_widens_to_float():
+    values = iter([1, 2, 2.5])
+    collector = ColumnarDataCollector({"x": lambda m: next(values)})
+    for _ in range(3):
+        collector.collect(Counter())
+
+    column = collector.columns()["x"]
+    assert column.dtype == np.float64
+    assert column.tolist() == [1.0, 2.0, 2.5]
+
+def test_invalid_settings_raise():
+    with pytest.raises(ValueError):
+        ColumnarDataCollector({}, collect_every=0)
+    with pytest.raises(ValueError):
+        ColumnarDataCollector({}, window=0)
@@ -0,0 +1,31 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from batch_run import ENGINES, compare_engines
+
+SCENARIOS = {
+    "default": {},
+    "ubi_viability": {"robot_tax_rate": 0.5, "initial_ubi_fraction": 0.2, "seeds_automated": 50},
+}
+
+@pytest.mark.slow
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_vectorized_engine_is_statistically_equivalent(scenario):
+    report = compare_engines(SCENARIOS[scenario])
+
+    failing = list(report.index[~report["equivalent"]])
+    assert not failing, report.to_string(float_format=lambda v: f"{v:.3f}")
+
+@pytest.mark.parametrize("engine", ["agent", "vectorized"])
+def test_displacement_without_robots_around_keeps_wealth_finite(engine):
+    model = ENGINES[engine](seed=2, displacement_threshold=0, seeds_automated=5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        for _ in range(10):
+            model.step()
+
+    frame = model.datacollector.get_model_vars_dataframe()
+    assert frame["Displaced"].iloc[-1] > 0
+    assert np.isfinite(frame.select_dtypes("number").to_numpy(dtype=float)).all()
@@ -0,0 +1,46 @@
+import os
+import shutil
+
+import pytest
+
+from batch_run import ENGINES
+from events import EventReader
+
+def test_resumed_log_matches_an_uninterrupted_run(tmp_path):
+    checkpoint = tmp_path / "run.ckpt"
+    full_log = tmp_path / "full.ev"
+    model = ENGINES["agent"](seed=4, event_log=str(full_log))
+    for _ in range(20):
+        model.step()
+    model.checkpoint(checkpoint)
+    for _ in range(20):
+        model.step()
+    model.events.close()
+
+    # A crashed run left events past its checkpoint in the log
+    resumed_log = tmp_path / "resumed.ev"
+    shutil.copyfile(full_log, resumed_log)
+    resumed = ENGINES["agent"].restore(checkpoint, event_log=str(resumed_log))
+    for _ in range(20):
+        resumed.step()
+    resumed.events.close()
+
+    assert resumed_log.read_bytes() == full_log.read_bytes()
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_step_range_query_matches_a_full_scan(indexed, tmp_path):
+    path = tmp_path / "run.ev"
+    model = ENGINES["vectorized"](seed=4, event_log=str(path))
+    for _ in range(30):
+        model.step()
+    model.events.close()
+    if not indexed:
+        os.remove(f"{path}.idx")
+
+    log = EventReader(str(path))
+    everything = log.frame()
+    selected = log.frame(10, 20)
+
+    in_range = everything[(everything["step"] >= 10) & (everything["step"] <= 20)]
+    assert len(selected) == len(in_range) > 0
+    assert (selected["step"].to_numpy() == in_range["step"].to_numpy()).all()
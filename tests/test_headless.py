@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from batch_run import ENGINES
+from headless import grid_size, main, run_headless, scale_params, side_for
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_run_headless_with_every_engine(engine):
+    side = side_for(2000)
+    params = scale_params(2000, side, seed=1)
+
+    model, stats = run_headless(params, steps=3, engine=engine, report_every=0)
+
+    assert grid_size(model) == (side, side)
+    assert stats["cells"] == side * side
+    assert stats["agents_initial"] == 2000
+    assert stats["agents_final"] == model.agent_count > 0
+
+def test_compact_agents_match_default_agents():
+    side = side_for(2000)
+    default, _ = run_headless(scale_params(2000, side, seed=4), steps=10, engine="agent", report_every=0)
+    compact, _ = run_headless(scale_params(2000, side, seed=4, compact_agents=True), steps=10,
+                              engine="agent", report_every=0)
+
+    assert not hasattr(next(iter(compact.schedule.agents)), "__dict__")
+    pd.testing.assert_frame_equal(compact.datacollector.get_model_vars_dataframe(),
+                                  default.datacollector.get_model_vars_dataframe())
+
+def test_compact_agents_from_the_command_line(capsys):
+    assert main(["--engine", "agent", "--agents", "500", "--steps", "2", "--compact-agents", "--no-save"]) == 0
+    assert "agent" in capsys.readouterr().out
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from constants import AUGMENTED, HUMAN
+from inequality import WEALTH_ACCURACY, summarize, wealth_stat_columns
+from model import EvolutionaryModel
+
+def exact_gini(values):
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    n = len(values)
+    ranks = np.arange(1, n + 1)
+    return 2 * (ranks * values).sum() / (n * values.sum()) - (n + 1) / n
+
+@pytest.mark.parametrize("wealth, gini", [
+    ([5.0, 5.0, 5.0, 5.0], 0.0),
+    ([0.0, 0.0, 0.0, 10.0], 0.75),
+    ([1.0, 2.0, 3.0, 4.0], 0.25),
+])
+def test_gini_of_known_distributions(wealth, gini):
+    stats = summarize(np.full(len(wealth), HUMAN), wealth)
+
+    assert stats["Gini_Human"] == pytest.approx(gini, abs=1e-12)
+    assert stats["Gini_All"] == pytest.approx(gini, abs=1e-12)
+
+def test_sketch_is_within_its_accuracy():
+    rng = np.random.default_rng(1)
+    wealth = rng.lognormal(3.0, 1.5, size=5000)
+    states = rng.choice([HUMAN, AUGMENTED], size=5000)
+
+    stats = summarize(states, wealth)
+
+    for state, label in ((HUMAN, "Human"), (AUGMENTED, "Augmented")):
+        group = np.sort(wealth[states == state])
+        assert stats[f"Gini_{label}"] == pytest.approx(exact_gini(group), abs=WEALTH_ACCURACY)
+        for p in (10, 50, 90, 99):
+            exact = group[int(p / 100 * (len(group) - 1))]
+            assert stats[f"P{p}_{label}"] == pytest.approx(exact, rel=2 * WEALTH_ACCURACY)
+        assert stats[f"Max_{label}"] == group[-1]
+    assert stats["Max_All"] == wealth.max()
+
+def test_empty_groups_and_negative_wealth():
+    stats = summarize(np.array([HUMAN, HUMAN, HUMAN]), np.array([-4.0, 0.0, 6.0]))
+
+    assert stats["P10_Human"] == pytest.approx(-4.0, rel=WEALTH_ACCURACY)
+    assert stats["Max_Human"] == 6.0
+    assert all(stats[f"{name}_Displaced"] == 0.0 for name in ("Gini", "P50", "Max"))
+
+def test_model_collects_every_wealth_column():
+    model = EvolutionaryModel(seed=2, wealth_stats=True)
+    for _ in range(5):
+        model.step()
+
+    data = model.datacollector.get_model_vars_dataframe()
+    assert set(wealth_stat_columns()) <= set(data.columns)
+    assert data["Gini_All"].between(-1.0, 1.0).all()
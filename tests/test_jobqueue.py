@@ -0,0 +1,44 @@
+from jobqueue import JobQueue, DONE, PENDING, RUNNING
+
+def test_enqueue_is_idempotent(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.db"))
+    param_sets = [{"robot_tax_rate": 0.1}, {"robot_tax_rate": 0.2}]
+
+    assert queue.enqueue(param_sets, steps=10, base_seed=1) == 2
+    assert queue.enqueue(param_sets, steps=10, base_seed=1) == 0
+    queue.close()
+
+def test_two_workers_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / "q.db")
+    JobQueue(path).enqueue([{"robot_tax_rate": 0.1}, {"robot_tax_rate": 0.2}], steps=10, base_seed=1)
+    first, second = JobQueue(path), JobQueue(path)
+
+    a = first.claim("a")
+    b = second.claim("b")
+
+    assert a["id"] != b["id"]
+    assert first.claim("a") is None
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.db"))
+    queue.enqueue([{"robot_tax_rate": 0.1}], steps=10, base_seed=1)
+
+    job = queue.claim("dead", lease=-1.0)
+    again = queue.claim("alive")
+
+    assert again["id"] == job["id"]
+    assert again["attempts"] == 2
+    assert not queue.renew(job["id"], "dead")
+    assert queue.renew(job["id"], "alive")
+
+def test_complete_keeps_the_job_done(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.db"))
+    queue.enqueue([{"robot_tax_rate": 0.1}], steps=10, base_seed=1)
+    job = queue.claim("a")
+
+    queue.complete(job["id"], elapsed=1.0)
+    queue.fail(job["id"], "late error")
+
+    status = queue._db.execute("SELECT status FROM jobs WHERE id = ?", (job["id"],)).fetchone()[0]
+    assert status == DONE
+    assert queue.claim("b") is None
@@ -0,0 +1,31 @@
+import numpy as np
+
+from batch_run import run_single_experiment
+from meanfield import MeanFieldModel, screen
+from model import MODEL_REPORTERS
+
+def test_collects_exactly_the_model_reporters():
+    model = MeanFieldModel(robot_tax_rate=0.2)
+    for _ in range(5):
+        model.step()
+    assert list(model.datacollector.get_model_vars_dataframe().columns) == list(MODEL_REPORTERS)
+
+def test_runs_as_an_engine_with_the_agent_engine_columns(tmp_path):
+    params = {"seed": 1, "N": 100}
+    agents, _ = run_single_experiment(params, steps=3, output_dir=str(tmp_path), verbose=False)
+    meanfield, _ = run_single_experiment(params, steps=3, output_dir=str(tmp_path), verbose=False,
+                                         engine="meanfield")
+    assert list(meanfield.columns) == list(agents.columns)
+    assert len(meanfield) == len(agents)
+
+def test_screen_matches_individual_runs():
+    param_sets = [{"robot_tax_rate": rate, "hiring_chance": hire} for rate in (0.0, 0.3) for hire in (0.2, 0.4)]
+    screened = screen(param_sets, steps=40)
+
+    for i, params in enumerate(param_sets):
+        model = MeanFieldModel(**params)
+        for _ in range(40):
+            model.step()
+        last = model.datacollector.get_model_vars_dataframe().iloc[-1]
+        for column in ("Human", "Automated", "Alive", "Total Wealth"):
+            assert np.isclose(screened[column].iloc[i], last[column])
@@ -0,0 +1,47 @@
+import pytest
+
+from agent import WorkerAgent
+from constants import AUTOMATED, HUMAN
+from model import NUM_STATES, EvolutionaryModel
+
+def recount(model):
+    counts = [0] * NUM_STATES
+    wealth = [0.0] * NUM_STATES
+    for agent in model.schedule.agents:
+        counts[agent.state] += 1
+        wealth[agent.state] += agent.wealth
+    return counts, wealth
+
+def assert_aggregates_match(model):
+    counts, wealth = recount(model)
+    assert model.state_counts == counts
+    assert model.state_wealth == pytest.approx(wealth, rel=1e-9, abs=1e-6)
+
+def test_aggregates_follow_merges_spawns_and_removals():
+    model = EvolutionaryModel(seed=3, seeds_automated=50, combination_threshold=2, cost_of_living=2.0)
+    start = model.agent_count
+    spawned = removed = merged = False
+    for _ in range(60):
+        model.step()
+        model.check_aggregates()
+        assert_aggregates_match(model)
+        spawned = spawned or model.current_id_counter > start
+        removed = removed or model.total_removed > 0
+        merged = merged or model.total_merged > 0
+    assert spawned and removed and merged
+
+def test_add_and_remove_agent_update_aggregates():
+    model = EvolutionaryModel(seed=1, N=50)
+    agent = WorkerAgent(model.get_next_id(), model)
+    agent.state = AUTOMATED
+    agent.wealth = 12.5
+    model.add_agent(agent, (0, 0))
+    assert_aggregates_match(model)
+
+    agent.state = HUMAN
+    agent.wealth += 3.0
+    assert_aggregates_match(model)
+
+    model.remove_agent(agent)
+    assert_aggregates_match(model)
+    model.check_aggregates()
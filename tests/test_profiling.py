@@ -0,0 +1,41 @@
+import tracemalloc
+
+from batch_run import run_single_experiment
+from model import EvolutionaryModel
+
+def test_profiled_model_times_every_phase():
+    model = EvolutionaryModel(seed=1, enable_logging=True)
+    for _ in range(5):
+        model.step()
+
+    profiler = model.profiler
+    assert profiler.steps == 5 and profiler.calls["step"] == 5
+    assert profiler.calls["agent_step"] > 0 and profiler.calls["data_collection"] == 5
+    assert "Time: movement (ms)" in model.datacollector.get_model_vars_dataframe().columns
+
+def test_memory_tracing_stops_when_the_run_ends(tmp_path):
+    assert not tracemalloc.is_tracing()
+    params = {"seed": 1, "N": 100, "enable_logging": True, "profile_memory": True}
+
+    model_data, _ = run_single_experiment(params, steps=5, output_dir=str(tmp_path), verbose=False)
+
+    assert not tracemalloc.is_tracing()
+    assert (model_data["Traced Memory (MB)"] > 0).all()
+
+def test_stop_leaves_tracing_started_elsewhere_running():
+    tracemalloc.start()
+    try:
+        model = EvolutionaryModel(seed=1, enable_logging=True, profile_memory=True)
+        model.step()
+        model.profiler.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_report_after_stop_keeps_the_traced_memory():
+    model = EvolutionaryModel(seed=1, enable_logging=True, profile_memory=True)
+    model.step()
+    model.profiler.stop()
+
+    assert not tracemalloc.is_tracing()
+    assert "traced memory" in model.profiler.report()
@@ -0,0 +1,41 @@
+import random
+from types import SimpleNamespace
+
+from model import NUM_STATES, EvolutionaryModel
+from ranking import TopKIndex
+
+class FakeModel:
+    def __init__(self):
+        self.schedule = SimpleNamespace(agents=[])
+        self.state_counts = [0] * NUM_STATES
+
+def test_top_matches_a_sort_under_updates_and_removals():
+    rng = random.Random(0)
+    model = FakeModel()
+    index = TopKIndex(model, k=3)
+    for uid in range(40):
+        agent = SimpleNamespace(unique_id=uid, state=0, wealth=rng.uniform(0, 100))
+        model.schedule.agents.append(agent)
+        model.state_counts[0] += 1
+        index.enter(agent, 0)
+
+    for _ in range(300):
+        agent = rng.choice(model.schedule.agents)
+        if rng.random() < 0.1 and len(model.schedule.agents) > 5:
+            model.schedule.agents.remove(agent)
+            model.state_counts[0] -= 1
+            index.leave(agent, 0)
+        else:
+            agent.wealth = rng.uniform(0, 100)
+            index.wealth_changed(agent, 0, agent.wealth)
+        expected = sorted((a.wealth for a in model.schedule.agents), reverse=True)[:3]
+        assert [a.wealth for a in index.top(0)] == expected
+
+def test_model_top_earners_match_a_sort():
+    model = EvolutionaryModel(seed=4, seeds_automated=40, robot_tax_rate=0.3)
+    for _ in range(40):
+        model.step()
+        for state in range(NUM_STATES):
+            agents = [a for a in model.schedule.agents if a.state == state]
+            expected = sorted((a.wealth for a in agents), reverse=True)[:10]
+            assert [a.wealth for a in model.top_wealth.top(state)] == expected
@@ -0,0 +1,37 @@
+import numpy as np
+
+from batch_run import ENGINES
+from recording import Recorder, Recording, agent_snapshot
+
+def test_every_frame_decodes_to_the_recorded_agents(tmp_path):
+    path = tmp_path / "run.rec"
+    model = ENGINES["agent"](seed=2, N=200, width=20, height=20)
+    recorder = Recorder(path, model, keyframe_every=7)
+    snapshots = {model._steps: agent_snapshot(model)}
+    for _ in range(30):
+        model.step()
+        recorder.capture()
+        snapshots[model._steps] = agent_snapshot(model)
+    recorder.close()
+
+    recording = Recording(path)
+    assert recording.last_step == model._steps
+    for step, expected in snapshots.items():
+        for decoded, array in zip(recording.frame(step), expected):
+            np.testing.assert_array_equal(decoded, array)
+    recording.close()
+
+def test_frame_continues_from_an_earlier_step(tmp_path):
+    path = tmp_path / "run.rec"
+    model = ENGINES["vectorized"](seed=2, N=200, width=20, height=20)
+    recorder = Recorder(path, model, keyframe_every=10)
+    for _ in range(25):
+        model.step()
+        recorder.capture()
+    recorder.close()
+
+    recording = Recording(path)
+    start = (21, recording.frame(21))
+    for continued, fresh in zip(recording.frame(24, start=start), recording.frame(24)):
+        np.testing.assert_array_equal(continued, fresh)
+    recording.close()
@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from batch_run import run_single_experiment
+from constants import STATE_MAP
+from results import ResultReader, ResultWriter
+
+def experiment(tmp_path, seed, robot_tax_rate):
+    params = {"seed": seed, "N": 120, "robot_tax_rate": robot_tax_rate}
+    model_data, agent_data = run_single_experiment(params, steps=12, output_dir=str(tmp_path), verbose=False)
+    for name, value in params.items():
+        model_data[f"param_{name}"] = value
+    return model_data, agent_data
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_round_trip_with_partitions(tmp_path, format):
+    runs = {eid: experiment(tmp_path, seed=eid, robot_tax_rate=rate)
+            for eid, rate in enumerate([0.0, 0.25, 0.25])}
+    writer = ResultWriter(str(tmp_path / "out"), format=format, partition_by=["robot_tax_rate"])
+    for eid, (model_data, agent_data) in runs.items():
+        files = writer.write(eid, model_data, agent_data)
+        assert f"robot_tax_rate={model_data['param_robot_tax_rate'].iloc[0]}" in files["model"].split(os.sep)
+
+    reader = ResultReader(str(tmp_path / "out"))
+    assert len(reader) == 3
+    assert list(reader.experiments(robot_tax_rate=0.25).index) == [1, 2]
+
+    for eid, frame in reader.iter_load():
+        expected = runs[eid][0]
+        stored = [name for name in expected.columns if not name.startswith("param_") and name != "stop_reason"]
+        pd.testing.assert_frame_equal(frame.set_index("Step")[stored], expected[stored],
+                                      check_names=False, check_dtype=False, check_index_type=False)
+        assert frame["stop_reason"].isna().all() and expected["stop_reason"].isna().all()
+
+    columns = ["Total Wealth", "param_seed"]
+    loaded = reader.load(columns=columns, where={"robot_tax_rate": 0.25})
+    assert list(loaded.columns) == ["Step"] + columns + ["experiment_id"]
+    assert sorted(loaded["experiment_id"].unique()) == [1, 2]
+    assert loaded.groupby("experiment_id")["param_seed"].first().to_dict() == {1: 1, 2: 2}
+
+def test_agent_states_are_stored_by_name(tmp_path):
+    model_data, _ = experiment(tmp_path, seed=3, robot_tax_rate=0.1)
+    agent_data = pd.DataFrame({"State": [0, 2, 4, 2], "Wealth": [1.5, 0.0, 2.25, 8.0]})
+    writer = ResultWriter(str(tmp_path / "out"), float32=True)
+    writer.write(0, model_data, agent_data)
+
+    agents = writer.reader().load(table="agents")
+    assert agents["State"].astype(str).tolist() == [STATE_MAP[state]["name"] for state in agent_data["State"]]
+    assert agents["Wealth"].dtype == "float32"
+    assert agents["Wealth"].tolist() == agent_data["Wealth"].tolist()
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ResultWriter(str(tmp_path), format="csv")
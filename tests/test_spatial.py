@@ -0,0 +1,32 @@
+import numpy as np
+
+from constants import UBI_RECIPIENT
+from model import NUM_STATES, EvolutionaryModel
+
+def recount(model):
+    grid = model.grid
+    counts = np.zeros((NUM_STATES, grid.width, grid.height), dtype=np.int32)
+    for agent in model.schedule.agents:
+        counts[agent.state][agent.pos] += 1
+    return counts
+
+def test_counts_match_a_recount_after_moves_and_state_changes():
+    model = EvolutionaryModel(seed=6, N=300, seeds_automated=40, initial_ubi_fraction=0.1)
+    for _ in range(40):
+        model.step()
+        counts = recount(model)
+        np.testing.assert_array_equal(model.grid.counts, counts)
+        blocking = counts.sum(axis=0) - counts[UBI_RECIPIENT]
+        np.testing.assert_array_equal(model.grid.blocking, blocking)
+
+def test_count_around_matches_get_neighbors():
+    model = EvolutionaryModel(seed=6, N=300, seeds_automated=40)
+    for _ in range(5):
+        model.step()
+    grid = model.grid
+    for pos in [(0, 0), (5, 29), (17, 3), (29, 29)]:
+        for radius in (1, 2):
+            expected = np.zeros(NUM_STATES, dtype=np.int64)
+            for agent in grid.get_neighbors(pos, moore=True, include_center=False, radius=radius):
+                expected[agent.state] += 1
+            np.testing.assert_array_equal(grid.count_around(pos, radius), expected)
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from batch_run import run_single_experiment
+from stopping import FLOW_CONVERGED, NO_WORKERS, SINGLE_AGENT, STATIONARY, StopConditions, pad_stopped
+
+def fake_model(counts, wealth=None, step=0):
+    return SimpleNamespace(state_counts=list(counts), state_wealth=list(wealth or [0.0] * 5),
+                           agent_count=sum(counts), _steps=step, running=True)
+
+def run_until_stop(conditions, frames):
+    """Feed (counts, wealth) frames one step at a time; returns (step, reason) of the stop"""
+    for step, (counts, wealth) in enumerate(frames, start=1):
+        model = fake_model(counts, wealth, step)
+        reason = conditions.update(model)
+        if reason is not None:
+            assert not model.running and model.stop_step == step and model.stop_reason == reason
+            return step, reason
+    return None, None
+
+def test_absorbing_stops_without_workers_or_with_one_agent():
+    conditions = StopConditions(absorbing=True)
+
+    assert conditions.check(fake_model([5, 0, 3, 0, 1])) is None
+    assert conditions.check(fake_model([0, 0, 3, 0, 1])) == NO_WORKERS
+    assert conditions.check(fake_model([1, 0, 0, 0, 0])) == SINGLE_AGENT
+
+def test_stationary_waits_for_a_full_window_within_tolerance():
+    frames = [([10, 5, 5, 0, 0], None)] * 3 + [([12, 5, 5, 0, 0], None)] + [([13, 4, 5, 0, 0], None)] * 10
+
+    assert run_until_stop(StopConditions(stationary_window=4, stationary_tolerance=1), frames) == (8, STATIONARY)
+    assert run_until_stop(StopConditions(stationary_window=4), frames) == (9, STATIONARY)
+
+def test_flow_converges_once_wealth_changes_by_a_steady_amount():
+    wealth = [[100.0 + 7 * step, 50.0, 0.0, 0.0, 0.0] for step in range(12)]
+    wealth[4][1] = 80.0
+    frames = [([10, 5, 5, 0, 0], w) for w in wealth]
+
+    assert run_until_stop(StopConditions(flow_window=3), frames) == (10, FLOW_CONVERGED)
+
+def test_disabled_conditions_never_stop():
+    frames = [([1, 0, 0, 0, 0], [1.0, 0, 0, 0, 0])] * 20
+
+    assert run_until_stop(StopConditions(), frames) == (None, None)
+
+def test_state_round_trip_keeps_the_window():
+    counts = [10, 5, 5, 0, 0]
+    conditions = StopConditions(stationary_window=6)
+    for step in range(1, 4):
+        conditions.update(fake_model(counts, step=step))
+
+    resumed = StopConditions(stationary_window=6)
+    resumed.set_state(conditions.get_state())
+
+    reasons = [resumed.update(fake_model(counts, step=step)) for step in range(4, 8)]
+    assert reasons == [None, None, None, STATIONARY]
+
+def test_pad_stopped_repeats_the_last_row():
+    data = pd.DataFrame({"Alive": [5, 4, 3]})
+
+    padded = pad_stopped(data, np.array([0, 1, 2]), steps=5)
+
+    assert padded["Alive"].tolist() == [5, 4, 3, 3, 3, 3]
+    assert padded["padded"].tolist() == [False] * 3 + [True] * 3
+    assert isinstance(padded.index, pd.RangeIndex)
+
+def test_pad_stopped_follows_the_collection_interval():
+    data = pd.DataFrame({"Alive": [5, 4]}, index=pd.Index([0, 4], name="Step"))
+
+    padded = pad_stopped(data, np.array([0, 4]), steps=13, collect_every=4)
+
+    assert padded.index.tolist() == [0, 4, 8, 12]
+    assert padded["padded"].tolist() == [False, False, True, True]
+
+def test_stopped_run_is_padded_to_the_requested_steps(tmp_path):
+    params = {"seed": 3, "N": 60, "stop_stationary_window": 3, "stop_stationary_tolerance": 1000}
+
+    model_data, _ = run_single_experiment(params, steps=20, output_dir=str(tmp_path), verbose=False)
+
+    assert len(model_data) == len(run_single_experiment({"seed": 3, "N": 60}, steps=20,
+                                                        output_dir=str(tmp_path), verbose=False)[0])
+    assert model_data["stop_reason"].iloc[0] == STATIONARY
+    stop_step = int(model_data["stop_step"].iloc[0])
+    assert model_data["padded"].sum() == 20 - stop_step
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from surrogate import TARGETS, Surrogate, end_metrics
+from sweep import build_design, param_space
+
+def smooth_targets(points):
+    """A noise-free function of the two parameters, one column per target"""
+    return np.array([[(t + 1) * np.sin(3 * p["robot_tax_rate"]) + p["hiring_chance"] * t
+                      for t in range(len(TARGETS))] for p in points])
+
+def fitted():
+    space = param_space(["robot_tax_rate", "hiring_chance"])
+    surrogate = Surrogate(space)
+    points = build_design(space, "sobol", n_points=32, seed=1)
+    surrogate.add_runs(points, smooth_targets(points))
+    return surrogate.fit(restarts=1), points
+
+def test_fit_reproduces_its_training_points():
+    surrogate, points = fitted()
+    predicted = surrogate.predict(points)
+
+    expected = smooth_targets(points)
+    for t, name in enumerate(surrogate.targets):
+        assert np.allclose(predicted[name], expected[:, t], atol=1e-2 * (t + 1))
+        assert (predicted[f"{name}_std"] < 0.05 * (t + 1)).all()
+
+    single = surrogate.predict(points[0], return_std=False)
+    assert single == pytest.approx(dict(zip(surrogate.targets, predicted.iloc[0][surrogate.targets])))
+
+def test_save_and_load_round_trip(tmp_path):
+    surrogate, points = fitted()
+    path = tmp_path / "surrogate.npz"
+    surrogate.save(path)
+
+    loaded = Surrogate.load(path)
+    assert loaded.space == surrogate.space and loaded.points == surrogate.points
+    queries = build_design(surrogate.space, "lhs", n_points=16, seed=2)
+    assert loaded.predict(queries).equals(surrogate.predict(queries))
+
+def test_end_metrics_average_the_final_window():
+    frame = {name: np.arange(10.0) for name in
+             ("Alive", "Displaced", "UBI (Opt-Out)", "UBI (Worker Div)", "Wealth_Capital", "Wealth_Labor",
+              "Wealth_State")}
+    metrics = end_metrics(pd.DataFrame(frame), window=4)
+    assert metrics["Alive"] == pytest.approx(7.5)
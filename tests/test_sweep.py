@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from batch_run import derive_seed, run_single_experiment
+from sweep import ReplicateStats, build_design, param_space, run_sweep
+
+def test_param_space_reads_slider_ranges_and_overrides():
+    space = param_space(["robot_tax_rate", "seeds_automated"], bounds={"seeds_automated": (10, 30, 5)})
+
+    assert space["robot_tax_rate"] == {"low": 0.0, "high": 1.0, "step": 0.05}
+    assert space["seeds_automated"] == {"low": 10, "high": 30, "step": 5}
+    with pytest.raises(ValueError):
+        param_space(["robot_tax_rate"], bounds={"robot_tax_rate": (0.8, 0.2)})
+    with pytest.raises(ValueError):
+        param_space(["not_a_parameter"])
+
+def test_factorial_design_covers_every_combination():
+    space = param_space(["robot_tax_rate", "seeds_automated"], bounds={"seeds_automated": [10, 20]})
+
+    points = build_design(space, "factorial", levels=3)
+
+    assert len(points) == 6
+    assert {p["robot_tax_rate"] for p in points} == {0.0, 0.5, 1.0}
+    assert {p["seeds_automated"] for p in points} == {10, 20}
+
+@pytest.mark.parametrize("design", ["lhs", "sobol"])
+def test_sampled_designs_stay_on_the_step_grid(design):
+    space = param_space(["robot_tax_rate", "seeds_automated"])
+
+    points = build_design(space, design, n_points=16, seed=3)
+
+    assert len(points) == 16
+    assert points == build_design(space, design, n_points=16, seed=3)
+    for point in points:
+        assert 0.0 <= point["robot_tax_rate"] <= 1.0
+        assert round(point["robot_tax_rate"] / 0.05, 6).is_integer()
+        assert isinstance(point["seeds_automated"], int) and 0 <= point["seeds_automated"] <= 50
+
+def test_replicate_stats_match_numpy():
+    import pandas as pd
+    runs = np.random.default_rng(0).normal(size=(5, 4))
+    stats = ReplicateStats(["x"])
+    for run in runs:
+        stats.add(0, pd.DataFrame({"x": run}))
+
+    np.testing.assert_allclose(stats.mean[0][:, 0], runs.mean(axis=0))
+    np.testing.assert_allclose(stats.m2[0][:, 0] / 4, runs.var(axis=0, ddof=1))
+
+def test_sweep_means_match_the_individual_runs():
+    space = param_space(["robot_tax_rate"], bounds={"robot_tax_rate": [0.0, 0.5]})
+
+    design, summary = run_sweep(space, replicates=2, steps=5, base_params={"N": 60}, columns=["Alive"])
+
+    for point_id, point in design.iterrows():
+        runs = [run_single_experiment({"N": 60, **point.to_dict(), "seed": derive_seed(0, 2 * point_id + r)},
+                                      steps=5, verbose=False)[0]["Alive"].to_numpy()
+                for r in range(2)]
+        means = summary.loc[summary["point_id"] == point_id, "Alive_mean"].to_numpy()
+        np.testing.assert_allclose(means, np.mean(runs, axis=0)[:len(means)])
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from batch_run import run_single_experiment
+from synchronous import SynchronousEvolutionaryModel
+from vectorized_model import VectorizedEvolutionaryModel
+
+PARAMS = {"seed": 3, "N": 1500, "width": 60, "height": 60, "seeds_automated": 40}
+
+def run(model, steps=40):
+    for _ in range(steps):
+        model.step()
+    return model.datacollector.get_model_vars_dataframe()
+
+def test_untiled_run_matches_one_batch_vectorized_engine():
+    expected = run(VectorizedEvolutionaryModel(activation_batches=1, rng_mode="counter", **PARAMS))
+    untiled = run(SynchronousEvolutionaryModel(tiles=1, workers=1, **PARAMS))
+    pd.testing.assert_frame_equal(untiled, expected)
+
+@pytest.mark.parametrize("tiles, workers", [(2, 1), (7, 1), (8, 4), (60, 3)])
+def test_tiled_run_is_identical_to_untiled(tiles, workers):
+    untiled = SynchronousEvolutionaryModel(tiles=1, workers=1, **PARAMS)
+    tiled = SynchronousEvolutionaryModel(tiles=tiles, workers=workers, **PARAMS)
+
+    pd.testing.assert_frame_equal(run(tiled), run(untiled))
+    for name in ("unique_id", "cell", "state", "wealth"):
+        assert getattr(tiled, name).tobytes() == getattr(untiled, name).tobytes()
+
+def test_rejects_batched_or_shared_draws():
+    with pytest.raises(ValueError):
+        SynchronousEvolutionaryModel(activation_batches=4, **PARAMS)
+    with pytest.raises(ValueError):
+        SynchronousEvolutionaryModel(rng_mode="shared", **PARAMS)
+
+def test_close_shuts_down_the_worker_pool():
+    model = SynchronousEvolutionaryModel(tiles=4, workers=2, **PARAMS)
+    model.step()
+    pool = model._pool
+    assert pool is not None
+
+    model.close()
+    assert model._pool is None and pool._shutdown
+    model.step()
+    model.close()
+
+def test_run_single_experiment_closes_the_pool(tmp_path, monkeypatch):
+    closed = []
+    monkeypatch.setattr(SynchronousEvolutionaryModel, "close", lambda self: closed.append(self._pool))
+
+    run_single_experiment({**PARAMS, "workers": 2}, steps=3, output_dir=str(tmp_path), verbose=False,
+                          engine="synchronous")
+    assert len(closed) == 1 and closed[0] is not None
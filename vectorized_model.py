@@ -0,0 +1,588 @@
+"""
+Vectorized simulation engine for the AI Adoption Simulator.
+
+VectorizedEvolutionaryModel takes the same parameters as EvolutionaryModel
+but keeps every agent as a row in NumPy arrays (state, wealth, revenue,
+position) and advances all agents with batched array operations. Neighbor
+influence is computed for a whole batch of agents at once with a toroidal
+stencil over per-cell occupancy counts.
+
+RandomActivation steps agents one at a time in random order. Here every
+agent is instead assigned to one of `activation_batches` random batches each
+step; agents in a batch are updated together and see everything earlier
+batches did. Conflicts inside a batch (two movers picking the same cell, two
+robots merging into the same target) are resolved by a random priority
+draw. The two engines therefore agree statistically rather than step by
+step (see batch_run.experiment_engine_equivalence).
+
+With rng_mode="counter" every draw comes from streams.CounterStreams, keyed
+on (seed, unique_id, step, slot) with the same slots the agent engine uses:
+both engines start from the same placement and draw the same number for the
+same decision, and no draw depends on batch layout or evaluation order.
+"""
+
+import mesa
+import numpy as np
+from checkpoint import apply_checkpoint, read_checkpoint, write_checkpoint
+from collector import ColumnarDataCollector
+from profiling import PhaseProfiler
+from inequality import WEALTH_ACCURACY, WealthStats, wealth_stat_reporters
+from ranking import TOP_K
+from stopping import FLOW_TOLERANCE, StopConditions, stop_params
+from streams import (SHARED, SLOT_ADOPT, SLOT_AUTOMATE, SLOT_DISPLACE, SLOT_HIRE, SLOT_MERGE,
+                     SLOT_MERGE_PRIORITY, SLOT_MOVE, SLOT_ORDER, SLOT_UPSKILL, make_streams)
+from constants import HUMAN, AUGMENTED, AUTOMATED, DISPLACED, UBI_RECIPIENT, NO_DISPLACER
+from events import ADOPT, DISPLACE, REHIRE, SPAWN, MERGE, REMOVE, NO_AGENT, NO_CAUSE, open_event_log
+from model import MODEL_REPORTERS, NUM_STATES
+
+# Per-agent arrays, all in unique_id order; together they are the agent state
+AGENT_ARRAYS = ("unique_id", "state", "wealth", "revenue", "displaced_by", "cell")
+
+# Neighborhood offsets in the same order as MultiGrid.get_neighborhood
+MOORE_R1 = [(dx, dy) for dx in range(-1, 2) for dy in range(-1, 2) if (dx, dy) != (0, 0)]
+MOORE_R2 = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if (dx, dy) != (0, 0)]
+
+# Agents act in this many randomly assigned batches per step; agents in a
+# batch are updated together and see the effects of all earlier batches
+ACTIVATION_BATCHES = 32
+
+# Movers that lose a cell conflict retry against the updated grid this many times
+MOVE_ROUNDS = 3
+
+
+class VectorizedEvolutionaryModel(mesa.Model):
+    def __init__(self, N=350, width=30, height=30,
+                 starting_wealth=50, cost_of_living=1.0,
+                 wage_human=1.0, wage_augmented=2.5,
+                 seeds_human=300, seeds_augmented=20, seeds_automated=20,
+                 initial_ubi_fraction=0.0,
+                 ubi_class_tax_share=0.5,
+                 adopt_human_augmented_thresh=3, adopt_human_augmented_prob=0.3,
+                 human_displacement_chance=0.1,
+                 automation_threshold=4, automation_chance=0.1,
+                 displacement_threshold=2, combination_threshold=2,
+                 hiring_chance=0.30, upskill_chance=0.3,
+                 robot_tax_rate=0.0,
+                 enable_logging=False, seed=None,
+                 activation_batches=ACTIVATION_BATCHES, collect_every=1, profile_memory=False,
+                 wealth_stats=False, wealth_accuracy=WEALTH_ACCURACY,
+                 stop_absorbing=False, stop_stationary_window=0, stop_stationary_tolerance=0,
+                 stop_flow_window=0, stop_flow_tolerance=FLOW_TOLERANCE,
+                 rng_mode=SHARED, event_log=None):
+
+        super().__init__(seed=seed)
+        self.width = width
+        self.height = height
+        self.activation_batches = activation_batches
+        self.rng = np.random.default_rng(seed)
+        # rng_mode="counter" keys every draw on (seed, unique_id, step, slot), see _draw
+        self.rng_mode = rng_mode
+        self.streams = make_streams(rng_mode, self._seed)
+
+        self.current_id_counter = N
+
+        self.initial_N = N
+        self.starting_wealth = starting_wealth
+        self.cost_of_living = cost_of_living
+        self.wage_human = wage_human
+        self.wage_augmented = wage_augmented
+
+        self.seeds_human = seeds_human
+        self.seeds_augmented = seeds_augmented
+        self.seeds_automated = seeds_automated
+        self.initial_ubi_fraction = initial_ubi_fraction
+        self.ubi_class_tax_share = ubi_class_tax_share
+
+        self.adopt_human_augmented_thresh = adopt_human_augmented_thresh
+        self.adopt_human_augmented_prob = adopt_human_augmented_prob
+        self.human_displacement_chance = human_displacement_chance
+
+        self.automation_threshold = automation_threshold
+        self.automation_chance = automation_chance
+        self.displacement_threshold = displacement_threshold
+        self.combination_threshold = combination_threshold
+        self.hiring_chance = hiring_chance
+        self.upskill_chance = upskill_chance
+
+        self.robot_tax_rate = robot_tax_rate
+        self.government_pot = 0
+
+        self.ubi_payout_opt_out = 0
+        self.ubi_payout_worker = 0
+
+        self.total_retrained = 0
+        self.total_removed = 0
+        self.total_merged = 0
+        self.removed_this_step = 0
+        self.retrained_this_step = 0
+        self.displaced_this_step = 0
+
+        # Moore offsets (radius 1 for movement/merges, radius 2 for square influence)
+        self._r1 = np.array(MOORE_R1).T
+        self._r2 = np.array(MOORE_R2).T
+
+        # --- SEEDING (same order and caps as EvolutionaryModel) ---
+        n_cells = width * height
+        capacity = min(N, n_cells)
+        takes = []
+        for count in (seeds_automated, seeds_augmented, int(N * initial_ubi_fraction)):
+            takes.append(max(0, min(int(count), capacity - sum(takes))))
+        takes.append(capacity - sum(takes))
+        seed_states = np.array([AUTOMATED, AUGMENTED, UBI_RECIPIENT, HUMAN], dtype=np.int8)
+        states = np.repeat(seed_states, takes)
+        n = len(states)
+
+        self.unique_id = np.arange(n, dtype=np.int64)
+        self.state = states
+        self.wealth = np.full(n, float(starting_wealth))
+        self.revenue = np.zeros(n)
+        self.displaced_by = np.full(n, NO_DISPLACER, dtype=np.int8)
+        if self.streams:
+            self.cell = self.streams.sample_cells(n_cells, n)
+        else:
+            self.cell = self.rng.choice(n_cells, size=n, replace=False).astype(np.int64)
+
+        robots = self.state == AUTOMATED
+        self.revenue[robots] = wage_augmented
+        self.wealth[robots] = 0.0
+
+        self._refresh_aggregates()
+
+        # --- INSTRUMENTATION ---
+        # enable_logging wraps each array phase in a timer; without it nothing is wrapped
+        self.profiler = None
+        reporters = MODEL_REPORTERS
+        if enable_logging:
+            self.profiler = PhaseProfiler(trace_memory=profile_memory)
+            self.profiler.instrument(self, {
+                "_economics": "economics", "_move": "movement", "_merge": "merges",
+                "_rehire": "transitions", "_work": "transitions",
+                "_remove": "removals", "_compact": "removals", "_update_payouts": "payouts",
+            })
+            self.profiler.instrument_step(self)
+            reporters = {**MODEL_REPORTERS, **self.profiler.reporters()}
+
+        # Opt-in Gini / percentile / max wealth columns per state, one vectorized pass per collected step
+        self.collect_wealth_stats = wealth_stats
+        self.wealth_accuracy = wealth_accuracy
+        self.wealth_stats = WealthStats(wealth_accuracy) if wealth_stats else None
+        if wealth_stats:
+            reporters = {**reporters, **wealth_stat_reporters()}
+
+        self.datacollector = ColumnarDataCollector(reporters, collect_every=collect_every)
+        if self.profiler:
+            self.profiler.instrument(self.datacollector, {"collect": "data_collection"})
+
+        # --- STOP CONDITIONS ---
+        # Checked after every step; the first that holds sets running=False
+        self.stop_absorbing = stop_absorbing
+        self.stop_stationary_window = stop_stationary_window
+        self.stop_stationary_tolerance = stop_stationary_tolerance
+        self.stop_flow_window = stop_flow_window
+        self.stop_flow_tolerance = stop_flow_tolerance
+        self.stopping = StopConditions.from_model(self)
+        self.stop_step = None
+        self.stop_reason = None
+
+        # --- EVENT LOG ---
+        # Optional binary log of every transition (a path or an events.EventLog)
+        self.events = open_event_log(event_log)
+
+    @property
+    def agent_count(self):
+        return len(self.state)
+
+    @property
+    def agent_nbytes(self):
+        """Bytes held by the per-agent arrays (the whole persistent agent state)"""
+        return sum(getattr(self, name).nbytes for name in AGENT_ARRAYS)
+
+    def top_earners(self, k=TOP_K, state=None):
+        """
+        The k wealthiest agents, richest first
+
+        Args:
+            k: Number of agents
+            state: Rank only agents in this state (default: all agents)
+
+        Returns:
+            List of (unique_id, wealth) tuples
+        """
+        rows = np.arange(len(self.state)) if state is None else np.flatnonzero(self.state == state)
+        if len(rows) > k:
+            rows = rows[np.argpartition(-self.wealth[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-self.wealth[rows], kind="stable")]
+        return list(zip(self.unique_id[rows].tolist(), self.wealth[rows].tolist()))
+
+    def wealth_arrays(self):
+        """Every agent's state and wealth, for the wealth statistics"""
+        return self.state, self.wealth
+
+    def get_next_id(self):
+        """Generates a unique ID for new agents (Robots)"""
+        _id = self.current_id_counter
+        self.current_id_counter += 1
+        return _id
+
+    # --- CHECKPOINTS ---
+
+    def checkpoint(self, target):
+        """Saves the full simulation state to a file path or binary file object"""
+        agent_arrays = {name: getattr(self, name) for name in AGENT_ARRAYS}
+        write_checkpoint(self, target, agent_arrays, extra={"rng": self.rng.bit_generator.state})
+
+    @classmethod
+    def restore(cls, source, event_log=None, **overrides):
+        """
+        Rebuilds a model saved with checkpoint()
+
+        Keyword arguments override saved attributes (e.g. robot_tax_rate=0.5) to
+        branch a policy variant off the saved state; seed=... also re-seeds the RNG.
+        An event_log path continues that log from the checkpoint's step.
+        """
+        header, agent_arrays, collector_arrays = read_checkpoint(source, cls.__name__)
+        attributes = header["attributes"]
+        model = cls(N=0, width=attributes["width"], height=attributes["height"],
+                    seed=attributes["_seed"], activation_batches=attributes["activation_batches"],
+                    wealth_stats=attributes.get("collect_wealth_stats", False),
+                    wealth_accuracy=attributes.get("wealth_accuracy", WEALTH_ACCURACY),
+                    rng_mode=attributes.get("rng_mode", SHARED),
+                    **stop_params({**attributes, **overrides}))
+        apply_checkpoint(model, header, collector_arrays, overrides)
+        model.streams = make_streams(model.rng_mode, model._seed)
+        for name in AGENT_ARRAYS:
+            setattr(model, name, agent_arrays[name])
+        if "seed" in overrides:
+            model.rng = np.random.default_rng(overrides["seed"])
+        else:
+            model.rng.bit_generator.state = header["rng"]
+        model.events = open_event_log(event_log, resume_step=model._steps)
+        return model
+
+    # --- ARRAY HELPERS ---
+
+    def _draw(self, slot, idx):
+        """One uniform draw in [0, 1) for each agent row in idx.
+
+        In counter mode the draws are keyed on the rows' unique ids, so they
+        do not depend on how rows are batched or which draws came before. A
+        slot's draws are made for every row on its first use in a step and
+        indexed from then on (rows are only appended until _compact).
+        """
+        if self.streams:
+            row = self._slot_draws.get(slot)
+            if row is None:
+                row = self._slot_draws[slot] = self.streams.uniforms(self.unique_id, self._steps, slot)
+            return row[idx]
+        return self.rng.random(len(idx))
+
+    def _occupancy(self, mask):
+        """Per-cell count of the agents selected by mask, as a (width, height) grid."""
+        counts = np.bincount(self.cell[mask], minlength=self.width * self.height)
+        return counts.reshape(self.width, self.height)
+
+    def _neighbor_cells(self, cells, offsets):
+        """Flat indices of the toroidal neighbor cells around each cell, one row per cell."""
+        x = cells // self.height
+        y = cells % self.height
+        nx = (x[:, None] + offsets[0][None, :]) % self.width
+        ny = (y[:, None] + offsets[1][None, :]) % self.height
+        return nx * self.height + ny
+
+    def _moore_cells(self, idx):
+        """The 8 Moore neighbor cells of each agent row in idx."""
+        return self._neighbor_cells(self.cell[idx], self._r1)
+
+    def _offset_cells(self, cells, offsets, column):
+        """Flat index of the neighbor cell at offsets[:, column[i]] around each cells[i]."""
+        x = (cells // self.height + offsets[0][column]) % self.width
+        y = (cells % self.height + offsets[1][column]) % self.height
+        return x * self.height + y
+
+    def _free_options(self, movers, blocking):
+        """(n, 8) mask of the Moore cells around each mover that hold no blocking agent."""
+        return blocking[self._moore_cells(movers)] == 0
+
+    def _square_counts(self, workers, aug_grid, auto_grid):
+        """Augmented and automated agents in the radius-2 square around each worker."""
+        square = self._neighbor_cells(self.cell[workers], self._r2)
+        return aug_grid[square].sum(axis=1), auto_grid[square].sum(axis=1)
+
+    def _resolve_claims(self, claimants, targets, priority):
+        """Mask of claimants that win their target (lowest priority, then lowest id)."""
+        # Most targets have a single claimant; only the contested ones need sorting
+        won = np.bincount(targets, minlength=self.width * self.height)[targets] == 1
+        contested = np.flatnonzero(~won)
+        if len(contested):
+            targets = targets[contested]
+            order = np.lexsort((self.unique_id[claimants[contested]], priority[contested], targets))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = targets[order][1:] != targets[order][:-1]
+            won[contested[order[first]]] = True
+        return won
+
+    def _refresh_aggregates(self):
+        """Per-state population and wealth, in the same form EvolutionaryModel keeps them."""
+        self.state_counts = np.bincount(self.state, minlength=NUM_STATES).tolist()
+        self.state_wealth = np.bincount(self.state, weights=self.wealth, minlength=NUM_STATES).tolist()
+
+    # --- PHASES ---
+    # Each phase acts on the agent rows in idx and reads the current arrays,
+    # so agents in later activation batches see the effects of earlier ones.
+
+    def _economics(self):
+        robots = self.state == AUTOMATED
+        ubi = self.state == UBI_RECIPIENT
+        others = ~robots & ~ubi
+
+        self.wealth[ubi] += self.ubi_payout_opt_out
+        self.wealth[others] += self.ubi_payout_worker
+        self.wealth[~robots] -= self.cost_of_living
+
+        gross_income = self.revenue[robots]
+        tax_bill = gross_income * self.robot_tax_rate
+        self.government_pot += float(tax_bill.sum())
+        self.wealth[robots] += gross_income - tax_bill
+
+    def _log(self, type, rows, amount, other=NO_AGENT, cause=NO_CAUSE, amount2=0.0):
+        """One event per agent row in model.events (callers check that it is not None)"""
+        cells = self.cell[rows]
+        self.events.record_many(self._steps + 1, type, self.unique_id[rows], cells // self.height,
+                                cells % self.height, self.state[rows], amount, other, cause, amount2)
+
+    def _remove(self, rows):
+        if self.events is not None:
+            self._log(REMOVE, rows, self.wealth[rows])
+        self._alive[rows] = False
+        self.total_removed += len(rows)
+        self.removed_this_step += len(rows)
+
+    def _rehire(self, idx):
+        """CASE 1: displaced agents on a cell with no active squatters may be rehired."""
+        if len(idx) == 0:
+            return
+        active = (self.state != DISPLACED) & (self.state != UBI_RECIPIENT) & self._alive
+        squatters = self._occupancy(active).ravel()
+
+        free = squatters[self.cell[idx]] == 0
+        hired = free & (self._draw(SLOT_HIRE, idx) < self.hiring_chance)
+        upskilled = self._draw(SLOT_UPSKILL, idx) < self.upskill_chance
+
+        rows = idx[hired]
+        self.state[rows] = np.where(upskilled[hired], AUGMENTED, HUMAN)
+        self.displaced_by[rows] = NO_DISPLACER
+        self.total_retrained += len(rows)
+        self.retrained_this_step += len(rows)
+        if self.events is not None:
+            self._log(REHIRE, rows, self.wealth[rows])
+
+    def _move(self, movers):
+        """Active agents step to a random free Moore cell; UBI agents never block.
+
+        Movers that lose a conflict retry against the updated grid, so cells
+        vacated earlier in the phase can be taken, as in sequential stepping.
+        """
+        blocking = self._occupancy((self.state != UBI_RECIPIENT) & self._alive).ravel()
+        for round_ in range(MOVE_ROUNDS):
+            if len(movers) == 0:
+                return
+            free = self._free_options(movers, blocking)
+            n_free = free.sum(axis=1)
+
+            # Pick the k-th free option uniformly, in neighborhood order
+            slot = SLOT_MOVE + 2 * round_
+            k = np.floor(self._draw(slot, movers) * n_free).astype(np.int64)
+            column = np.argmax(free.cumsum(axis=1) > k[:, None], axis=1)
+            priority = self._draw(slot + 1, movers)
+
+            can_move = n_free > 0
+            movers = movers[can_move]
+            targets = self._offset_cells(self.cell[movers], self._r1, column[can_move])
+            won = self._resolve_claims(movers, targets, priority[can_move])
+
+            np.subtract.at(blocking, self.cell[movers[won]], 1)
+            blocking[targets[won]] += 1
+            self.cell[movers[won]] = targets[won]
+            movers = movers[~won]
+
+    def _merge(self, idx):
+        """CASE 2: robots with enough robot neighbors absorb one of them."""
+        if len(idx) == 0:
+            return
+        robots = np.flatnonzero((self.state == AUTOMATED) & self._alive)
+        robot_grid = np.bincount(self.cell[robots], minlength=self.width * self.height)
+        options = self._moore_cells(idx)
+        counts = robot_grid[options]
+        total = counts.sum(axis=1)
+
+        candidate = total >= max(self.combination_threshold, 1)
+        absorbers = idx[candidate]
+        if len(absorbers) == 0:
+            return
+        counts = counts[candidate]
+        cumulative = counts.cumsum(axis=1)
+
+        # Choose the k-th robot neighbor: the column holding it, then its rank in that cell
+        k = np.floor(self._draw(SLOT_MERGE, absorbers) * total[candidate]).astype(np.int64)
+        column = np.argmax(cumulative > k[:, None], axis=1)
+        rows = np.arange(len(absorbers))
+        rank = k - (cumulative[rows, column] - counts[rows, column])
+        target_cell = options[candidate][rows, column]
+
+        # Robots sorted by (cell, id) so each cell's robots are contiguous
+        by_cell = robots[np.lexsort((self.unique_id[robots], self.cell[robots]))]
+        start = np.searchsorted(self.cell[by_cell], target_cell)
+        targets = by_cell[start + rank]
+
+        won = self._resolve_claims(absorbers, targets, self._draw(SLOT_MERGE_PRIORITY, absorbers))
+        absorbers, targets = absorbers[won], targets[won]
+        # A robot that is absorbed this step cannot absorb another one
+        keep = ~np.isin(absorbers, targets)
+        absorbers, targets = absorbers[keep], targets[keep]
+
+        if self.events is not None:
+            self._log(MERGE, absorbers, self.revenue[targets], other=self.unique_id[targets],
+                      amount2=self.wealth[targets])
+        self.revenue[absorbers] += self.revenue[targets]
+        self.wealth[absorbers] += self.wealth[targets]
+        self._alive[targets] = False
+        self.total_merged += len(targets)
+
+    def _work(self, workers):
+        """CASE 3: wages, bankruptcy, square influence and worker transitions."""
+        if len(workers) == 0:
+            return
+        wage = np.where(self.state[workers] == HUMAN, self.wage_human, self.wage_augmented)
+        self.wealth[workers] += wage
+
+        broke = self.wealth[workers] <= 0
+        self._remove(workers[broke])
+        workers, wage = workers[~broke], wage[~broke]
+
+        # Radius-2 square influence: a 5x5 toroidal stencil without the center cell
+        aug_grid = self._occupancy((self.state == AUGMENTED) & self._alive).ravel()
+        auto_grid = self._occupancy((self.state == AUTOMATED) & self._alive).ravel()
+        n_augmented, n_automated = self._square_counts(workers, aug_grid, auto_grid)
+        state = self.state[workers]
+        pending = np.ones(len(workers), dtype=bool)
+
+        # --- EFFICIENCY SQUEEZE LOGIC ---
+        squeezed = (state == HUMAN) & (n_augmented >= self.adopt_human_augmented_thresh)
+        displace = squeezed & (self._draw(SLOT_DISPLACE, workers) < self.human_displacement_chance)
+        adopt = squeezed & ~displace & (self._draw(SLOT_ADOPT, workers) < self.adopt_human_augmented_prob)
+        self._displace(workers[displace], AUGMENTED)
+        self.state[workers[adopt]] = AUGMENTED
+        if self.events is not None:
+            self._log(ADOPT, workers[adopt], self.wealth[workers[adopt]])
+        pending &= ~(displace | adopt)
+
+        # --- AUTOMATION EVENT: spawn a robot, displace its creator ---
+        automate = (pending & (state == AUGMENTED)
+                    & (n_augmented >= self.automation_threshold)
+                    & (self._draw(SLOT_AUTOMATE, workers) < self.automation_chance))
+        creators = workers[automate]
+        # _spawn_robots numbers the creators' robots from current_id_counter, in this order
+        self._displace(creators, AUTOMATED, robots=self.current_id_counter + np.arange(len(creators)))
+        pending &= ~automate
+
+        # --- AUTOMATION DISPLACEMENT PRESSURE ---
+        pushed = pending & (n_automated >= self.displacement_threshold)
+        self._displace(workers[pushed], AUTOMATED, loot=np.where(n_automated[pushed] > 0, wage[pushed], 0.0))
+        if pushed.any():
+            # Each pushed worker splits its wage across the robots in its square (none: nothing to split)
+            robots_around = n_automated[pushed]
+            share = np.where(robots_around > 0, wage[pushed] / np.maximum(robots_around, 1), 0.0)
+            loot = np.zeros(self.width * self.height)
+            square = self._neighbor_cells(self.cell[workers[pushed]], self._r2)
+            np.add.at(loot, square, share[:, None])
+            robots = np.flatnonzero((self.state == AUTOMATED) & self._alive)
+            self.revenue[robots] += loot[self.cell[robots]]
+
+        self._spawn_robots(creators)
+
+    def _displace(self, rows, displaced_by, robots=NO_AGENT, loot=0.0):
+        self.state[rows] = DISPLACED
+        self.displaced_by[rows] = displaced_by
+        self.displaced_this_step += len(rows)
+        if self.events is not None:
+            self._log(DISPLACE, rows, self.wealth[rows], other=robots, cause=displaced_by, amount2=loot)
+
+    def _spawn_robots(self, creators):
+        """New robots join at their creator's cell and first act next step."""
+        n = len(creators)
+        if n == 0:
+            return
+        ids = np.arange(self.current_id_counter, self.current_id_counter + n, dtype=np.int64)
+        self.current_id_counter += n
+        self.unique_id = np.concatenate([self.unique_id, ids])
+        self.state = np.concatenate([self.state, np.full(n, AUTOMATED, dtype=np.int8)])
+        self.wealth = np.concatenate([self.wealth, np.zeros(n)])
+        self.revenue = np.concatenate([self.revenue, np.full(n, float(self.wage_augmented))])
+        self.displaced_by = np.concatenate([self.displaced_by, np.full(n, NO_DISPLACER, dtype=np.int8)])
+        self.cell = np.concatenate([self.cell, self.cell[creators]])
+        self._alive = np.concatenate([self._alive, np.ones(n, dtype=bool)])
+        self._batch = np.concatenate([self._batch, np.full(n, -1)])
+        if self.events is not None:
+            self._log(SPAWN, np.arange(len(self.state) - n, len(self.state)), float(self.wage_augmented),
+                      other=self.unique_id[creators])
+
+    def _compact(self):
+        alive = self._alive
+        if alive.all():
+            return
+        self.unique_id = self.unique_id[alive]
+        self.state = self.state[alive]
+        self.wealth = self.wealth[alive]
+        self.revenue = self.revenue[alive]
+        self.displaced_by = self.displaced_by[alive]
+        self.cell = self.cell[alive]
+
+    def _update_payouts(self):
+        count_ubi = self.state_counts[UBI_RECIPIENT]
+        count_workers = self.state_counts[HUMAN] + self.state_counts[AUGMENTED] + self.state_counts[DISPLACED]
+
+        pot_ubi = self.government_pot * self.ubi_class_tax_share
+        pot_workers = self.government_pot * (1 - self.ubi_class_tax_share)
+
+        self.ubi_payout_opt_out = pot_ubi / count_ubi if count_ubi > 0 else 0
+        self.ubi_payout_worker = pot_workers / count_workers if count_workers > 0 else 0
+
+    def step(self):
+        self.removed_this_step = 0
+        self.retrained_this_step = 0
+        self.displaced_this_step = 0
+        self.government_pot = 0
+
+        n = len(self.state)
+        self._slot_draws = {}
+        self._alive = np.ones(n, dtype=bool)
+        everyone = np.arange(n)
+        self._batch = np.floor(self._draw(SLOT_ORDER, everyone) * self.activation_batches).astype(np.int64)
+
+        self._economics()
+
+        # CASE 0: UBI recipients who ran out of money leave
+        self._remove(np.flatnonzero((self.state == UBI_RECIPIENT) & (self.wealth <= 0)))
+
+        # Activation batches stand in for RandomActivation's shuffled order
+        for batch in range(self.activation_batches):
+            idx = np.flatnonzero((self._batch == batch) & self._alive)
+            state = self.state[idx]
+            self._rehire(idx[state == DISPLACED])
+            self._move(idx[(state != DISPLACED) & (state != UBI_RECIPIENT)])
+            robots = idx[state == AUTOMATED]
+            self._merge(robots[self._alive[robots]])
+            workers = idx[(state == HUMAN) | (state == AUGMENTED)]
+            self._work(workers)
+
+        self._compact()
+        self._refresh_aggregates()
+        self._update_payouts()
+
+        self._advance_time()
+        if self.events is not None:
+            self.events.end_step(self._steps)
+        self.datacollector.collect(self)
+
+        if self.stopping and self.running:
+            self.stopping.update(self)